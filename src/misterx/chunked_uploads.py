@@ -0,0 +1,112 @@
+"""
+Resumable uploads for proofs.
+
+A client creates an upload with the file name, size and checksum, then sends the file in chunks with PATCH requests
+that carry the offset of the chunk in the Upload-Offset header. After a dropped connection, a HEAD request returns
+how many bytes have been received, so only the missing bytes have to be sent again. Once all bytes have arrived,
+the checksum is verified and the upload can be attached to a submission.
+"""
+
+import hashlib
+import zlib
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import ChunkedUpload
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+class OffsetMismatch(Exception):
+    pass
+
+
+class Crc32:
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data: bytes):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f"{self.value:08x}"
+
+
+CHECKSUM_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "crc32": Crc32,
+}
+
+
+def parse_checksum(checksum: str) -> tuple[str, str]:
+    algorithm, _, digest = checksum.partition(":")
+    if algorithm not in CHECKSUM_ALGORITHMS or not digest:
+        raise ValueError(checksum)
+    return algorithm, digest.lower()
+
+
+def get_checksum(upload: ChunkedUpload) -> str:
+    algorithm, _ = parse_checksum(upload.checksum)
+    checksum = CHECKSUM_ALGORITHMS[algorithm]()
+    with upload.path.open("rb") as f:
+        while data := f.read(STREAM_CHUNK_SIZE):
+            checksum.update(data)
+    return checksum.hexdigest()
+
+
+def append_chunk(upload: ChunkedUpload, offset: int, stream) -> int:
+    error = None
+    with transaction.atomic():
+        # Concurrent requests for the same upload wait for the lock, so only one of them writes to the file. Without
+        # row locks (SQLite), the conditional update below still only lets one of them advance the offset.
+        current = ChunkedUpload.objects.select_for_update().only("offset", "completed").get(pk=upload.pk)
+        upload.offset, upload.completed = current.offset, current.completed
+        if upload.completed or offset != upload.offset:
+            raise OffsetMismatch(upload.offset)
+
+        # Stream the request body to disk, keep whatever arrived if the connection drops
+        upload.path.parent.mkdir(parents=True, exist_ok=True)
+        received = 0
+        try:
+            with upload.path.open("r+b" if upload.path.exists() else "wb") as f:
+                f.seek(offset)
+                f.truncate()
+                while data := stream.read(min(STREAM_CHUNK_SIZE, upload.size - offset - received)):
+                    f.write(data)
+                    received += len(data)
+        except OSError as e:
+            error = e
+
+        advanced = received and ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(offset=F("offset") + received)
+        if advanced:
+            upload.offset = offset + received
+
+    if error is not None:
+        raise error
+    if received and not advanced:
+        upload.refresh_from_db(fields=["offset", "completed"])
+        raise OffsetMismatch(upload.offset)
+    if upload.offset == upload.size:
+        complete(upload)
+    return upload.offset
+
+
+def complete(upload: ChunkedUpload):
+    if get_checksum(upload) != parse_checksum(upload.checksum)[1]:
+        # Start over, the received data is corrupt
+        upload.path.unlink(missing_ok=True)
+        upload.offset = 0
+        upload.save(update_fields=["offset"])
+        raise ChecksumMismatch()
+    upload.completed = True
+    upload.save(update_fields=["completed"])
+
+
+def delete_chunked_upload(upload: ChunkedUpload):
+    upload.path.unlink(missing_ok=True)
+    upload.delete()
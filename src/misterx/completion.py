@@ -0,0 +1,55 @@
+from typing import NamedTuple
+
+from django.db.models import Count, Min, Q
+
+from .models import Game, PlayerGroup, Submission, Task
+
+
+class CompletionCell(NamedTuple):
+    completed: bool
+    first_accepted: object
+    attempts: int
+
+
+EMPTY_CELL = CompletionCell(completed=False, first_accepted=None, attempts=0)
+
+
+class CompletionMatrix:
+    """
+    Which group has completed which task of a game, built from a single aggregated query over the submissions.
+    """
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.cells: dict[tuple[int, int], CompletionCell] = {}
+        self.completed_tasks: set[int] = set()
+
+        for row in self.get_queryset(game):
+            completed = row["accepted_count"] > 0
+            self.cells[row["group"], row["task"]] = CompletionCell(completed, row["first_accepted"], row["attempts"])
+            if completed:
+                self.completed_tasks.add(row["task"])
+
+    @staticmethod
+    def get_queryset(game: Game):
+        return (
+            Submission.objects.filter(game=game)
+            .order_by()
+            .values("group", "task")
+            .annotate(
+                accepted_count=Count("pk", filter=Q(accepted=True)),
+                first_accepted=Min("time", filter=Q(accepted=True)),
+                attempts=Count("pk"),
+            )
+        )
+
+    def cell(self, task: Task | int, group: PlayerGroup | int) -> CompletionCell:
+        task_id = task if isinstance(task, int) else task.pk
+        group_id = group if isinstance(group, int) else group.pk
+        return self.cells.get((group_id, task_id), EMPTY_CELL)
+
+    def has_been_completed(self, task: Task | int) -> bool:
+        return (task if isinstance(task, int) else task.pk) in self.completed_tasks
+
+    def completed_by_group(self, task: Task | int, group: PlayerGroup | int) -> bool:
+        return self.cell(task, group).completed
@@ -0,0 +1,144 @@
+"""
+Smaller versions of image proofs and poster frames of video proofs.
+
+They are stored next to the original as ``<original>.<width>w.<format>`` or ``<original>.poster.jpeg``, so serve_proofs
+can find the original upload for them. As an original may be named like a derivative, a name only belongs to a derivative
+if it is recorded in Upload.derivatives. Pillow is needed for generating them, extracting poster frames additionally
+needs ffmpeg. Without them, the originals are shown.
+"""
+
+import io
+import logging
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from .models import Upload
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+DERIVATIVE_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+DERIVATIVE_QUALITY = 80
+DERIVATIVE_PATTERN = re.compile(r"\.(\d+w\.(webp|jpeg)|poster\.jpeg)$")
+
+# Generating derivatives is done in the background, one at a time, to not slow down the upload.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="derivatives")
+
+
+def get_original_name(name: str) -> str:
+    # The name of the upload the file would be a derivative of, whether it is one is up to is_file_of
+    return DERIVATIVE_PATTERN.sub("", name)
+
+
+def is_file_of(upload: dict, name: str) -> bool:
+    return upload["file"] == name or any(derivative["name"] == name for derivative in upload["derivatives"])
+
+
+def save_image(storage, name: str, image, image_format: str) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=DERIVATIVE_QUALITY)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def create_image_derivatives(upload: Upload, image) -> list[dict]:
+    from PIL import ImageOps
+
+    # Phones store the orientation separately, apply it before dropping the metadata
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    storage = upload.file.storage
+    derivatives = []
+    for width in DERIVATIVE_WIDTHS:
+        if width >= image.width and width != DERIVATIVE_WIDTHS[0]:
+            break
+        resized = image.copy()
+        resized.thumbnail((width, width * 4))
+        for extension, image_format in DERIVATIVE_FORMATS.items():
+            name = save_image(storage, f"{upload.file.name}.{width}w.{extension}", resized, image_format)
+            derivatives.append({"name": name, "width": resized.width, "format": extension})
+    return derivatives
+
+
+def create_video_poster(upload: Upload) -> list[dict]:
+    from PIL import Image
+
+    try:
+        path = upload.file.path
+    except NotImplementedError:
+        # ffmpeg needs a local file
+        return []
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-frames:v", "1", "-f", "image2", "-c:v", "mjpeg", "pipe:1"],
+        capture_output=True,
+        timeout=60,
+        check=False,
+    )
+    if result.returncode or not result.stdout:
+        return []
+    image = Image.open(io.BytesIO(result.stdout)).convert("RGB")
+    image.thumbnail((DERIVATIVE_WIDTHS[-1], DERIVATIVE_WIDTHS[-1] * 4))
+    name = save_image(upload.file.storage, f"{upload.file.name}.poster.jpeg", image, "JPEG")
+    return [{"name": name, "width": image.width, "format": "poster"}]
+
+
+def delete_derivatives(upload: Upload):
+    for derivative in upload.derivatives:
+        upload.file.storage.delete(derivative["name"])
+
+
+def generate_derivatives(upload: Upload) -> list[dict]:
+    try:
+        from PIL import Image
+    except ImportError:
+        return []
+
+    # Remove the previous derivatives first, so the new ones get the same names
+    Upload.objects.filter(pk=upload.pk).update(derivatives=[])
+    delete_derivatives(upload)
+
+    derivatives = []
+    if upload.main_mime_type == "image":
+        with upload.file.open("rb") as f, Image.open(f) as image:
+            derivatives = create_image_derivatives(upload, image)
+    elif upload.main_mime_type == "video" and shutil.which("ffmpeg"):
+        derivatives = create_video_poster(upload)
+
+    upload.derivatives = derivatives
+    Upload.objects.filter(pk=upload.pk).update(derivatives=derivatives)
+    return derivatives
+
+
+def generate_derivatives_for(pk: int):
+    try:
+        generate_derivatives(Upload.objects.get(pk=pk))
+    except Exception:
+        logger.exception("Generating derivatives for upload %s failed", pk)
+    finally:
+        close_old_connections()
+
+
+def threads_enabled() -> bool:
+    """
+    Whether threads started by the application run. uWSGI 2.0 only enables the GIL with enable-threads or more than
+    one thread per worker, otherwise these threads never run.
+    """
+    try:
+        import uwsgi
+    except ImportError:
+        return True
+    return bool(uwsgi.opt.get("enable-threads")) or int(uwsgi.opt.get("threads") or 1) > 1
+
+
+def schedule_derivatives(upload: Upload):
+    if not settings.PROOF_DERIVATIVES:
+        return
+    if threads_enabled():
+        transaction.on_commit(lambda: _executor.submit(generate_derivatives_for, upload.pk))
+    else:
+        logger.warning("Threads are disabled, generating derivatives during the request. Run uWSGI with --enable-threads.")
+        transaction.on_commit(lambda: generate_derivatives_for(upload.pk))
@@ -0,0 +1,159 @@
+"""
+Events about submissions and scores, streamed to the browsers as server-sent events so pages update in place.
+
+Events are sent after the transaction commits. On PostgreSQL they go through NOTIFY, and every process LISTENs on one
+connection and hands them to its open streams, so an event reaches the streams of all workers. Other databases only
+reach the streams of the process that sent the event, which is enough for the development server.
+
+The streams are async and only served under ASGI, where an open stream costs no thread. Under WSGI every stream would
+occupy a worker for its whole duration, so the pages poll instead, see EventStreamView.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "misterx_events"
+
+# Events for reviewers and for the players of a group
+STAFF_EVENTS = frozenset({"submission", "queue"})
+PLAYER_EVENTS = frozenset({"reviewed", "score"})
+
+# Events a stream may fall behind before further events are dropped for it
+STREAM_BACKLOG = 100
+
+
+class Broker:
+    """
+    Passes events to the streams of this process. The streams wait in the event loop, events are handed to them from
+    other threads, e.g. of sync views or of the listener. On PostgreSQL, a thread listening for notifications is
+    started with the first stream.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self.listener: threading.Thread | None = None
+
+    def subscribe(self) -> tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=STREAM_BACKLOG))
+        with self.lock:
+            self.subscribers.add(subscription)
+            if connection.vendor == "postgresql" and self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name="misterx-events", daemon=True)
+                self.listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription: tuple[asyncio.AbstractEventLoop, asyncio.Queue]):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def dispatch(self, event: dict):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for loop, subscription in subscribers:
+            try:
+                loop.call_soon_threadsafe(put_event, subscription, event)
+            except RuntimeError:
+                # The loop was closed, e.g. when the server shut down
+                pass
+
+    def listen(self):
+        while True:
+            listener = connections.create_connection("default")
+            try:
+                listener.set_autocommit(True)
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                while True:
+                    for payload in get_notifications(listener.connection, timeout=settings.EVENT_STREAM_HEARTBEAT):
+                        self.dispatch(json.loads(payload))
+            except Exception:
+                logger.exception("Listening for events failed, reconnecting")
+                time.sleep(1)
+            finally:
+                listener.close()
+
+
+def get_notifications(raw_connection, timeout: float) -> Iterator[str]:
+    if hasattr(raw_connection, "poll"):
+        # psycopg2
+        if select.select([raw_connection], [], [], timeout)[0]:
+            raw_connection.poll()
+        while raw_connection.notifies:
+            yield raw_connection.notifies.pop(0).payload
+    else:
+        # psycopg 3
+        for notify in raw_connection.notifies(timeout=timeout):
+            yield notify.payload
+
+
+def put_event(subscription: asyncio.Queue, event: dict):
+    try:
+        subscription.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+broker = Broker()
+
+
+def send(event: dict):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, json.dumps(event)])
+    else:
+        broker.dispatch(event)
+
+
+def publish(event_type: str, game_id: int, group_id: int | None = None, **data):
+    event = {"type": event_type, "game": game_id, "group": group_id, **data}
+    transaction.on_commit(lambda: send(event))
+
+
+def publish_queue_depth(game_id: int):
+    # Counted after the commit, so the depth includes the change that caused the event
+    def send_queue_depth():
+        send({"type": "queue", "game": game_id, "depth": Submission.objects.filter(game_id=game_id, accepted=None).count()})
+
+    transaction.on_commit(send_queue_depth)
+
+
+def format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_events(event_types: frozenset[str], game_id: int, group_id: int | None = None) -> AsyncIterator[str]:
+    """
+    Server-sent events of the given types for a game, and for a group if given. A comment is sent when nothing
+    happened for a while, which keeps proxies from closing the connection and notices clients that went away. The
+    stream ends after EVENT_STREAM_DURATION, the browser reconnects on its own.
+    """
+    loop, subscription = broker.subscribe()
+    try:
+        yield f"retry: {settings.EVENT_STREAM_RETRY * 1000}\n\n"
+        deadline = loop.time() + settings.EVENT_STREAM_DURATION
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=min(settings.EVENT_STREAM_HEARTBEAT, remaining))
+            except TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if event["type"] not in event_types or event["game"] != game_id:
+                continue
+            if group_id is not None and event["group"] != group_id:
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe((loop, subscription))
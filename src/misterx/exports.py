@@ -0,0 +1,150 @@
+"""
+Exports of the tasks, groups, submissions and scores of a game as CSV or newline delimited JSON.
+
+Rows are read with a server-side cursor where the database supports it and written one at a time, so an export of any
+size needs the same memory and the first bytes are sent right away. Texts in CSV files that spreadsheets would run as
+formulas are prefixed with an apostrophe, the newline delimited JSON has them as they are.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .leaderboard import get_leaderboard
+from .models import Game, Membership, OrderedTask, Submission
+
+# Content types of the formats
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+CHUNK_SIZE = 2000
+# Spreadsheets run cells starting with these as formulas, e.g. from the texts of players
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# Rows are sent in pieces of about this many characters instead of each on its own
+BUFFER_SIZE = 64 * 1024
+
+
+def export_tasks(game: Game) -> tuple[list[str], Iterable[tuple]]:
+    fields = ["task_number", "task_id", "task", "points", "solution"]
+    rows = (
+        OrderedTask.objects.filter(game=game)
+        .order_by("task_number", "pk")
+        .values_list("task_number", "task", "task__task", "task__points", "task__solution")
+    )
+    return fields, rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+def export_groups(game: Game) -> tuple[list[str], Iterable[tuple]]:
+    fields = ["group_id", "name", "players"]
+    players: dict[int, list[str]] = {}
+    memberships = Membership.objects.filter(game=game).order_by("user__username").values_list("group", "user__username")
+    for group_id, username in memberships:
+        players.setdefault(group_id, []).append(username)
+    groups = game.groups.order_by("name").values_list("pk", "name")
+    return fields, ((pk, name, " ".join(players.get(pk, []))) for pk, name in groups)
+
+
+def export_submissions(game: Game) -> tuple[list[str], Iterator[tuple]]:
+    fields = [
+        "submission_id",
+        "time",
+        "group_id",
+        "group",
+        "task_number",
+        "task_id",
+        "submitter",
+        "accepted",
+        "points_override",
+        "granted_points",
+        "explanation",
+        "feedback",
+    ]
+    task_numbers = dict(OrderedTask.objects.filter(game=game).values_list("task", "task_number"))
+    # awarded_points holds the granted points of every submission, computing them per row would be a subquery each
+    submissions = (
+        Submission.objects.filter(game=game)
+        .order_by("time", "pk")
+        .values_list(
+            "pk",
+            "time",
+            "group",
+            "group__name",
+            "task",
+            "submitter__username",
+            "accepted",
+            "points_override",
+            "awarded_points",
+            "explanation",
+            "feedback",
+        )
+    )
+
+    def rows():
+        for pk, time, group_id, group, task_id, *rest in submissions.iterator(chunk_size=CHUNK_SIZE):
+            yield pk, time, group_id, group, task_numbers.get(task_id), task_id, *rest
+
+    return fields, rows()
+
+
+def export_scores(game: Game) -> tuple[list[str], Iterator[tuple]]:
+    fields = ["rank", "group_id", "group", "points"]
+    scores = get_leaderboard(game).values_list("group", "group__name", "points")
+    return fields, ((rank, *score) for rank, score in enumerate(scores, start=1))
+
+
+EXPORTS = {
+    "tasks": export_tasks,
+    "groups": export_groups,
+    "submissions": export_submissions,
+    "scores": export_scores,
+}
+
+
+class Echo:
+    """
+    A file that returns what is written to it, for csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def escape_formula(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def format_csv(fields: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([escape_formula(value) for value in row])
+
+
+def format_ndjson(fields: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row, strict=True)), cls=DjangoJSONEncoder) + "\n"
+
+
+def buffered(chunks: Iterable[str]) -> Iterator[str]:
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def export_game(game: Game, kind: str, export_format: str) -> Iterator[str]:
+    fields, rows = EXPORTS[kind](game)
+    if export_format == "csv":
+        return buffered(format_csv(fields, rows))
+    return buffered(format_ndjson(fields, rows))
@@ -0,0 +1,93 @@
+import hashlib
+import uuid
+
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count
+
+from utilities.cache import get_shared_cache
+
+FACET_TIMEOUT = 10 * 60
+
+# The values needed to label each choice, these mirror the __str__ methods of the related models
+FACET_LABELS = {
+    "group": (("group__name",), "{group__name}"),
+    "game": (("game__name",), "{game__name}"),
+    "task": (("task__task", "task__points"), "{task__task} ({task__points}P)"),
+    "submitter": (("submitter__username",), "{submitter__username}"),
+}
+
+
+def get_version_key(game_id=None) -> str:
+    return f"misterx:submissions:version:{game_id or 'all'}"
+
+
+def get_version(cache, game_id=None) -> str:
+    key = get_version_key(game_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate_submission_facets(game_id):
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    cache.delete_many([get_version_key(game_id), get_version_key()])
+
+
+class SubmissionFacets:
+    """
+    Choices for the related fields of submission filters, computed lazily for a base queryset in one grouped query
+    and cached until a submission of the game is written. Without a cache shared by the workers, they are computed
+    for each request, see utilities/cache.py.
+    """
+
+    def __init__(self, queryset, fields, game_id=None):
+        self.queryset = queryset
+        self.fields = fields
+        self.game_id = game_id
+        self._facets = None
+
+    def get_cache_key(self, cache) -> str:
+        query_hash = hashlib.md5(str(self.queryset.query).encode(), usedforsecurity=False).hexdigest()
+        return f"misterx:submissions:facets:{get_version(cache, self.game_id)}:{query_hash}:{','.join(self.fields)}"
+
+    def compute(self) -> dict[str, list[tuple[int, str]]]:
+        label_fields = [label_field for field in self.fields for label_field in FACET_LABELS[field][0]]
+        rows = self.queryset.order_by().values(*self.fields, *label_fields).annotate(count=Count("pk"))
+
+        counts: dict[str, dict[int, list]] = {field: {} for field in self.fields}
+        for row in rows:
+            for field in self.fields:
+                if row[field] is None:
+                    continue
+                choice = counts[field].setdefault(row[field], [FACET_LABELS[field][1].format(**row), 0])
+                choice[1] += row["count"]
+
+        return {
+            field: sorted(((pk, f"{label} ({count})") for pk, (label, count) in choices.items()), key=lambda c: c[1])
+            for field, choices in counts.items()
+        }
+
+    @property
+    def facets(self):
+        if self._facets is None:
+            cache = get_shared_cache()
+            if cache is None:
+                self._facets = self.compute()
+                return self._facets
+            try:
+                key = self.get_cache_key(cache)
+            except EmptyResultSet:
+                self._facets = {field: [] for field in self.fields}
+            else:
+                self._facets = cache.get(key)
+                if self._facets is None:
+                    self._facets = self.compute()
+                    cache.set(key, self._facets, FACET_TIMEOUT)
+        return self._facets
+
+    def choices(self, field):
+        return lambda: self.facets[field]
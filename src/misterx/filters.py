@@ -1,7 +1,26 @@
-from django_filters import CharFilter, ChoiceFilter, FilterSet
+from django_filters import CharFilter, ChoiceFilter, FilterSet, NumberFilter
+from django_filters.constants import EMPTY_VALUES
 
+from .facets import SubmissionFacets
 from .forms import FilterForm
-from .models import Game, Player, PlayerGroup, Submission, Task
+from .models import Game, OrderedTask, Player, PlayerGroup, Submission, Task
+from .search import filter_contains
+
+
+class SearchFilter(CharFilter):
+    """
+    Filters by a part of a text like lookup_expr="icontains", using the search indexes of misterx.search.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Also labels the filter like one with that lookup
+        kwargs.setdefault("lookup_expr", "icontains")
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return filter_contains(qs, self.field_name, value)
 
 
 class GameFilter(FilterSet):
@@ -17,8 +36,8 @@ class GameFilter(FilterSet):
 
 
 class TaskFilter(FilterSet):
-    task = CharFilter(lookup_expr="icontains")
-    solution = CharFilter(lookup_expr="icontains")
+    task = SearchFilter()
+    solution = SearchFilter()
 
     class Meta:
         model = Task
@@ -30,8 +49,32 @@ class TaskFilter(FilterSet):
         ]
 
 
+class TaskSearchFilter(FilterSet):
+    """
+    Search of the task library for the task picker, paginated by passing the last id of the previous page as after.
+    """
+
+    q = SearchFilter(field_name="task")
+    min_points = NumberFilter(field_name="points", lookup_expr="gte")
+    max_points = NumberFilter(field_name="points", lookup_expr="lte")
+    unused_in = NumberFilter(method="filter_unused_in", min_value=1)
+    exclude_game = NumberFilter(method="filter_exclude_game")
+    after = NumberFilter(field_name="pk", lookup_expr="gt")
+
+    def filter_unused_in(self, queryset, name, value):
+        recent_games = Game.objects.order_by("-date", "-pk").values("pk")[: int(value)]
+        return queryset.exclude(pk__in=OrderedTask.objects.filter(game__in=recent_games).values("task"))
+
+    def filter_exclude_game(self, queryset, name, value):
+        return queryset.exclude(pk__in=OrderedTask.objects.filter(game=value).values("task"))
+
+    class Meta:
+        model = Task
+        fields = []
+
+
 class UserTaskFilter(FilterSet):
-    task = CharFilter(lookup_expr="icontains")
+    task = SearchFilter()
 
     class Meta:
         model = Task
@@ -44,15 +87,22 @@ class UserTaskFilter(FilterSet):
 
 class SubmissionFilter(FilterSet):
     accepted = ChoiceFilter(null_label="Unreviewed", choices=((True, "Yes"), (False, "No")))
-    explanation = CharFilter(lookup_expr="icontains")
-    feedback = CharFilter(lookup_expr="icontains")
-
-    def __init__(self, *args, **kwargs):
+    explanation = SearchFilter()
+    feedback = SearchFilter()
+    # Requires a queryset annotated with Submission.objects.with_granted_points()
+    granted_points = NumberFilter()
+
+    group = ChoiceFilter()
+    game = ChoiceFilter()
+    task = ChoiceFilter()
+    submitter = ChoiceFilter()
+
+    # Only offer the choices present in the queryset, pass the game of the queryset to cache them for that game
+    def __init__(self, *args, game=None, **kwargs):
         super().__init__(*args, **kwargs)
-        for field in "group", "game", "task", "submitter":
-            self.filters[field].queryset = (
-                self.filters[field].queryset.filter(id__in=self.queryset.values_list(field, flat=True)).distinct()
-            )
+        facets = SubmissionFacets(self.queryset, ["group", "game", "task", "submitter"], getattr(game, "pk", game))
+        for field in facets.fields:
+            self.filters[field].extra["choices"] = facets.choices(field)
 
     class Meta:
         model = Submission
@@ -64,6 +114,7 @@ class SubmissionFilter(FilterSet):
             "submitter",
             "accepted",
             "points_override",
+            "granted_points",
             "explanation",
             "feedback",
         ]
@@ -98,15 +149,19 @@ class PlayerGroupFilter(FilterSet):
 
 class UserSubmissionFilter(FilterSet):
     accepted = ChoiceFilter(null_label="Unreviewed", choices=((True, "Yes"), (False, "No")))
-    explanation = CharFilter(lookup_expr="icontains")
-    feedback = CharFilter(lookup_expr="icontains")
+    explanation = SearchFilter()
+    feedback = SearchFilter()
+    # Requires a queryset annotated with Submission.objects.with_granted_points()
+    granted_points = NumberFilter()
 
-    def __init__(self, *args, **kwargs):
+    task = ChoiceFilter()
+    submitter = ChoiceFilter()
+
+    def __init__(self, *args, game=None, **kwargs):
         super().__init__(*args, **kwargs)
-        for field in "task", "submitter":
-            self.filters[field].queryset = (
-                self.filters[field].queryset.filter(id__in=self.queryset.values_list(field, flat=True)).distinct()
-            )
+        facets = SubmissionFacets(self.queryset, ["task", "submitter"], getattr(game, "pk", game))
+        for field in facets.fields:
+            self.filters[field].extra["choices"] = facets.choices(field)
 
     class Meta:
         model = Submission
@@ -115,6 +170,7 @@ class UserSubmissionFilter(FilterSet):
             "task",
             "submitter",
             "accepted",
+            "granted_points",
             "explanation",
             "feedback",
         ]
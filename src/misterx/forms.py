@@ -1,18 +1,28 @@
+import uuid
+
 from crispy_forms import layout
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db.models import Count, OuterRef, Subquery
+from django.db import transaction
+from django.db.models import Count
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from utilities.templatetags.utilities_media import get_main_mime_type
+from utilities.media import get_main_mime_type
 
-from .models import Game, OrderedTask, Player, PlayerGroup, Submission, Task
+from .imports import IMPORTERS
+from .models import ChunkedUpload, Game, OrderedTask, Player, PlayerGroup, Submission, Task
 
 
 class TaskSelectWidget(forms.SelectMultiple):
+    """
+    Sortable list of the tasks of a game. The available tasks are searched on demand, the task library is too large to
+    render completely.
+    """
+
     template_name = "generic/task_select_widget.html"
 
     def __init__(self, *args, game=None, **kwargs):
@@ -20,15 +30,19 @@ class TaskSelectWidget(forms.SelectMultiple):
         super().__init__(*args, **kwargs)
 
     def get_context(self, name, value, attrs):
-        context = super().get_context(name, value, attrs)
+        # Skip building an option for every task of the library, the template doesn't render them
+        context = forms.Widget.get_context(self, name, value, attrs)
         if self.game.pk:
-            selected = self.game.tasks.annotate(
-                task_number=Subquery(OrderedTask.objects.filter(game=self.game, task__pk=OuterRef("pk")).values("task_number"))
-            ).order_by("task_number")
+            selected = [ordered_task.task for ordered_task in OrderedTask.objects.filter(game=self.game).select_related("task")]
         else:
-            selected = Task.objects.none()
-        unselected = Task.objects.exclude(id__in=selected.values_list("id", flat=True))
-        context["widget"].update({"selected_tasks": selected, "unselected_tasks": unselected})
+            selected = []
+        context["widget"].update(
+            {
+                "selected_tasks": selected,
+                "search_url": reverse("misterx:task-search"),
+                "game": self.game.pk,
+            }
+        )
         return context
 
 
@@ -48,6 +62,8 @@ class MultipleFileField(forms.FileField):
         return super().clean(data, inital)
 
     def clean(self, data, initial=None):
+        if not data and not self.required:
+            return []
         if isinstance(data, list | tuple):
             result = [self.single_file_clean(d, initial) for d in data]
         else:
@@ -55,6 +71,35 @@ class MultipleFileField(forms.FileField):
         return result
 
 
+class ChunkedUploadField(forms.CharField):
+    """
+    Comma separated ids of the completed resumable uploads of a user, cleaned to the uploads.
+    """
+
+    widget = forms.HiddenInput
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("required", False)
+        self.user = None
+        super().__init__(*args, **kwargs)
+
+    def clean(self, value):
+        value = super().clean(value)
+        try:
+            ids = [uuid.UUID(i) for i in value.split(",") if i.strip()]
+        except ValueError:
+            raise ValidationError(_("Invalid upload."))
+        uploads = list(ChunkedUpload.objects.filter(uuid__in=ids, user=self.user, completed=True))
+        if len(uploads) != len(set(ids)):
+            raise ValidationError(_("An upload is missing or not complete, please upload the file again."))
+        for upload in uploads:
+            with upload.path.open("rb") as f:
+                mime_type = get_main_mime_type(f)
+            if mime_type not in settings.ALLOWED_UPLOADS:
+                raise ValidationError(_("The file type {mime_type} is not supported.").format(mime_type=mime_type))
+        return uploads
+
+
 class FilterForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -75,19 +120,40 @@ class GameForm(forms.ModelForm):
         self.fields["tasks"].widget = TaskSelectWidget(game=self.instance)
 
     def save(self, commit=True):
-        # Save the game first including all m2m relationships
-        game = super().save(commit=commit)
-
-        # Update order, only possible if the m2m relationships exist, which is the case
-        # if we have commited them just above
-        if commit:
-            for index, task_id in enumerate(self.data.getlist("tasks")):
-                ordered_task = OrderedTask.objects.get(game=game, task_id=task_id)
-                ordered_task.task_number = index + 1
-                ordered_task.full_clean()
-                ordered_task.save()
-
-        return game
+        # Save the game, its m2m relationships and the task order together
+        with transaction.atomic():
+            return super().save(commit=commit)
+
+    def _save_m2m(self):
+        # The tasks are saved by save_tasks together with their order
+        tasks = self.cleaned_data.pop("tasks", None)
+        super()._save_m2m()
+        if tasks is not None:
+            self.cleaned_data["tasks"] = tasks
+            self.save_tasks(tasks)
+
+    def save_tasks(self, tasks):
+        # Number the tasks in the order they were submitted in, ignoring invalid ids like the form field does
+        valid_ids = {str(pk): pk for pk in tasks.values_list("pk", flat=True)}
+        numbers = {
+            valid_ids[task_id]: index + 1 for index, task_id in enumerate(self.data.getlist("tasks")) if task_id in valid_ids
+        }
+
+        with transaction.atomic():
+            ordered_tasks = OrderedTask.objects.filter(game=self.instance)
+            existing = {ordered_task.task_id: ordered_task for ordered_task in ordered_tasks}
+            ordered_tasks.exclude(task_id__in=numbers).delete()
+            OrderedTask.objects.bulk_create(
+                OrderedTask(game=self.instance, task_id=task_id, task_number=number)
+                for task_id, number in numbers.items()
+                if task_id not in existing
+            )
+            moved = []
+            for task_id, number in numbers.items():
+                if task_id in existing and existing[task_id].task_number != number:
+                    existing[task_id].task_number = number
+                    moved.append(existing[task_id])
+            OrderedTask.objects.bulk_update(moved, ["task_number"])
 
     class Meta:
         model = Game
@@ -102,10 +168,10 @@ class GameForm(forms.ModelForm):
     # Check if any user is present in multiple of the selected groups
     def clean_groups(self):
         groups = self.cleaned_data["groups"]
-        if duplicates := groups.values_list("user").annotate(occurences=Count("id")).exclude(occurences=1):
+        if duplicates := Player.objects.filter(groups__in=groups).annotate(occurences=Count("id")).filter(occurences__gt=1):
             raise ValidationError(
                 _("These users are present in multiple groups: {users}").format(
-                    users=", ".join(str(Player.objects.get(pk=id)) for id, _ in duplicates)
+                    users=", ".join(str(player) for player in duplicates)
                 )
             )
         return groups
@@ -161,13 +227,17 @@ class SubmissionApproveForm(SubmissionForm):
         self.helper.title = "Submission"
         self.helper.add_input(Submit("deny", _("Deny"), css_class="btn btn-danger w-25"))
         self.helper.add_input(Submit("accept", _("Accept"), css_class="btn btn-success w-25 float-end"))
+        self.helper.add_input(Submit("skip", _("Skip"), css_class="btn btn-secondary ms-2", formnovalidate=""))
+        self.helper.add_input(Submit("release", _("Stop reviewing"), css_class="btn btn-link", formnovalidate=""))
 
         self.helper.layout = layout.Layout(
+            # Identifies the claimed submission, the queue might hand out another one in the meantime
+            layout.Hidden("submission", self.instance.pk),
             layout.Div(
                 layout.Div("points_override", css_class="col-md-2"),
                 layout.Div("feedback", css_class="col-md-10"),
                 css_class="row",
-            )
+            ),
         )
         # Add default points for task as placeholder in override
         self.fields["points_override"].widget.attrs.update({"placeholder": self.instance.task.points})
@@ -188,9 +258,8 @@ class GameSubmissionForm(SubmissionForm):
             self.fields[field].widget = forms.HiddenInput()
 
         # Limit displayed tasks to the tasks in the given game
-        game = Game.objects.get(pk=kwargs.get("initial").get("game"))
         self.fields["task"].choices = (
-            (t.task.id, str(t)) for t in OrderedTask.objects.filter(game=game, task__in=game.tasks.all())
+            (t.task.id, str(t)) for t in OrderedTask.objects.filter(game=self.initial.get("game")).select_related("task")
         )
         # Limit displayed submitters to the ones in the given group
         group = PlayerGroup.objects.get(pk=kwargs.get("initial").get("group"))
@@ -218,10 +287,10 @@ class PlayerForm(forms.ModelForm):
 
     def clean_groups(self):
         data = self.cleaned_data["groups"]
-        if duplicates := data.values_list("games").annotate(occurences=Count("id")).exclude(occurences=1):
+        if duplicates := Game.objects.filter(groups__in=data).annotate(occurences=Count("id")).filter(occurences__gt=1):
             raise ValidationError(
                 _("The selected groups conflict in these games: {games}").format(
-                    games=", ".join(str(Game.objects.get(pk=id)) for id, _ in duplicates)
+                    games=", ".join(str(game) for game in duplicates)
                 )
             )
         return data
@@ -244,18 +313,72 @@ class PlayerGroupForm(forms.ModelForm):
 
 
 class UserSubmissionForm(SubmissionForm):
-    proof = MultipleFileField()
+    # Large files are uploaded in resumable chunks by chunked-upload.js and passed as uploads
+    proof = MultipleFileField(required=False)
+    uploads = ChunkedUploadField()
+
+    class Media:
+        js = ["js/chunked-upload.js"]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields["uploads"].user = self.initial.get("submitter")
+        self.fields["proof"].widget.attrs.update(
+            {
+                "data-chunked-upload": reverse("misterx:chunked-upload-create"),
+                "data-chunked-upload-input": self["uploads"].auto_id,
+            }
+        )
         for field in "game", "group", "accepted", "submitter", "points_override", "feedback":
             self.fields[field].widget = forms.HiddenInput()
 
         # Limit displayed tasks to the tasks in the given game
-        game = Game.objects.get(pk=kwargs.get("initial").get("game"))
         self.fields["task"].choices = (
-            (t.task.id, str(t)) for t in OrderedTask.objects.filter(game=game, task__in=game.tasks.all())
+            (t.task.id, str(t)) for t in OrderedTask.objects.filter(game=self.initial.get("game")).select_related("task")
         )
 
     def clean_accepted(self):
         return False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get("proof") and not cleaned_data.get("uploads") and "proof" not in self.errors:
+            self.add_error("proof", _("This field is required."))
+        return cleaned_data
+
+
+class ImportForm(forms.Form):
+    kind = forms.ChoiceField(
+        label=_("Import"), choices=[("tasks", _("Tasks")), ("groups", _("Groups")), ("players", _("Players"))]
+    )
+    file = forms.FileField(
+        label=_("File"),
+        help_text=_(
+            "A CSV file with a header or a JSON list of objects. Tasks have the columns task, points and solution, "
+            "groups a name, players a username, first_name, last_name, is_active and their groups, separated by "
+            "semicolons in CSV. Existing tasks, groups and players with the same text, name or username are updated."
+        ),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.helper = FormHelper()
+        self.helper.form_id = "id_importForm"
+        self.helper.form_method = "post"
+        self.helper.title = _("Import")
+        self.helper.add_input(Submit("import", _("Import")))
+
+    def clean_kind(self):
+        kind = self.cleaned_data["kind"]
+        if not self.user.has_perms(IMPORTERS[kind].permissions):
+            raise ValidationError(_("You are not allowed to import these."))
+        return kind
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        extension = file.name.rsplit(".", 1)[-1].lower()
+        if extension not in ("csv", "json"):
+            raise ValidationError(_("Only CSV and JSON files can be imported."))
+        file.format = extension
+        return file
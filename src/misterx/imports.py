@@ -0,0 +1,300 @@
+"""
+Imports of tasks, groups and players from CSV or JSON files.
+
+A whole file is validated before anything is written, so all of its errors are reported at once. The rows are then
+written in one transaction with bulk queries. Importing a file again updates the objects instead of duplicating them:
+tasks are matched by their text, groups by their name and players by their username.
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterable
+
+from django import forms
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms.models import fields_for_model
+from django.utils.translation import gettext as _
+
+from .leaderboard import update_scores_for_task
+from .memberships import GameGroup, UserGroup
+from .models import Membership, Player, PlayerGroup, Task
+from .player_context import invalidate_player_contexts
+from .search import update_search_index
+
+# Keeps queries with one parameter per row below the limits of the databases
+BATCH_SIZE = 1000
+
+
+class ImportValidationError(Exception):
+    def __init__(self, errors: list[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def batched(values: list, size: int = BATCH_SIZE) -> Iterable[list]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def parse_file(file, file_format: str) -> list[tuple[int, dict]]:
+    """
+    The rows of a CSV file with a header or of a JSON list of objects, each with its line or position in the file.
+    """
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+            return [(reader.line_num, row) for row in reader]
+        data = json.load(file)
+    except (UnicodeDecodeError, csv.Error, ValueError) as e:
+        raise ImportValidationError([_("The file could not be read: {error}").format(error=e)])
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ImportValidationError([_("The file has to contain a list of objects.")])
+    return list(enumerate(data, start=1))
+
+
+class Importer:
+    """
+    Validates the rows of a file with a form built from the fields of the model and saves them in bulk, matching
+    existing objects by key.
+    """
+
+    model: type
+    key: str
+    fields: tuple[str, ...]
+    permissions: tuple[str, ...]
+
+    def __init__(self, rows: list[tuple[int, dict]]):
+        self.rows = rows
+        self.cleaned_rows: list[dict] = []
+        self.errors: list[str] = []
+        self.form_class = type("RowForm", (forms.Form,), fields_for_model(self.model, fields=self.fields))
+
+    def add_error(self, line: int, field: str | None, message: str):
+        if field:
+            self.errors.append(_("Row {line}, {field}: {message}").format(line=line, field=field, message=message))
+        else:
+            self.errors.append(_("Row {line}: {message}").format(line=line, message=message))
+
+    def get_form_data(self, row: dict) -> dict:
+        data = {}
+        for name in self.fields:
+            value = row.get(name)
+            if value in (None, ""):
+                # A missing value is the default of the model, not e.g. False for is_active
+                model_field = self.model._meta.get_field(name)
+                value = model_field.get_default() if model_field.has_default() else value
+            data[name] = value
+        return data
+
+    def clean_row(self, line: int, row: dict, cleaned_data: dict) -> dict:
+        return cleaned_data
+
+    def validate(self):
+        seen: dict[str, int] = {}
+        for line, row in self.rows:
+            form = self.form_class(self.get_form_data(row))
+            if not form.is_valid() or not self.run_model_validators(line, form.cleaned_data):
+                for field, errors in form.errors.items():
+                    for error in errors:
+                        self.add_error(line, field, error)
+                continue
+            key = form.cleaned_data[self.key]
+            if key in seen:
+                self.add_error(line, self.key, _("Also in row {line}.").format(line=seen[key]))
+                continue
+            seen[key] = line
+            self.cleaned_rows.append(self.clean_row(line, row, {"line": line, **form.cleaned_data}))
+        self.validate_rows()
+        if self.errors:
+            raise ImportValidationError(self.errors)
+
+    def run_model_validators(self, line: int, cleaned_data: dict) -> bool:
+        # The fields of the form don't have the validators of the model fields, e.g. for the characters of usernames
+        valid = True
+        for name, value in cleaned_data.items():
+            try:
+                self.model._meta.get_field(name).run_validators(value)
+            except ValidationError as e:
+                for message in e.messages:
+                    self.add_error(line, name, message)
+                valid = False
+        return valid
+
+    def validate_rows(self):
+        pass
+
+    def get_existing(self) -> dict:
+        keys = [row[self.key] for row in self.cleaned_rows]
+        existing = {}
+        for batch in batched(keys):
+            # The oldest object wins if several have the same key
+            for obj in self.model.objects.filter(**{f"{self.key}__in": batch}).order_by("-pk"):
+                existing[getattr(obj, self.key)] = obj
+        return existing
+
+    def save(self) -> dict[str, int]:
+        existing = self.get_existing()
+        created, updated = [], []
+        for row in self.cleaned_rows:
+            values = {name: row[name] for name in self.fields}
+            obj = existing.get(row[self.key])
+            if obj is None:
+                created.append(self.model(**values))
+            elif any(getattr(obj, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(obj, name, value)
+                updated.append(obj)
+        self.prepare_new(created)
+        self.model.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        if updated:
+            self.model.objects.bulk_update(updated, [name for name in self.fields if name != self.key], batch_size=BATCH_SIZE)
+        self.objects = {**existing, **{getattr(obj, self.key): obj for obj in created}}
+        self.after_save(created, updated)
+        return {
+            "created": len(created),
+            "updated": len(updated),
+            "unchanged": len(self.cleaned_rows) - len(created) - len(updated),
+        }
+
+    def prepare_new(self, objects: list):
+        pass
+
+    def after_save(self, created: list, updated: list):
+        pass
+
+    def run(self) -> dict[str, int]:
+        self.validate()
+        with transaction.atomic():
+            return self.save()
+
+
+class TaskImporter(Importer):
+    model = Task
+    key = "task"
+    fields = ("task", "points", "solution")
+    permissions = ("misterx.add_task", "misterx.change_task")
+
+    def get_existing(self) -> dict:
+        existing = super().get_existing()
+        self.previous_points = {obj.pk: obj.points for obj in existing.values()}
+        return existing
+
+    def after_save(self, created: list, updated: list):
+        update_search_index(Task, [task.pk for task in created + updated])
+        # Like editing a task, changed points change the scores of the submissions for it
+        for task in updated:
+            if task.points != self.previous_points[task.pk]:
+                update_scores_for_task(task)
+
+
+class GroupImporter(Importer):
+    model = PlayerGroup
+    key = "name"
+    fields = ("name",)
+    permissions = ("auth.add_group",)
+
+
+class PlayerImporter(Importer):
+    model = Player
+    key = "username"
+    fields = ("username", "first_name", "last_name", "is_active")
+    permissions = ("auth.add_user", "auth.change_user", "auth.add_group")
+
+    def clean_row(self, line: int, row: dict, cleaned_data: dict) -> dict:
+        # A list in JSON, separated by semicolons in CSV
+        groups = row.get("groups") or []
+        if isinstance(groups, str):
+            groups = groups.split(";")
+        if not isinstance(groups, list) or not all(isinstance(group, str) for group in groups):
+            self.add_error(line, "groups", _("Has to be a list of group names."))
+            groups = []
+        cleaned_data["groups"] = {group.strip() for group in groups if group.strip()}
+        return cleaned_data
+
+    def validate_rows(self):
+        """
+        A player can only be in one group of a game, with the groups the player is already in.
+        """
+        group_names = {name for row in self.cleaned_rows for name in row["groups"]}
+        group_ids = {}
+        for batch in batched(list(group_names)):
+            group_ids.update({name: pk for pk, name in Group.objects.filter(name__in=batch).values_list("pk", "name")})
+        games_of_group: dict[int, set[int]] = {}
+        for game_id, group_id in GameGroup.objects.filter(playergroup__in=group_ids.values()).values_list("game", "playergroup"):
+            games_of_group.setdefault(group_id, set()).add(game_id)
+
+        current_groups: dict[str, set[int]] = {}
+        usernames = [row["username"] for row in self.cleaned_rows]
+        for batch in batched(usernames):
+            for username, group_id in UserGroup.objects.filter(user__username__in=batch).values_list("user__username", "group"):
+                current_groups.setdefault(username, set()).add(group_id)
+        for game_id, group_id in GameGroup.objects.filter(
+            playergroup__in={group for groups in current_groups.values() for group in groups}
+        ).values_list("game", "playergroup"):
+            games_of_group.setdefault(group_id, set()).add(game_id)
+
+        for row in self.cleaned_rows:
+            groups = current_groups.get(row["username"], set()) | {
+                group_ids[name] for name in row["groups"] if name in group_ids
+            }
+            groups_of_game: dict[int, set[int]] = {}
+            for group_id in groups:
+                for game_id in games_of_group.get(group_id, ()):
+                    groups_of_game.setdefault(game_id, set()).add(group_id)
+            if any(len(game_groups) > 1 for game_groups in groups_of_game.values()):
+                self.add_error(row["line"], "groups", _("The player would be in several groups of the same game."))
+
+    def prepare_new(self, objects: list):
+        # Players log in through the identity provider, their passwords are unusable
+        password = make_password(None)
+        for player in objects:
+            player.password = password
+
+    def after_save(self, created: list, updated: list):
+        # Groups that don't exist yet are created like in an import of groups
+        groups = GroupImporter([])
+        groups.cleaned_rows = [{"name": name} for name in sorted({name for row in self.cleaned_rows for name in row["groups"]})]
+        groups.save()
+
+        wanted = {
+            (self.objects[row["username"]].pk, groups.objects[name].pk) for row in self.cleaned_rows for name in row["groups"]
+        }
+        existing = set()
+        for batch in batched(list({user for user, _group in wanted})):
+            existing.update(UserGroup.objects.filter(user__in=batch).values_list("user", "group"))
+        added = sorted(wanted - existing)
+
+        # Bulk inserts into the through tables don't send m2m_changed, the memberships are added explicitly
+        UserGroup.objects.bulk_create((UserGroup(user_id=user, group_id=group) for user, group in added), batch_size=BATCH_SIZE)
+        games_of_group: dict[int, list[int]] = {}
+        for game_id, group_id in GameGroup.objects.filter(playergroup__in={group for _user, group in added}).values_list(
+            "game", "playergroup"
+        ):
+            games_of_group.setdefault(group_id, []).append(game_id)
+        Membership.objects.bulk_create(
+            (
+                Membership(game_id=game, user_id=user, group_id=group)
+                for user, group in added
+                for game in games_of_group.get(group, ())
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        invalidate_player_contexts({user for user, _group in added})
+
+
+IMPORTERS = {
+    "tasks": TaskImporter,
+    "groups": GroupImporter,
+    "players": PlayerImporter,
+}
+
+
+def import_file(kind: str, file, file_format: str) -> dict[str, int]:
+    """
+    Imports the rows of the file, raises ImportValidationError with all problems of the file before writing anything.
+    """
+    return IMPORTERS[kind](parse_file(file, file_format)).run()
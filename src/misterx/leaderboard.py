@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Game, Score, Submission, Task
+
+
+def award_points(game_id: int, group_id: int, task_id: int):
+    # Store the currently granted points on every submission of a group for a task, only the
+    # first accepted one can change whenever one of them is reviewed
+    changed = []
+    for submission in Submission.objects.filter(game_id=game_id, group_id=group_id, task_id=task_id).with_granted_points():
+        if submission.awarded_points != submission.granted_points:
+            submission.awarded_points = submission.granted_points
+            changed.append(submission)
+    Submission.objects.bulk_update(changed, ["awarded_points"])
+
+
+def update_score(game_id: int, group_id: int, task_ids=()):
+    with transaction.atomic():
+        # Lock the score row, so concurrent reviews for the same group are serialized
+        score, _ = Score.objects.select_for_update().get_or_create(game_id=game_id, group_id=group_id)
+        for task_id in task_ids:
+            award_points(game_id, group_id, task_id)
+        points = Submission.objects.filter(game_id=game_id, group_id=group_id).aggregate(points=Sum("awarded_points"))
+        score.points = points["points"] or 0
+        score.save(update_fields=["points"])
+
+
+def update_score_for_submission(submission: Submission):
+    update_score(submission.game_id, submission.group_id, [submission.task_id])
+
+
+def update_scores_for_task(task: Task):
+    # Changing the points of a task only changes scores when done explicitly through this function
+    affected = Submission.objects.filter(task=task).values_list("game", "group").distinct().order_by()
+    with transaction.atomic():
+        for game_id, group_id in affected:
+            update_score(game_id, group_id, [task.pk])
+
+
+def expected_scores(game: Game) -> dict[int, int]:
+    scores = dict.fromkeys(game.groups.values_list("pk", flat=True), 0)
+    rows = (
+        Submission.objects.filter(game=game)
+        .with_granted_points()
+        .order_by()
+        .values("group")
+        .annotate(points=Sum("granted_points"))
+        .values_list("group", "points")
+    )
+    scores.update(rows)
+    return scores
+
+
+def rebuild_scores(game: Game):
+    with transaction.atomic():
+        changed = []
+        for submission in Submission.objects.filter(game=game).with_granted_points().only("pk", "awarded_points").iterator():
+            if submission.awarded_points != submission.granted_points:
+                submission.awarded_points = submission.granted_points
+                changed.append(submission)
+        Submission.objects.bulk_update(changed, ["awarded_points"], batch_size=1000)
+
+        points = dict.fromkeys(game.groups.values_list("pk", flat=True), 0)
+        points.update(
+            Submission.objects.filter(game=game)
+            .order_by()
+            .values("group")
+            .annotate(points=Sum("awarded_points"))
+            .values_list("group", "points")
+        )
+        Score.objects.filter(game=game).delete()
+        Score.objects.bulk_create(Score(game=game, group_id=group_id, points=p) for group_id, p in points.items())
+    return len(changed)
+
+
+def verify_scores(game: Game) -> list[tuple[int, int | None, int]]:
+    stored = dict(Score.objects.filter(game=game).values_list("group", "points"))
+    return [
+        (group_id, stored.get(group_id), points)
+        for group_id, points in expected_scores(game).items()
+        if stored.get(group_id, 0) != points
+    ]
+
+
+def get_leaderboard(game: Game):
+    return Score.objects.filter(game=game).select_related("group").order_by("-points", "group__name")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from misterx.models import Upload
+
+METADATA_FIELDS = ["mime_type", "size", "width", "height", "duration", "sha256"]
+
+
+class Command(BaseCommand):
+    help = "Store the metadata of uploaded proofs that were uploaded before it was recorded"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute the metadata of all uploads")
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        uploads = Upload.objects.order_by("pk")
+        if not options["all"]:
+            uploads = uploads.filter(mime_type="")
+
+        batch = []
+        updated = 0
+        for upload in uploads.iterator(chunk_size=options["batch_size"]):
+            try:
+                with upload.file.open("rb"):
+                    upload.update_metadata()
+            except OSError as e:
+                self.stderr.write(f"Skipping {upload}: {e}")
+                continue
+            batch.append(upload)
+            if len(batch) >= options["batch_size"]:
+                updated += Upload.objects.bulk_update(batch, METADATA_FIELDS)
+                batch = []
+        updated += Upload.objects.bulk_update(batch, METADATA_FIELDS)
+        self.stdout.write(self.style.SUCCESS(f"Updated the metadata of {updated} uploads"))
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import math
+import os
+import statistics
+import time
+import zlib
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+from misterx.chunked_uploads import delete_chunked_upload
+from misterx.models import ChunkedUpload
+
+User = get_user_model()
+
+# How often a slow client sends the next part of its chunk
+SEND_INTERVAL = 0.25
+
+
+def summarize(values: list[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        "median": round(statistics.median(values), 2),
+        "p95": round(values[math.ceil(len(values) * 0.95) - 1], 2),
+        "max": round(values[-1], 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many slow uploads a running server handles at once. Every client sends one chunk of a resumable "
+        "upload over --duration seconds, like a phone with a bad connection, while --probe-path is requested "
+        "repeatedly to see whether other requests still get through. Run it against each server with the same number "
+        "of processes, e.g. 'uwsgi --http :8000 --module misterx_root.wsgi --processes 4 --enable-threads' and "
+        "'uvicorn misterx_root.asgi:application --port 8000 --workers 4'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running server")
+        parser.add_argument("--user", required=True, help="Username to upload as")
+        parser.add_argument("--clients", type=int, default=50, help="Concurrent slow uploads")
+        parser.add_argument("--size", type=int, default=1024 * 1024, help="Bytes per upload")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds each client takes to send its upload")
+        parser.add_argument("--probe-path", default="/user/tasks/", help="Path requested while the uploads run")
+        parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a response")
+        parser.add_argument("--label", help="Name of the server in the results, e.g. uwsgi or uvicorn")
+        parser.add_argument("--output", help="Write the results to this file instead of printing them")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http":
+            raise CommandError("Only http URLs are supported, benchmark the server without a proxy in front")
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = options["timeout"]
+
+        user = User.objects.get(username=options["user"])
+        session = self.create_session(user)
+        csrf_token = get_random_string(32)
+        self.headers = {
+            "Host": url.netloc,
+            "Cookie": f"{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf_token}",
+            "X-CSRFToken": csrf_token,
+        }
+
+        content = os.urandom(options["size"])
+        uploads = [
+            ChunkedUpload.objects.create(
+                user=user, filename="benchmark.bin", size=len(content), checksum=f"crc32:{zlib.crc32(content):08x}"
+            )
+            for _ in range(options["clients"])
+        ]
+        try:
+            results = asyncio.run(self.run(uploads, content, options))
+        finally:
+            for upload in ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in uploads]):
+                delete_chunked_upload(upload)
+            session.delete()
+
+        results.update({"label": options["label"], "url": options["url"], "clients": options["clients"]})
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def create_session(self, user):
+        # Like logging in, without going through the login form of the server
+        session = import_string(f"{settings.SESSION_ENGINE}.SessionStore")()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session
+
+    async def request(self, method: str, path: str, headers: dict, body=b"", send_time: float = 0) -> int:
+        """
+        Sends a request and returns the status of the response. With a send_time, the body is sent in parts over that
+        many seconds.
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            headers = {**self.headers, **headers, "Content-Length": str(len(body)), "Connection": "close"}
+            head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+            writer.write(head.encode())
+            parts = max(int(send_time / SEND_INTERVAL), 1)
+            part_size = max(-(-len(body) // parts), 1)
+            for start in range(0, len(body), part_size):
+                writer.write(body[start : start + part_size])
+                await writer.drain()
+                if send_time:
+                    await asyncio.sleep(SEND_INTERVAL)
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    async def upload(self, upload: ChunkedUpload, content: bytes, send_time: float) -> tuple[bool, float]:
+        path = reverse("misterx:chunked-upload", kwargs={"uuid": upload.uuid})
+        headers = {"Upload-Offset": "0", "Content-Type": "application/offset+octet-stream"}
+        start = time.perf_counter()
+        try:
+            status = await self.request("PATCH", path, headers, content, send_time)
+        except (TimeoutError, OSError, IndexError, ValueError):
+            status = None
+        return status == 200, time.perf_counter() - start
+
+    async def probe(self, path: str, done: asyncio.Event) -> tuple[list[float], int]:
+        latencies, failed = [], 0
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                status = await self.request("GET", path, {})
+            except (TimeoutError, OSError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                failed += 1
+            await asyncio.sleep(0.2)
+        return latencies, failed
+
+    async def run(self, uploads: list[ChunkedUpload], content: bytes, options) -> dict:
+        done = asyncio.Event()
+        probe = asyncio.create_task(self.probe(options["probe_path"], done))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.upload(upload, content, options["duration"]) for upload in uploads))
+        elapsed = time.perf_counter() - start
+        done.set()
+        latencies, probe_failed = await probe
+
+        return {
+            "size": len(content),
+            "send_seconds": options["duration"],
+            "completed": sum(ok for ok, _ in results),
+            "failed": sum(not ok for ok, _ in results),
+            "elapsed_seconds": round(elapsed, 2),
+            "upload_seconds": summarize([seconds for ok, seconds in results if ok]),
+            "probe_latency_ms": summarize(latencies),
+            "probe_failed": probe_failed,
+        }
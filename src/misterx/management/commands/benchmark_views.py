@@ -0,0 +1,133 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+
+from misterx.models import Game, Upload
+
+User = get_user_model()
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency, query count and peak memory of the main views for a game, e.g. one created with "
+        "generate_game_data, and print the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, help="Game to benchmark, defaults to the active game")
+        parser.add_argument("--repeat", type=int, default=10, help="Timed requests per view")
+        parser.add_argument("--staff-user", help="Username for the staff views, defaults to a superuser")
+        parser.add_argument("--output", help="Write the results to this file instead of printing them")
+        parser.add_argument("--compare", help="Results of a previous run to print the differences to")
+
+    def get_scenarios(self, game: Game, staff, player) -> list[tuple[str, object, str]]:
+        upload = Upload.objects.filter(submission__game=game, submission__group__in=player.groups.all()).first()
+        scenarios = [
+            ("submission-approve", staff, reverse("misterx:submission-approve")),
+            ("game-detail", staff, reverse("misterx:game-detail", kwargs={"pk": game.pk})),
+            ("game-leaderboard", staff, reverse("misterx:game-leaderboard", kwargs={"pk": game.pk})),
+            ("submission-list", staff, reverse("misterx:submission-list")),
+            ("user-task-list", player, reverse("misterx:user-task-list")),
+            ("user-submission-list", player, reverse("misterx:user-submission-list")),
+        ]
+        if upload is not None:
+            # Requested without a signature, so the authorization through the database is measured
+            scenarios.append(("serve_proofs", player, upload.file.url))
+        return scenarios
+
+    def measure(self, client: Client, url: str, repeat: int) -> dict:
+        # Warm up caches, then time the requests without tracing memory, which slows them down
+        client.get(url, secure=True)
+        latencies = []
+        for _ in range(repeat):
+            # The query log is capped, counting fails once it is full
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, secure=True)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        try:
+            client.get(url, secure=True)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        view_class = getattr(resolve(url).func, "view_class", None)
+        return {
+            "url": url,
+            "status": response.status_code,
+            "queries": len(queries),
+            "query_budget": getattr(view_class, "query_budget", None),
+            "latency_ms": {
+                "min": round(latencies[0], 2),
+                "median": round(statistics.median(latencies), 2),
+                "p95": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 2),
+            },
+            "peak_memory_kb": round(peak / 1024),
+        }
+
+    def handle(self, *args, **options):
+        game = Game.objects.get(pk=options["game"]) if options["game"] else Game.objects.get(active=True)
+        if options["staff_user"]:
+            staff = User.objects.get(username=options["staff_user"])
+        else:
+            staff = User.objects.filter(is_superuser=True).first()
+        player = User.objects.filter(memberships__game=game).first()
+        if staff is None or player is None:
+            raise CommandError("A superuser and a player of the game are needed")
+
+        results = {
+            "commit": get_commit(),
+            "database": connection.vendor,
+            "game": game.pk,
+            "submissions": game.submissions.count(),
+            "views": {},
+        }
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for name, user, url in self.get_scenarios(game, staff, player):
+                client = Client()
+                client.force_login(user)
+                results["views"][name] = self.measure(client, url, options["repeat"])
+                self.stderr.write(f"{name}: {results['views'][name]['latency_ms']['median']}ms")
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def compare(self, path: str, results: dict):
+        with open(path) as f:
+            previous = json.load(f)
+        for name, current in results["views"].items():
+            before = previous["views"].get(name)
+            if before is None:
+                continue
+            self.stderr.write(
+                f"{name}: median {before['latency_ms']['median']} -> {current['latency_ms']['median']}ms, "
+                f"queries {before['queries']} -> {current['queries']}, "
+                f"peak memory {before['peak_memory_kb']} -> {current['peak_memory_kb']}KB"
+            )
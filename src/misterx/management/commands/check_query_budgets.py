@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from misterx import urls
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Check that the views with a query_budget stay within it for an existing object"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--staff-user", help="Username to request the staff views with, defaults to a superuser")
+
+    def get_views(self):
+        for pattern in urls.urlpatterns:
+            view_class = getattr(pattern.callback, "view_class", None)
+            if getattr(view_class, "query_budget", None) is not None:
+                yield pattern.name, view_class
+
+    def get_user(self, view_class, obj, staff_user):
+        # Player views only show objects of the player's own group
+        if getattr(view_class, "permission_required", None):
+            return staff_user
+        return getattr(obj, "submitter", None)
+
+    def handle(self, *args, **options):
+        if options["staff_user"]:
+            staff_user = User.objects.get(username=options["staff_user"])
+        else:
+            staff_user = User.objects.filter(is_superuser=True).first()
+
+        failed = []
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for name, view_class in self.get_views():
+                obj = view_class.model._default_manager.order_by("pk").last()
+                user = obj and self.get_user(view_class, obj, staff_user)
+                if user is None:
+                    self.stdout.write(f"{name}: skipped, no object or user")
+                    continue
+
+                client = Client()
+                client.force_login(user)
+                url = reverse(f"{urls.app_name}:{name}", kwargs={"pk": obj.pk})
+                # Warm up caches, the budget applies to the usual case
+                client.get(url, secure=True)
+                reset_queries()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, secure=True)
+
+                result = f"{name}: {len(queries)}/{view_class.query_budget} queries, status {response.status_code}"
+                if response.status_code != 200 or len(queries) > view_class.query_budget:
+                    failed.append(name)
+                    self.stdout.write(self.style.ERROR(result))
+                else:
+                    self.stdout.write(result)
+
+        if failed:
+            raise CommandError(f"Over budget: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("All views are within their query budget"))
@@ -0,0 +1,69 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from misterx.completion import CompletionMatrix
+from misterx.models import Game, Submission, Task
+from misterx.review_queue import claimable_submissions
+from misterx.search import filter_contains
+
+# A full scan of a table in the output of EXPLAIN, per database vendor
+FULL_SCAN_PATTERNS = {
+    "sqlite": r"\bSCAN {table}\b(?! USING (COVERING )?INDEX)",
+    "postgresql": r"\bSeq Scan on {table}\b",
+}
+
+
+def get_hot_queries(submission: Submission) -> dict[str, object]:
+    game, group, task = submission.game, submission.group, submission.task
+    submissions = Submission.objects.with_granted_points()
+    return {
+        "approval queue": claimable_submissions(game, None).order_by("time", "pk")[:1],
+        "own submissions": submissions.filter(game=game, task=task, group=group).exclude(pk=submission.pk),
+        "other submissions": submissions.filter(game=game, task=task).exclude(group=group),
+        "group submissions": submissions.filter(game=game, group=group),
+        "unreviewed submissions": Submission.objects.filter(game=game, accepted=None),
+        "explanation filter": filter_contains(submissions.filter(game=game), "explanation", "tower"),
+        "completed tasks": Task.objects.filter(games=game).annotate(
+            completed=Exists(Submission.objects.filter(game=game, group=group, task=OuterRef("pk")))
+        ),
+        "completion matrix": CompletionMatrix.get_queryset(game),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the frequent queries on submissions use indexes instead of scanning the whole table. "
+        "Use a database with a realistic amount of data, PostgreSQL prefers scanning small tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, help="Game to build the queries for, defaults to the active game")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the plan of every query")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f"Query plans of {connection.vendor} are not supported")
+        pattern = re.compile(FULL_SCAN_PATTERNS[connection.vendor].format(table=Submission._meta.db_table))
+
+        game = Game.objects.get(pk=options["game"]) if options["game"] else Game.objects.get(active=True)
+        submission = game.submissions.select_related("game", "group", "task").first()
+        if submission is None:
+            raise CommandError(f"{game} has no submissions to build the queries with")
+
+        failed = []
+        for name, queryset in get_hot_queries(submission).items():
+            plan = queryset.explain()
+            if options["verbose_plans"]:
+                self.stdout.write(f"{name}:\n{plan}\n")
+            if pattern.search(plan):
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: full scan of {Submission._meta.db_table}\n{plan}"))
+            else:
+                self.stdout.write(f"{name}: ok")
+
+        if failed:
+            raise CommandError(f"Full table scans in: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("All queries use indexes"))
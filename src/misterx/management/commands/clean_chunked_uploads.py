@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from misterx.chunked_uploads import delete_chunked_upload
+from misterx.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads that were abandoned or never attached to a submission"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=24, help="Age in hours after which uploads are deleted")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["older_than"])
+        deleted = 0
+        for upload in ChunkedUpload.objects.filter(created__lt=cutoff).iterator():
+            delete_chunked_upload(upload)
+            deleted += 1
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} uploads"))
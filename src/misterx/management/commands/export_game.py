@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from misterx.exports import EXPORTS, FORMATS, export_game
+from misterx.models import Game
+
+
+class Command(BaseCommand):
+    help = "Export the ordered tasks, groups, submissions with their granted points or scores of a game"
+
+    def add_arguments(self, parser):
+        parser.add_argument("game", type=int, help="Primary key of the game")
+        parser.add_argument("kind", choices=EXPORTS)
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", help="Write the export to this file instead of printing it")
+
+    def handle(self, *args, **options):
+        try:
+            game = Game.objects.get(pk=options["game"])
+        except Game.DoesNotExist:
+            raise CommandError(f"There is no game with the id {options['game']}")
+
+        chunks = export_game(game, options["kind"], options["format"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as f:
+                f.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from misterx.derivatives import generate_derivatives_for
+from misterx.models import Upload
+
+
+class Command(BaseCommand):
+    help = "Generate the smaller versions of image proofs and the poster frames of video proofs in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--missing", action="store_true", help="Only generate them for uploads without any")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of processes, defaults to all CPUs")
+
+    def handle(self, *args, **options):
+        uploads = Upload.objects.filter(mime_type__regex=r"^(image|video)/").order_by("pk")
+        if options["missing"]:
+            uploads = uploads.filter(derivatives=[])
+        pks = list(uploads.values_list("pk", flat=True))
+
+        # The worker processes are forked, they must not share the database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["jobs"], mp_context=multiprocessing.get_context("fork")) as executor:
+            for _ in executor.map(generate_derivatives_for, pks, chunksize=16):
+                pass
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {len(pks)} uploads"))
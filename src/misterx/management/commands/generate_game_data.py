@@ -0,0 +1,193 @@
+import base64
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from misterx.facets import invalidate_submission_facets
+from misterx.memberships import add_memberships
+from misterx.models import Game, OrderedTask, PlayerGroup, Score, Submission, Task, Upload, get_upload_path
+from misterx.player_context import invalidate_player_contexts
+from misterx.search import update_search_index
+
+User = get_user_model()
+
+# A 1x1 pixel PNG, used as the content of every generated proof
+PROOF_CONTENT = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGM4wcAAAAJcAMlDyBJGAAAAAElFTkSuQmCC")
+
+WORDS = (
+    "find",
+    "photograph",
+    "reach",
+    "climb",
+    "count",
+    "the",
+    "red",
+    "blue",
+    "old",
+    "tallest",
+    "nearest",
+    "bridge",
+    "tower",
+    "statue",
+    "fountain",
+    "tram",
+    "sign",
+)
+
+
+@contextmanager
+def keep_submission_times():
+    # bulk_create would otherwise set the time of every submission to now
+    field = Submission._meta.get_field("time")
+    field.auto_now = False
+    try:
+        yield
+    finally:
+        field.auto_now = True
+
+
+class Command(BaseCommand):
+    help = "Generate a game with groups, players, tasks, reviewed submissions and proofs for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--players", type=int, default=100)
+        parser.add_argument("--tasks", type=int, default=150)
+        parser.add_argument("--submissions", type=int, default=10000)
+        parser.add_argument("--uploads", type=int, default=1000, help="Number of submissions that get a proof file")
+        parser.add_argument("--unreviewed", type=float, default=0.1, help="Share of submissions that are not reviewed")
+        parser.add_argument("--active", action="store_true", help="Make the generated game the active game")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            if options["active"]:
+                Game.objects.filter(active=True).update(active=False)
+            game = Game.objects.create(name=f"Generated game {timezone.now():%Y-%m-%d %H:%M:%S}", active=options["active"])
+            tasks = self.create_tasks(game, options["tasks"])
+            members = self.create_groups(game, options["groups"], options["players"])
+            with keep_submission_times():
+                self.create_submissions(game, tasks, members, options)
+
+        invalidate_submission_facets(game.pk)
+        invalidate_player_contexts()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {game} (id {game.pk}) with {options['submissions']} submissions "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        )
+
+    def create_tasks(self, game: Game, count: int) -> list[Task]:
+        tasks = Task.objects.bulk_create(
+            Task(
+                task=" ".join(self.random.choices(WORDS, k=self.random.randint(4, 12))),
+                points=self.random.choice((1, 2, 3, 5, 8, 10)),
+                solution=" ".join(self.random.choices(WORDS, k=3)),
+            )
+            for _ in range(count)
+        )
+        update_search_index(Task, [task.pk for task in tasks])
+        OrderedTask.objects.bulk_create(
+            OrderedTask(game=game, task=task, task_number=number) for number, task in enumerate(tasks, start=1)
+        )
+        return tasks
+
+    def create_groups(self, game: Game, group_count: int, player_count: int) -> dict[PlayerGroup, list]:
+        groups = PlayerGroup.objects.bulk_create(PlayerGroup(name=f"Group {game.pk}-{i}") for i in range(group_count))
+        # Generated players can't log in
+        password = make_password(None)
+        players = User.objects.bulk_create(
+            User(username=f"player-{game.pk}-{i}", password=password) for i in range(player_count)
+        )
+
+        members: dict[PlayerGroup, list] = {group: [] for group in groups}
+        for i, player in enumerate(players):
+            members[groups[i % group_count]].append(player)
+
+        # Bulk inserts into the through tables don't send m2m_changed, the memberships are added explicitly
+        Game.groups.through.objects.bulk_create(Game.groups.through(game=game, playergroup=group) for group in groups)
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user=player, group=group) for group, group_players in members.items() for player in group_players
+        )
+        add_memberships(game=game)
+        return members
+
+    def create_submissions(self, game: Game, tasks: list[Task], members: dict, options):
+        groups = list(members)
+        now = timezone.now()
+        interval = timedelta(hours=4) / max(options["submissions"], 1)
+        first_accepted = set()
+        scores = dict.fromkeys(groups, 0)
+        with_uploads = []
+
+        batch = []
+        for i in range(options["submissions"]):
+            group = self.random.choice(groups)
+            task = self.random.choice(tasks)
+            if self.random.random() < options["unreviewed"]:
+                accepted = None
+            else:
+                accepted = self.random.random() < 0.7
+            points_override = self.random.choice((1, 2, 3)) if accepted and self.random.random() < 0.02 else None
+
+            # Submissions are created in time order, so the first accepted one gets the points like with_granted_points
+            awarded_points = 0
+            if accepted and points_override is not None:
+                awarded_points = points_override
+            elif accepted and (group, task) not in first_accepted:
+                awarded_points = task.points
+            if accepted:
+                first_accepted.add((group, task))
+            scores[group] += awarded_points
+
+            batch.append(
+                Submission(
+                    game=game,
+                    group=group,
+                    task=task,
+                    submitter=self.random.choice(members[group]) if members[group] else None,
+                    time=now - timedelta(hours=4) + i * interval,
+                    accepted=accepted,
+                    points_override=points_override,
+                    explanation=" ".join(self.random.choices(WORDS, k=5)),
+                    awarded_points=awarded_points,
+                )
+            )
+            if len(batch) >= self.batch_size:
+                self.insert_submissions(batch, with_uploads, options["uploads"])
+                batch = []
+        self.insert_submissions(batch, with_uploads, options["uploads"])
+
+        Score.objects.bulk_create(Score(game=game, group=group, points=points) for group, points in scores.items())
+        self.create_uploads(with_uploads)
+
+    def insert_submissions(self, batch: list[Submission], with_uploads: list[Submission], upload_count: int):
+        Submission.objects.bulk_create(batch)
+        update_search_index(Submission, [submission.pk for submission in batch])
+        with_uploads.extend(batch[: max(upload_count - len(with_uploads), 0)])
+
+    def create_uploads(self, submissions: list[Submission]):
+        sha256 = hashlib.sha256(PROOF_CONTENT).hexdigest()
+        uploads = []
+        for submission in submissions:
+            upload = Upload(
+                submission=submission, mime_type="image/png", size=len(PROOF_CONTENT), width=1, height=1, sha256=sha256
+            )
+            upload.file.name = upload.file.storage.save(get_upload_path(upload, "proof.png"), ContentFile(PROOF_CONTENT))
+            uploads.append(upload)
+        Upload.objects.bulk_create(uploads, batch_size=self.batch_size)
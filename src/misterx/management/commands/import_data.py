@@ -0,0 +1,40 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from misterx.imports import IMPORTERS, ImportValidationError, import_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks, groups or players from a CSV file with a header or a JSON list of objects. The whole file is "
+        "checked first, nothing is imported if it has problems. Existing tasks, groups and players with the same text, "
+        "name or username are updated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=IMPORTERS)
+        parser.add_argument("file", type=Path)
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the extension of the file")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("csv", "json"):
+            raise CommandError("Pass --format for files without a .csv or .json extension")
+
+        start = time.perf_counter()
+        try:
+            with path.open("rb") as f:
+                result = import_file(options["kind"], f, file_format)
+        except ImportValidationError as e:
+            for error in e.errors:
+                self.stderr.write(error)
+            raise CommandError(f"Nothing was imported, {path} has {len(e.errors)} problems")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['created']} new, updated {result['updated']} and left {result['unchanged']} "
+                f"unchanged {options['kind']} in {time.perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from misterx.leaderboard import rebuild_scores, verify_scores
+from misterx.models import Game
+
+
+class Command(BaseCommand):
+    help = "Rebuild the leaderboard scores from the submissions and verify that they match"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, action="append", help="Primary key of the game, defaults to all games")
+        parser.add_argument("--verify-only", action="store_true", help="Only verify the stored scores, don't rebuild them")
+
+    def handle(self, *args, **options):
+        games = Game.objects.all()
+        if options["game"]:
+            games = games.filter(pk__in=options["game"])
+
+        failed = False
+        for game in games:
+            if not options["verify_only"]:
+                changed = rebuild_scores(game)
+                self.stdout.write(f"{game}: updated awarded points of {changed} submissions")
+            for group_id, stored, expected in verify_scores(game):
+                failed = True
+                self.stderr.write(f"{game}: group {group_id} has {stored} points stored, expected {expected}")
+
+        if failed:
+            raise CommandError("Stored scores don't match the submissions")
+        self.stdout.write(self.style.SUCCESS("All scores match"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from misterx.search import SEARCH_FIELDS, update_search_index, use_search_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the texts of all tasks and submissions to the search tables, e.g. after they were written in bulk. "
+        "Only needed on SQLite, PostgreSQL keeps its search indexes up to date itself."
+    )
+
+    def handle(self, *args, **options):
+        if not use_search_tables():
+            self.stdout.write("The database maintains its search indexes itself, nothing to do")
+            return
+        with transaction.atomic():
+            for model in SEARCH_FIELDS:
+                update_search_index(model)
+                self.stdout.write(f"Indexed {model._default_manager.count()} {model._meta.verbose_name_plural}")
+        self.stdout.write(self.style.SUCCESS("Rebuilt the search tables"))
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+
+from .models import Game, Membership
+
+User = get_user_model()
+GameGroup = Game.groups.through
+UserGroup = User.groups.through
+
+
+def add_memberships(**filters):
+    # Raises an IntegrityError if a player would end up in multiple groups of a game
+    rows = GameGroup.objects.filter(playergroup__user__isnull=False, **filters).values_list(
+        "game", "playergroup__user", "playergroup"
+    )
+    Membership.objects.bulk_create(Membership(game_id=game, user_id=user, group_id=group) for game, user, group in rows)
+
+
+def sync_game_groups(instance, action, reverse, pk_set):
+    if reverse:
+        # instance is a group, pk_set contains games
+        games, groups = pk_set, [instance.pk]
+    else:
+        games, groups = [instance.pk], pk_set
+
+    if action == "post_add":
+        add_memberships(game__in=games, playergroup__in=groups)
+    elif action == "post_remove":
+        Membership.objects.filter(game__in=games, group__in=groups).delete()
+    elif action == "post_clear":
+        Membership.objects.filter(**{"group" if reverse else "game": instance.pk}).delete()
+
+
+def sync_user_groups(instance, action, reverse, pk_set):
+    if reverse:
+        # instance is a group, pk_set contains users
+        users, groups = pk_set, [instance.pk]
+    else:
+        users, groups = [instance.pk], pk_set
+
+    if action == "post_add":
+        add_memberships(playergroup__in=groups, playergroup__user__in=users)
+    elif action == "post_remove":
+        Membership.objects.filter(user__in=users, group__in=groups).delete()
+    elif action == "post_clear":
+        Membership.objects.filter(**{"group" if reverse else "user": instance.pk}).delete()
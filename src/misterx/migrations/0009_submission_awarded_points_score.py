@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, Value, When
+
+
+def backfill_scores(apps, schema_editor):
+    # Existing games get their awarded points and scores like from the rebuild_scores command. The rules for granted
+    # points are copied from this version of the app, the migration must not depend on later versions of it.
+    Game = apps.get_model('misterx', 'Game')
+    Submission = apps.get_model('misterx', 'Submission')
+    Score = apps.get_model('misterx', 'Score')
+
+    # Only the first accepted submission of a group for a task is awarded the task points, unless the points have been
+    # overridden for a specific submission
+    first_accepted = Submission.objects.filter(
+        game=OuterRef('game'), task=OuterRef('task'), group=OuterRef('group'), accepted=True
+    ).order_by('time', 'pk')
+    granted_points = Case(
+        When(~Q(accepted=True), then=Value(0)),
+        When(points_override__isnull=False, then=F('points_override')),
+        When(pk=Subquery(first_accepted.values('pk')[:1]), then=F('task__points')),
+        default=Value(0),
+        output_field=models.PositiveIntegerField(),
+    )
+
+    for game in Game.objects.all():
+        changed = []
+        submissions = Submission.objects.filter(game=game).annotate(granted_points=granted_points)
+        for submission in submissions.only('pk', 'awarded_points').iterator():
+            if submission.awarded_points != submission.granted_points:
+                submission.awarded_points = submission.granted_points
+                changed.append(submission)
+        Submission.objects.bulk_update(changed, ['awarded_points'], batch_size=1000)
+
+        points = dict.fromkeys(game.groups.values_list('pk', flat=True), 0)
+        points.update(
+            Submission.objects.filter(game=game)
+            .order_by()
+            .values('group')
+            .annotate(points=Sum('awarded_points'))
+            .values_list('group', 'points')
+        )
+        Score.objects.filter(game=game).delete()
+        Score.objects.bulk_create(Score(game=game, group_id=group_id, points=p) for group_id, p in points.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0008_upload_uuid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='awarded_points',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Points that have been added to the score of the group when this submission was last reviewed', verbose_name='Awarded points'),
+        ),
+        migrations.CreateModel(
+            name='Score',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0, verbose_name='Points')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='misterx.game')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='misterx.playergroup')),
+            ],
+            options={
+                'ordering': ['-points'],
+                'indexes': [models.Index(fields=['game', '-points'], name='misterx_score_game_points_idx')],
+                'constraints': [models.UniqueConstraint(fields=('game', 'group'), name='unique_game_group_score')],
+            },
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0009_submission_awarded_points_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Until when the reviewer has claimed this submission for reviewing', null=True, verbose_name='Lease expires'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='reviewer',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_submissions', to='misterx.player'),
+        ),
+    ]
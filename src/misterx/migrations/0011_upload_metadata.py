@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0010_submission_review_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, help_text='Duration in seconds', null=True, verbose_name='Duration'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Height'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='mime_type',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='MIME type'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Size in bytes', null=True, verbose_name='Size'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Width'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0012_upload_file_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Derivatives'),
+        ),
+    ]
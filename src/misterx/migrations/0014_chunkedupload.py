@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0013_upload_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='UUID for upload')),
+                ('filename', models.CharField(max_length=255, verbose_name='File name')),
+                ('size', models.PositiveBigIntegerField(help_text='Size in bytes', verbose_name='Size')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Number of bytes received so far', verbose_name='Offset')),
+                ('checksum', models.CharField(help_text='Algorithm and hex digest, e.g. sha256:...', max_length=255, verbose_name='Checksum')),
+                ('completed', models.BooleanField(default=False, verbose_name='Completed')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to='misterx.player')),
+            ],
+        ),
+    ]
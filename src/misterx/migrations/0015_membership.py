@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_memberships(apps, schema_editor):
+    Game = apps.get_model('misterx', 'Game')
+    Membership = apps.get_model('misterx', 'Membership')
+    rows = (
+        Game.groups.through.objects.filter(playergroup__user__isnull=False)
+        .order_by('game', 'playergroup')
+        .values_list('game', 'playergroup__user', 'playergroup')
+    )
+    # Players that are in multiple groups of a game already keep the group with the lowest id
+    Membership.objects.bulk_create(
+        [Membership(game_id=game, user_id=user, group_id=group) for game, user, group in rows],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0014_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Membership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='misterx.game')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='misterx.playergroup')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='misterx.player')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game', 'user'), name='unique_game_user_membership', violation_error_message='A player can only be in one group per game.')],
+            },
+        ),
+        migrations.RunPython(create_memberships, migrations.RunPython.noop),
+    ]
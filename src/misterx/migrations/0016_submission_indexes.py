@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0015_membership'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['game', 'accepted'], name='misterx_sub_game_accepted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('accepted__isnull', True)), fields=['game', 'time'], name='misterx_sub_unreviewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['game', 'group', 'task', 'time'], name='misterx_sub_group_task_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models.functions import Upper
+
+SEARCH_FIELDS = {
+    "misterx_task": ("task", "solution"),
+    "misterx_submission": ("explanation", "feedback"),
+}
+MODELS = {
+    "misterx_task": "Task",
+    "misterx_submission": "Submission",
+}
+
+
+def get_search_indexes(table, fields):
+    # The indexes of misterx.search.get_search_indexes() as created by this migration, later changes of it don't apply
+    indexes = [GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=f"{table}_{field}_trgm_idx") for field in fields]
+    indexes.append(GinIndex(SearchVector(*fields, config="simple"), name=f"{table}_search_idx"))
+    return indexes
+
+
+class PostgresTrigramExtension(TrigramExtension):
+    # Reversing CreateExtension queries pg_extension on any database
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, fields in SEARCH_FIELDS.items():
+        if vendor == "postgresql":
+            # Not in the state of the models, other databases don't have GIN indexes
+            model = apps.get_model("misterx", MODELS[table])
+            for index in get_search_indexes(table, fields):
+                schema_editor.add_index(model, index)
+        elif vendor == "sqlite":
+            columns = ", ".join(fields)
+            schema_editor.execute(f"CREATE VIRTUAL TABLE {table}_search USING fts5({columns}, tokenize='trigram')")
+            schema_editor.execute(f"INSERT INTO {table}_search (rowid, {columns}) SELECT id, {columns} FROM {table}")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, fields in SEARCH_FIELDS.items():
+        if vendor == "postgresql":
+            model = apps.get_model("misterx", MODELS[table])
+            for index in get_search_indexes(table, fields):
+                schema_editor.remove_index(model, index)
+        elif vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misterx', '0016_submission_indexes'),
+    ]
+
+    operations = [
+        PostgresTrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,14 +1,21 @@
 import uuid
 from datetime import date
+from pathlib import Path
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Count, UniqueConstraint
+from django.db.models import Case, F, OuterRef, Q, Subquery, UniqueConstraint, Value, When
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from utilities.media import get_file_metadata
+
+from .proof_urls import sign_url
+
 User = get_user_model()
 
 
@@ -44,12 +51,17 @@ class Task(models.Model):
         return reverse("misterx:task-detail", kwargs={"pk": self.id})
 
     def has_been_completed(self, game: "Game") -> bool:
+        # Use the completion matrix of the game if it has already been built
+        if "completion_matrix" in game.__dict__:
+            return game.completion_matrix.has_been_completed(self)
         if game.submissions.filter(task=self, accepted=True).count():
             return True
         else:
             return False
 
     def completed_by_group(self, game: "Game", group: PlayerGroup) -> bool:
+        if "completion_matrix" in game.__dict__:
+            return game.completion_matrix.completed_by_group(self, group)
         if game.submissions.filter(task=self, accepted=True, group=group).count():
             return True
         else:
@@ -93,6 +105,12 @@ class Game(models.Model):
     def get_absolute_url(self):
         return reverse("misterx:game-detail", kwargs={"pk": self.id})
 
+    @cached_property
+    def completion_matrix(self):
+        from .completion import CompletionMatrix
+
+        return CompletionMatrix(self)
+
     class Meta:
         ordering = ["-date"]
         constraints = [
@@ -105,6 +123,24 @@ class Game(models.Model):
         ]
 
 
+class SubmissionQuerySet(models.QuerySet):
+    def with_granted_points(self):
+        # Only the first accepted submission of a group for a task is awarded the task points,
+        # unless the points have been overridden for a specific submission
+        first_accepted = Submission.objects.filter(
+            game=OuterRef("game"), task=OuterRef("task"), group=OuterRef("group"), accepted=True
+        ).order_by("time", "pk")
+        return self.annotate(
+            granted_points=Case(
+                When(~Q(accepted=True), then=Value(0)),
+                When(points_override__isnull=False, then=F("points_override")),
+                When(pk=Subquery(first_accepted.values("pk")[:1]), then=F("task__points")),
+                default=Value(0),
+                output_field=models.PositiveIntegerField(),
+            )
+        )
+
+
 class Submission(models.Model):
     group = models.ForeignKey(PlayerGroup, related_name="submissions", on_delete=models.CASCADE)
     game = models.ForeignKey(Game, related_name="submissions", on_delete=models.CASCADE)
@@ -127,10 +163,35 @@ class Submission(models.Model):
     feedback = models.TextField(
         _("Feedback"), help_text=_("Optional Feedback on why this wasn't accepted"), null=True, blank=True
     )
+    awarded_points = models.PositiveIntegerField(
+        _("Awarded points"),
+        help_text=_("Points that have been added to the score of the group when this submission was last reviewed"),
+        default=0,
+        editable=False,
+    )
+    reviewer = models.ForeignKey(
+        Player, related_name="reviewed_submissions", null=True, blank=True, editable=False, on_delete=models.SET_NULL
+    )
+    lease_expires = models.DateTimeField(
+        _("Lease expires"),
+        help_text=_("Until when the reviewer has claimed this submission for reviewing"),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    objects = SubmissionQuerySet.as_manager()
 
     @property
     def granted_points(self) -> int:
-        first_accepted = Submission.objects.filter(game=self.game, task=self.task, group=self.group).order_by("time").filter(accepted=True).first()
+        # Use the value annotated by SubmissionQuerySet.with_granted_points() if available
+        if "_granted_points" in self.__dict__:
+            return self._granted_points
+        first_accepted = (
+            Submission.objects.filter(game=self.game, task=self.task, group=self.group, accepted=True)
+            .order_by("time", "pk")
+            .first()
+        )
         if not self.accepted:
             return 0
         elif self.points_override is not None:
@@ -140,6 +201,10 @@ class Submission(models.Model):
         else:
             return self.task.points
 
+    @granted_points.setter
+    def granted_points(self, value: int):
+        self._granted_points = value
+
     def __str__(self) -> str:
         return f"{self.group} with task {self.task}"
 
@@ -162,6 +227,56 @@ class Submission(models.Model):
         indexes = [
             models.Index(fields=["task"], name="%(app_label)s_%(class)s_task_idx"),
             models.Index(fields=["-time"], name="%(app_label)s_%(class)s_time_idx"),
+            # Filtering the submissions of a game by review state
+            models.Index(fields=["game", "accepted"], name="misterx_sub_game_accepted_idx"),
+            # The approval queue, only unreviewed submissions in the order they are handed out
+            models.Index(fields=["game", "time"], condition=Q(accepted__isnull=True), name="misterx_sub_unreviewed_idx"),
+            # Submissions of a group for a task, also used for the first accepted one and without the time
+            models.Index(fields=["game", "group", "task", "time"], name="misterx_sub_group_task_idx"),
+        ]
+
+
+class Score(models.Model):
+    game = models.ForeignKey(Game, related_name="scores", on_delete=models.CASCADE)
+    group = models.ForeignKey(PlayerGroup, related_name="scores", on_delete=models.CASCADE)
+    points = models.IntegerField(_("Points"), default=0)
+
+    def __str__(self) -> str:
+        return f"{self.group}: {self.points}P"
+
+    class Meta:
+        ordering = ["-points"]
+        constraints = [
+            UniqueConstraint(
+                fields=["game", "group"],
+                name="unique_game_group_score",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["game", "-points"], name="%(app_label)s_%(class)s_game_points_idx"),
+        ]
+
+
+class Membership(models.Model):
+    """
+    The group of a player in a game, derived from the groups of the game and the groups of the player. It is kept in
+    sync by signals, the unique constraint prevents a player from being in multiple groups of the same game.
+    """
+
+    game = models.ForeignKey(Game, related_name="memberships", on_delete=models.CASCADE)
+    user = models.ForeignKey(Player, related_name="memberships", on_delete=models.CASCADE)
+    group = models.ForeignKey(PlayerGroup, related_name="memberships", on_delete=models.CASCADE)
+
+    def __str__(self) -> str:
+        return f"{self.user} in {self.group} ({self.game})"
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["game", "user"],
+                name="unique_game_user_membership",
+                violation_error_message=_("A player can only be in one group per game."),
+            )
         ]
 
 
@@ -174,4 +289,81 @@ def get_upload_path(instance: "Upload", filename: str):
 class Upload(models.Model):
     submission = models.ForeignKey("Submission", on_delete=models.CASCADE, related_name="proofs")
     uuid = models.UUIDField(verbose_name="UUID for upload", default=uuid.uuid4, editable=False)
-    file = models.FileField("File", upload_to=get_upload_path)
+    file = models.FileField("File", upload_to=get_upload_path, db_index=True)
+    mime_type = models.CharField(_("MIME type"), max_length=255, blank=True, editable=False)
+    size = models.PositiveBigIntegerField(_("Size"), help_text=_("Size in bytes"), null=True, blank=True, editable=False)
+    width = models.PositiveIntegerField(_("Width"), null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(_("Height"), null=True, blank=True, editable=False)
+    duration = models.FloatField(_("Duration"), help_text=_("Duration in seconds"), null=True, blank=True, editable=False)
+    sha256 = models.CharField(_("SHA-256"), max_length=64, blank=True, editable=False)
+    derivatives = models.JSONField(_("Derivatives"), default=list, blank=True, editable=False)
+
+    def __str__(self) -> str:
+        return self.file.name
+
+    def get_url(self, name: str) -> str:
+        url = self.file.storage.url(name)
+        if settings.PROOF_URL_SECRET:
+            return sign_url(name, url)
+        return url
+
+    @property
+    def url(self) -> str:
+        return self.get_url(self.file.name)
+
+    def get_srcset(self, derivative_format: str) -> str:
+        return ", ".join(
+            f"{self.get_url(d['name'])} {d['width']}w" for d in self.derivatives if d["format"] == derivative_format
+        )
+
+    @property
+    def webp_srcset(self) -> str:
+        return self.get_srcset("webp")
+
+    @property
+    def jpeg_srcset(self) -> str:
+        return self.get_srcset("jpeg")
+
+    @property
+    def poster_url(self) -> str | None:
+        for derivative in self.derivatives:
+            if derivative["format"] == "poster":
+                return self.get_url(derivative["name"])
+        return None
+
+    @property
+    def main_mime_type(self) -> str:
+        return self.mime_type.split("/")[0]
+
+    def update_metadata(self):
+        for field, value in get_file_metadata(self.file).items():
+            setattr(self, field, value)
+
+    # Sniff the file once while it is uploaded, so it never has to be opened for rendering
+    def save(self, *args, **kwargs):
+        from .derivatives import schedule_derivatives
+
+        created = self._state.adding
+        if not self.mime_type and self.file:
+            self.update_metadata()
+        super().save(*args, **kwargs)
+        if created:
+            schedule_derivatives(self)
+
+
+class ChunkedUpload(models.Model):
+    uuid = models.UUIDField(verbose_name="UUID for upload", default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(Player, related_name="chunked_uploads", on_delete=models.CASCADE)
+    filename = models.CharField(_("File name"), max_length=255)
+    size = models.PositiveBigIntegerField(_("Size"), help_text=_("Size in bytes"))
+    offset = models.PositiveBigIntegerField(_("Offset"), help_text=_("Number of bytes received so far"), default=0)
+    checksum = models.CharField(_("Checksum"), help_text=_("Algorithm and hex digest, e.g. sha256:..."), max_length=255)
+    completed = models.BooleanField(_("Completed"), default=False)
+    created = models.DateTimeField(_("Created"), auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def path(self) -> Path:
+        return Path(settings.CHUNKED_UPLOAD_ROOT) / f"{self.uuid}.part"
@@ -0,0 +1,102 @@
+"""
+The active game and group of the requesting player, resolved once per request.
+
+The context is cached per user. It is invalidated by changing the version keys: the global version whenever a game or
+group changes, the version of a user whenever their groups change. Without a cache shared by the workers, the
+context is computed for each request, see utilities/cache.py.
+"""
+
+import uuid
+from typing import NamedTuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils.functional import SimpleLazyObject
+
+from utilities.cache import get_shared_cache
+
+from .models import Game, Membership, PlayerGroup
+
+PLAYER_CONTEXT_TIMEOUT = 60 * 60
+
+
+class PlayerContext(NamedTuple):
+    game: Game | None
+    group: PlayerGroup | None
+    group_ids: frozenset[int]
+
+    def is_member(self, group_id) -> bool:
+        return group_id in self.group_ids
+
+
+EMPTY_CONTEXT = PlayerContext(None, None, frozenset())
+
+
+def get_version_key(user_id=None) -> str:
+    return f"misterx:player_context:version:{user_id or 'all'}"
+
+
+def get_versions(cache, user_id) -> str:
+    keys = [get_version_key(), get_version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = uuid.uuid4().hex
+            cache.set(key, versions[key], None)
+    return ":".join(versions[key] for key in keys)
+
+
+def invalidate_player_contexts(user_ids=None):
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    # Without users, all contexts are invalidated
+    if user_ids is None:
+        cache.delete(get_version_key())
+    else:
+        cache.delete_many([get_version_key(user_id) for user_id in user_ids])
+
+
+def compute_player_context(user) -> PlayerContext:
+    group_ids = frozenset(user.groups.values_list("pk", flat=True))
+    membership = Membership.objects.filter(user=user, game__active=True).select_related("game", "group").first()
+    if membership is None:
+        return PlayerContext(None, None, group_ids)
+    return PlayerContext(membership.game, membership.group, group_ids)
+
+
+def get_player_context(user) -> PlayerContext:
+    if not user.is_authenticated:
+        return EMPTY_CONTEXT
+    cache = get_shared_cache()
+    if cache is None:
+        return compute_player_context(user)
+    key = f"misterx:player_context:{get_versions(cache, user.pk)}:{user.pk}"
+    context = cache.get(key)
+    if context is None:
+        context = compute_player_context(user)
+        cache.set(key, context, PLAYER_CONTEXT_TIMEOUT)
+    return context
+
+
+async def aget_player_context(user) -> PlayerContext:
+    return await sync_to_async(get_player_context)(user)
+
+
+class PlayerContextMiddleware:
+    """
+    Adds request.player_context, which is only resolved when used. Async views use aget_player_context() instead, as
+    resolving it queries the database.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.player_context = SimpleLazyObject(lambda: get_player_context(request.user))
+        # In async mode, this returns the coroutine of the next middleware
+        return self.get_response(request)
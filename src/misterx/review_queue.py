@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Game, Submission
+
+# How many candidates are tried when claiming without row locks before giving up
+CLAIM_ATTEMPTS = 10
+
+
+def get_lease_expiry():
+    return timezone.now() + timedelta(seconds=settings.REVIEW_LEASE_SECONDS)
+
+
+def claimable_submissions(game: Game, reviewer):
+    # Unreviewed submissions that are not leased, whose lease expired or that are leased by the reviewer already
+    return Submission.objects.filter(game=game, accepted=None).filter(
+        Q(lease_expires__isnull=True) | Q(lease_expires__lt=timezone.now()) | Q(reviewer=reviewer)
+    )
+
+
+def claim_submission(pk, game: Game, reviewer) -> Submission | None:
+    # Conditional update, only one reviewer can win the claim
+    if claimable_submissions(game, reviewer).filter(pk=pk).update(reviewer=reviewer, lease_expires=get_lease_expiry()):
+        return Submission.objects.get(pk=pk)
+    return None
+
+
+def claim_next_submission(game: Game, reviewer, exclude=()) -> Submission | None:
+    # Keep handing out the submission the reviewer is already working on
+    held = (
+        Submission.objects.filter(game=game, accepted=None, reviewer=reviewer, lease_expires__gte=timezone.now())
+        .exclude(pk__in=exclude)
+        .order_by("time", "pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if held is not None:
+        return claim_submission(held, game, reviewer)
+
+    candidates = claimable_submissions(game, reviewer).exclude(pk__in=exclude).order_by("time", "pk")
+    if connection.features.has_select_for_update_skip_locked:
+        # Rows locked by concurrent claims are skipped instead of waited for
+        with transaction.atomic():
+            submission = candidates.select_for_update(skip_locked=True).first()
+            if submission is not None:
+                submission.reviewer = reviewer
+                submission.lease_expires = get_lease_expiry()
+                submission.save(update_fields=["reviewer", "lease_expires"])
+            return submission
+
+    # Without row locks (e.g. SQLite), try the next candidate if another reviewer was faster
+    for pk in candidates.values_list("pk", flat=True)[:CLAIM_ATTEMPTS]:
+        if submission := claim_submission(pk, game, reviewer):
+            return submission
+    return None
+
+
+def release_submission(pk, reviewer) -> bool:
+    return bool(Submission.objects.filter(pk=pk, accepted=None, reviewer=reviewer).update(reviewer=None, lease_expires=None))
@@ -0,0 +1,146 @@
+"""
+Search in the texts of tasks and submissions.
+
+On PostgreSQL, migration 0017 adds the indexes of get_search_indexes(): pg_trgm GIN indexes on the upper-cased texts,
+which serve the icontains lookups of the filters as they are, and GIN indexes on the search vector of the texts of each
+model for the ranked search. On SQLite, the texts are copied to FTS5 tables with the trigram tokenizer, which serve
+both. They are kept up to date by signals, after bulk writes update_search_index() has to be called.
+"""
+
+import re
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Upper
+
+from .models import Submission, Task
+
+SEARCH_FIELDS = {
+    Task: ("task", "solution"),
+    Submission: ("explanation", "feedback"),
+}
+
+# The trigram tokenizer of FTS5 only finds strings of at least three characters
+MIN_TRIGRAM_LENGTH = 3
+
+
+def use_search_tables() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def get_search_table(model) -> str:
+    return f"{model._meta.db_table}_search"
+
+
+def quote_match(value: str) -> str:
+    return '"{}"'.format(value.replace('"', '""'))
+
+
+def filter_contains(queryset: QuerySet, field: str, value: str) -> QuerySet:
+    """
+    Filters like field__icontains, with the search table on SQLite.
+    """
+    if use_search_tables() and field in SEARCH_FIELDS.get(queryset.model, ()) and len(value) >= MIN_TRIGRAM_LENGTH:
+        table = get_search_table(queryset.model)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [f"{field} : {quote_match(value)}"])
+        )
+    return queryset.filter(**{f"{field}__icontains": value})
+
+
+def get_search_vector(fields) -> SearchVector:
+    # The simple configuration doesn't stem words, the texts are in several languages
+    return SearchVector(*fields, config="simple")
+
+
+def get_search_indexes(table: str, fields) -> list[GinIndex]:
+    """
+    The indexes of the texts of a table on PostgreSQL. Queries only use them with exactly these expressions. Migration
+    0017 creates them from a copy, changing them needs a new migration.
+    """
+    indexes = [
+        # The icontains lookup compares upper-cased texts
+        GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=f"{table}_{field}_trgm_idx")
+        for field in fields
+    ]
+    indexes.append(GinIndex(get_search_vector(fields), name=f"{table}_search_idx"))
+    return indexes
+
+
+def search(queryset: QuerySet, query: str, limit: int) -> list:
+    """
+    The objects of the queryset whose texts match the words of the query, best matches first, each with its
+    search_rank.
+    """
+    model = queryset.model
+    words = [word for word in re.split(r"\s+", query.strip()) if word]
+    if not words:
+        return []
+
+    if connection.vendor == "postgresql":
+        vector = get_search_vector(SEARCH_FIELDS[model])
+        search_query = SearchQuery(query, config="simple", search_type="websearch")
+        return list(
+            queryset.alias(search_vector=vector)
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(vector, search_query))
+            .order_by("-search_rank", "-pk")[:limit]
+        )
+
+    long_words = [word for word in words if len(word) >= MIN_TRIGRAM_LENGTH]
+    if not use_search_tables() or len(long_words) < len(words):
+        # Unranked, all words have to appear in any of the texts
+        condition = Q()
+        for word in words:
+            condition &= Q.create([(f"{field}__icontains", word) for field in SEARCH_FIELDS[model]], connector=Q.OR)
+        return list(queryset.filter(condition).annotate(search_rank=Value(0.0)).order_by("-pk")[:limit])
+
+    table = get_search_table(model)
+    # Ranked by the search table first, the queryset may still exclude some of them, e.g. for permissions
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, -bm25({table}) FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s",
+            [" ".join(quote_match(word) for word in words), limit * 5],
+        )
+        ranks = dict(cursor.fetchall())
+    objects = queryset.in_bulk(ranks)
+    results = []
+    for pk, rank in ranks.items():
+        if pk in objects:
+            objects[pk].search_rank = rank
+            results.append(objects[pk])
+    return results[:limit]
+
+
+def update_search_index(model, pks=None):
+    """
+    Copies the texts of the objects to the search table, of all objects if pks is None. Deleted objects are removed.
+    Only needed on SQLite, PostgreSQL maintains its indexes itself.
+    """
+    if not use_search_tables():
+        return
+    table = get_search_table(model)
+    source = connection.ops.quote_name(model._meta.db_table)
+    fields = SEARCH_FIELDS[model]
+    columns = ", ".join(fields)
+    pk_column = model._meta.pk.column
+
+    with connection.cursor() as cursor:
+        if pks is None:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"INSERT INTO {table} (rowid, {columns}) SELECT {pk_column}, {columns} FROM {source}")
+            return
+        pks = list(pks)
+        # SQLite limits the number of parameters of a query
+        for start in range(0, len(pks), 500):
+            batch = pks[start : start + 500]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", batch)
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) SELECT {pk_column}, {columns} FROM {source} "
+                f"WHERE {pk_column} IN ({placeholders})",
+                batch,
+            )
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .events import publish, publish_queue_depth
+from .facets import invalidate_submission_facets
+from .memberships import sync_game_groups, sync_user_groups
+from .models import Game, PlayerGroup, Score, Submission, Task
+from .player_context import invalidate_player_contexts
+from .search import SEARCH_FIELDS, update_search_index
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Submission)
+def invalidate_submission_caches(sender, instance, **kwargs):
+    invalidate_submission_facets(instance.game_id)
+
+
+@receiver(post_save, sender=Submission)
+def publish_submission_events(sender, instance, created, update_fields, **kwargs):
+    if created:
+        publish("submission", instance.game_id, instance.group_id, submission=instance.pk)
+    # Claiming a submission only saves the lease
+    elif update_fields is None or "accepted" in update_fields:
+        if instance.accepted is not None:
+            publish("reviewed", instance.game_id, instance.group_id, submission=instance.pk, accepted=instance.accepted)
+    else:
+        return
+    publish_queue_depth(instance.game_id)
+
+
+@receiver(post_delete, sender=Submission)
+def publish_submission_deleted(sender, instance, origin, **kwargs):
+    # Skip deletions of many submissions at once, e.g. of a whole game, the depth is counted per event
+    if origin == instance:
+        publish_queue_depth(instance.game_id)
+
+
+@receiver(post_save, sender=Score)
+def publish_score(sender, instance, **kwargs):
+    publish("score", instance.game_id, instance.group_id, points=instance.points)
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Submission)
+def update_search_tables(sender, instance, update_fields=None, **kwargs):
+    # E.g. claiming a submission doesn't change its texts
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS[sender]):
+        return
+    update_search_index(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Game.groups.through)
+def sync_game_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    sync_game_groups(instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def sync_user_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    sync_user_groups(instance, action, reverse, pk_set)
+
+
+@receiver([post_save, post_delete], sender=Game)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=PlayerGroup)
+@receiver(m2m_changed, sender=Game.groups.through)
+def invalidate_all_player_contexts(sender, **kwargs):
+    invalidate_player_contexts()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_member_player_contexts(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_player_contexts([instance.pk])
+    elif pk_set is not None:
+        invalidate_player_contexts(pk_set)
+    else:
+        # The members of a cleared group are not known anymore
+        invalidate_player_contexts()
@@ -1,9 +1,12 @@
+import itertools
+
 import django_tables2 as tables
 from django.utils.translation import gettext_lazy as _
 
 from utilities.tables.columns import EditColumn, OpenColumn
+from utilities.tables.pagination import KeysetPaginationMixin
 
-from .models import Game, Player, PlayerGroup, Submission, Task
+from .models import Game, Player, PlayerGroup, Score, Submission, Task
 
 
 class AddSubmissionForGroupColumn(tables.TemplateColumn):
@@ -94,13 +97,16 @@ class UserTaskTable(tables.Table):
         ]
 
 
-class SubmissionTable(tables.Table):
+class SubmissionTable(KeysetPaginationMixin, tables.Table):
+    keyset_field = "time"
     open = OpenColumn("misterx:submission-detail")
     edit = EditColumn("misterx:submission-edit")
-    granted_points = tables.Column(orderable=False)
+    granted_points = tables.Column()
 
     class Meta:
         model = Submission
+        template_name = "tables/keyset_table.html"
+        order_by = "-time"
         fields = [
             "group",
             "game",
@@ -153,12 +159,15 @@ class GamePlayerGroupTable(tables.Table):
         ]
 
 
-class UserSubmissionTable(tables.Table):
+class UserSubmissionTable(KeysetPaginationMixin, tables.Table):
+    keyset_field = "time"
     open = OpenColumn("misterx:user-submission-detail")
-    granted_points = tables.Column(orderable=False)
+    granted_points = tables.Column()
 
     class Meta:
         model = Submission
+        template_name = "tables/keyset_table.html"
+        order_by = "-time"
         fields = [
             "task",
             "submitter",
@@ -168,3 +177,23 @@ class UserSubmissionTable(tables.Table):
             "explanation",
             "feedback",
         ]
+
+
+class ScoreTable(tables.Table):
+    rank = tables.Column(empty_values=(), orderable=False, attrs={"th": {"class": "w-1"}})
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rank_counter = itertools.count(1)
+
+    def render_rank(self):
+        return next(self.rank_counter)
+
+    class Meta:
+        model = Score
+        orderable = False
+        fields = [
+            "rank",
+            "group",
+            "points",
+        ]
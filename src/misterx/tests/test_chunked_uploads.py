@@ -0,0 +1,93 @@
+import hashlib
+import io
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..chunked_uploads import OffsetMismatch, append_chunk
+from ..models import ChunkedUpload, Player
+
+CONTENT = b"0123456789" * 10
+
+
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(CHUNKED_UPLOAD_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.player = Player.objects.create(username="player")
+        self.client.force_login(self.player)
+
+    def create(self, content=CONTENT) -> str:
+        response = self.client.post(
+            reverse("misterx:chunked-upload-create"),
+            {"filename": "proof.jpeg", "size": len(CONTENT), "checksum": f"sha256:{hashlib.sha256(content).hexdigest()}"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["url"]
+
+    def patch(self, url, offset, data):
+        return self.client.patch(
+            url, data, content_type="application/offset+octet-stream", headers={"Upload-Offset": str(offset)}
+        )
+
+    def test_resume(self):
+        url = self.create()
+        self.assertEqual(self.patch(url, 0, CONTENT[:40])["Upload-Offset"], "40")
+        # After a dropped connection, the client asks how much arrived
+        self.assertEqual(self.client.head(url)["Upload-Offset"], "40")
+        response = self.patch(url, 40, CONTENT[40:])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["completed"])
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(upload.path.read_bytes(), CONTENT)
+
+    def test_offset_mismatch(self):
+        url = self.create()
+        self.patch(url, 0, CONTENT[:40])
+        for offset in (0, 50):
+            with self.subTest(offset):
+                response = self.patch(url, offset, CONTENT[offset:])
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response["Upload-Offset"], "40")
+        self.assertEqual(ChunkedUpload.objects.get().path.read_bytes(), CONTENT[:40])
+
+    def test_checksum_mismatch(self):
+        url = self.create(content=b"other")
+        response = self.patch(url, 0, CONTENT)
+        self.assertEqual(response.status_code, 422)
+        # The upload starts over
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(upload.offset, 0)
+        self.assertFalse(upload.completed)
+        self.assertFalse(upload.path.exists())
+
+    def test_concurrent_chunk(self):
+        self.create()
+        upload = ChunkedUpload.objects.get()
+        stream = io.BytesIO(CONTENT[:40])
+
+        def read(size):
+            # Another request for the same offset advanced the upload in the meantime
+            ChunkedUpload.objects.filter(pk=upload.pk).update(offset=40)
+            return io.BytesIO.read(stream, size)
+
+        with mock.patch.object(stream, "read", read), self.assertRaises(OffsetMismatch):
+            append_chunk(upload, 0, stream)
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 40)
+        self.assertFalse(upload.completed)
+
+    def test_stale_offset(self):
+        self.create()
+        stale = ChunkedUpload.objects.get()
+        append_chunk(ChunkedUpload.objects.get(), 0, io.BytesIO(CONTENT[:40]))
+        # The offset is read again, the stale object doesn't allow writing at its offset
+        with self.assertRaises(OffsetMismatch):
+            append_chunk(stale, 0, io.BytesIO(CONTENT[:40]))
+        self.assertEqual(stale.offset, 40)
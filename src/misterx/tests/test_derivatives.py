@@ -0,0 +1,88 @@
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import derivatives
+from ..models import Player, Upload
+from .utils import create_game, create_submission
+
+
+def run_under_uwsgi(**options):
+    return mock.patch.dict(sys.modules, {"uwsgi": SimpleNamespace(opt=options)})
+
+
+class ThreadsEnabledTest(SimpleTestCase):
+    def test_without_uwsgi(self):
+        self.assertTrue(derivatives.threads_enabled())
+
+    def test_uwsgi(self):
+        for options, enabled in (
+            ({}, False),
+            ({"threads": b"1"}, False),
+            ({"enable-threads": True}, True),
+            ({"threads": b"4"}, True),
+        ):
+            with self.subTest(options), run_under_uwsgi(**options):
+                self.assertEqual(derivatives.threads_enabled(), enabled)
+
+
+@override_settings(PROOF_DERIVATIVES=True)
+class ScheduleDerivativesTest(TestCase):
+    def setUp(self):
+        self.upload = Upload(pk=1)
+
+    @mock.patch.object(derivatives, "generate_derivatives_for")
+    @mock.patch.object(derivatives, "_executor")
+    def test_in_background(self, executor, generate):
+        with self.captureOnCommitCallbacks(execute=True):
+            derivatives.schedule_derivatives(self.upload)
+        executor.submit.assert_called_once_with(generate, 1)
+        generate.assert_not_called()
+
+    @mock.patch.object(derivatives, "generate_derivatives_for")
+    @mock.patch.object(derivatives, "_executor")
+    def test_without_threads(self, executor, generate):
+        # A background thread would never run
+        with run_under_uwsgi(), self.captureOnCommitCallbacks(execute=True), self.assertLogs(derivatives.logger, "WARNING"):
+            derivatives.schedule_derivatives(self.upload)
+        executor.submit.assert_not_called()
+        generate.assert_called_once_with(1)
+
+
+@override_settings(PROOF_DERIVATIVES=False, PROOF_URL_SECRET=None)
+class ServeDerivativesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game = create_game(groups=2, players=1, tasks=1)
+        group_a, group_b = game.groups.order_by("name")
+        task = game.tasks.get()
+        submission_a = create_submission(game, group_a, task)
+        submission_b = create_submission(game, group_b, task)
+        # An original named like a derivative of an upload of another group
+        Upload.objects.create(submission=submission_a, file="proofs/photo.320w.jpeg", mime_type="image/jpeg")
+        Upload.objects.create(
+            submission=submission_b,
+            file="proofs/photo",
+            mime_type="image/jpeg",
+            derivatives=[{"name": "proofs/photo.640w.jpeg", "width": 640, "format": "jpeg"}],
+        )
+        cls.player_a = Player.objects.get(username="game-a1")
+        cls.player_b = Player.objects.get(username="game-b1")
+
+    def assertServed(self, player: Player, name: str, status: int):
+        self.client.force_login(player)
+        response = self.client.get(f"/media/{name}")
+        self.assertEqual(response.status_code, status)
+
+    def test_original(self):
+        self.assertServed(self.player_a, "proofs/photo.320w.jpeg", 200)
+        self.assertServed(self.player_b, "proofs/photo.320w.jpeg", 403)
+
+    def test_recorded_derivative(self):
+        self.assertServed(self.player_b, "proofs/photo.640w.jpeg", 200)
+        self.assertServed(self.player_a, "proofs/photo.640w.jpeg", 403)
+
+    def test_unrecorded_derivative(self):
+        self.assertServed(self.player_b, "proofs/photo.1280w.jpeg", 403)
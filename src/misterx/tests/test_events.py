@@ -0,0 +1,101 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..events import broker, stream_events
+from ..models import Game
+from ..views import EventStreamView
+from .utils import create_game, create_staff
+
+
+class WithoutListenerMixin:
+    # Events are dispatched directly, a listener on PostgreSQL would keep a connection to the test database open
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(broker, "listener", mock.Mock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(EVENT_STREAM_DURATION=1, EVENT_STREAM_HEARTBEAT=0.1)
+class StreamEventsTest(WithoutListenerMixin, SimpleTestCase):
+    async def read_stream(self, *args, events=()):
+        stream = stream_events(*args)
+        chunks = [await anext(stream)]
+        for event in events:
+            broker.dispatch(event)
+        # Events are handed to the stream through the event loop
+        await asyncio.sleep(0)
+        chunks.extend([await anext(stream) for _event in events])
+        await stream.aclose()
+        return chunks
+
+    async def test_filters_events_of_game_and_group(self):
+        chunks = await self.read_stream(
+            frozenset({"reviewed"}),
+            1,
+            2,
+            events=[
+                {"type": "reviewed", "game": 2, "group": 2},
+                {"type": "reviewed", "game": 1, "group": 3},
+                {"type": "submission", "game": 1, "group": 2},
+                {"type": "reviewed", "game": 1, "group": 2, "accepted": True},
+            ],
+        )
+        self.assertEqual(chunks[0], "retry: 5000\n\n")
+        self.assertEqual(chunks[1], 'event: reviewed\ndata: {"type": "reviewed", "game": 1, "group": 2, "accepted": true}\n\n')
+        self.assertEqual(set(chunks[2:]), {": heartbeat\n\n"})
+
+    async def test_unsubscribes_when_closed(self):
+        stream = stream_events(frozenset({"queue"}), 1)
+        await anext(stream)
+        self.assertEqual(len(broker.subscribers), 1)
+        await stream.aclose()
+        self.assertEqual(len(broker.subscribers), 0)
+
+
+class EventStreamViewTest(WithoutListenerMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game()
+        cls.staff = create_staff("reviewer", "misterx.change_submission")
+        cls.player = cls.game.groups.first().user_set.first()
+
+    def test_no_stream_under_wsgi(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/submissions/events").status_code, 204)
+        response = self.client.get("/submissions/")
+        self.assertContains(response, 'data-event-stream=""')
+
+    async def test_stream_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get("/submissions/events")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(await anext(aiter(response.streaming_content)), b"retry: 5000\n\n")
+        await response.streaming_content.aclose()
+
+    async def test_permission_required(self):
+        await self.async_client.aforce_login(self.player)
+        response = await self.async_client.get("/submissions/events")
+        self.assertEqual(response.status_code, 403)
+
+    def test_stream_scope_required(self):
+        class WithoutScopeView(EventStreamView):
+            pass
+
+        with self.assertRaises(TypeError):
+            WithoutScopeView()
+
+    async def test_no_active_game(self):
+        await self.async_client.aforce_login(self.staff)
+        await Game.objects.aupdate(active=False)
+        response = await self.async_client.get("/submissions/events")
+        self.assertEqual(response.status_code, 204)
+
+    def test_partial_table(self):
+        self.client.force_login(self.player)
+        response = self.client.get("/user/submissions/", {"_table": ""})
+        self.assertTemplateUsed(response, "tables/list_table.html")
+        self.assertTemplateNotUsed(response, "misterx/user_submission_list.html")
+        self.assertContains(response, 'data-partial-table=""')
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+
+from ..exports import escape_formula
+from ..leaderboard import update_score_for_submission
+from ..models import Submission
+from .utils import create_game, create_staff, create_submission
+
+
+class GameExportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game()
+        cls.staff = create_staff()
+        group = cls.game.groups.order_by("name").first()
+        tasks = list(cls.game.tasks.order_by("orderedtask__task_number"))
+        cls.submission = create_submission(cls.game, group, tasks[1], accepted=True, explanation="=1+1")
+        update_score_for_submission(cls.submission)
+        create_submission(cls.game, group, tasks[1], accepted=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def get_url(self, kind, export_format):
+        return f"/games/{self.game.pk}/export/{kind}.{export_format}"
+
+    def test_submissions_csv(self):
+        response = self.client.get(self.get_url("submissions", "csv"))
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(response.getvalue().decode())))
+        self.assertEqual([row["granted_points"] for row in rows], ["20", "0"])
+        self.assertEqual(rows[0]["task_number"], "2")
+        # Spreadsheets would run the explanation as a formula
+        self.assertEqual(rows[0]["explanation"], "'=1+1")
+
+    def test_escape_formula(self):
+        for value, escaped in (("-1", "'-1"), ("@SUM(A1)", "'@SUM(A1)"), ("a=b", "a=b"), (-1, -1), (None, None)):
+            with self.subTest(value):
+                self.assertEqual(escape_formula(value), escaped)
+
+    def test_ndjson_not_escaped(self):
+        response = self.client.get(self.get_url("submissions", "ndjson"))
+        rows = [json.loads(line) for line in response.getvalue().decode().splitlines()]
+        self.assertEqual(rows[0]["explanation"], "=1+1")
+
+    def test_scores_ndjson(self):
+        response = self.client.get(self.get_url("scores", "ndjson"))
+        rows = [json.loads(line) for line in response.getvalue().decode().splitlines()]
+        self.assertEqual(rows[0]["points"], 20)
+        self.assertEqual(rows[0]["rank"], 1)
+
+    def test_unknown_kind(self):
+        self.assertEqual(self.client.get(self.get_url("players", "csv")).status_code, 404)
+
+    async def test_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(self.get_url("submissions", "ndjson"))
+        # A sync iterator would be read completely before sending anything
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), await Submission.objects.acount())
@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+from ..facets import SubmissionFacets
+from ..models import Submission
+from .utils import SharedCacheMixin, create_game, create_submission
+
+
+class FacetsTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.game = create_game(groups=2, players=1, tasks=2)
+        self.group_a, self.group_b = self.game.groups.order_by("name")
+        self.task = self.game.tasks.order_by("orderedtask__task_number").first()
+        create_submission(self.game, self.group_a, self.task)
+
+    def get_facets(self):
+        return SubmissionFacets(Submission.objects.filter(game=self.game), ["group", "task"], self.game.pk).facets
+
+
+class FacetsTest(FacetsTestMixin, TestCase):
+    def test_choices(self):
+        create_submission(self.game, self.group_a, self.task)
+        self.assertEqual(self.get_facets()["group"], [(self.group_a.pk, f"{self.group_a.name} (2)")])
+        self.assertEqual(self.get_facets()["task"], [(self.task.pk, f"{self.task.task} ({self.task.points}P) (2)")])
+
+    def test_not_cached_in_process_local_cache(self):
+        # The default LocMemCache of the tests isn't shared, each worker would keep its own stale choices
+        with self.assertNumQueries(1):
+            self.get_facets()
+        create_submission(self.game, self.group_b, self.task)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.get_facets()["group"]), 2)
+
+
+class SharedCacheFacetsTest(SharedCacheMixin, FacetsTestMixin, TestCase):
+    def test_cached(self):
+        self.get_facets()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.get_facets()["group"]), 1)
+
+    def test_invalidated_by_submissions(self):
+        self.get_facets()
+        create_submission(self.game, self.group_b, self.task)
+        self.assertEqual(len(self.get_facets()["group"]), 2)
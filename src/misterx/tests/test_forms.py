@@ -0,0 +1,41 @@
+from django.http import QueryDict
+from django.test import TestCase
+
+from ..forms import GameForm
+from ..models import OrderedTask, Task
+from .utils import create_game
+
+
+class GameFormTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game(groups=0, tasks=3)
+        cls.task_1, cls.task_2, cls.task_3 = cls.game.tasks.order_by("orderedtask__task_number")
+        cls.task_4 = Task.objects.create(task="Game task 4", points=40)
+
+    def save_tasks(self, tasks: list[Task], num: int):
+        data = QueryDict(mutable=True)
+        data.update({"name": self.game.name, "date": str(self.game.date), "active": "on"})
+        data.setlist("tasks", [str(task.pk) for task in tasks])
+        form = GameForm(data, instance=self.game)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.assertNumQueries(num):
+            form.save_tasks(form.cleaned_data["tasks"])
+        ordered_tasks = OrderedTask.objects.filter(game=self.game).values_list("task", "task_number")
+        self.assertEqual(list(ordered_tasks), [(task.pk, number) for number, task in enumerate(tasks, 1)])
+
+    def test_unchanged(self):
+        # The valid ids, the savepoint and its release, the existing tasks and the delete
+        self.save_tasks([self.task_1, self.task_2, self.task_3], 5)
+
+    def test_add(self):
+        self.save_tasks([self.task_1, self.task_2, self.task_3, self.task_4], 6)
+
+    def test_remove(self):
+        self.save_tasks([self.task_1, self.task_3], 6)
+
+    def test_reorder(self):
+        self.save_tasks([self.task_3, self.task_1, self.task_2], 6)
+
+    def test_all(self):
+        self.save_tasks([self.task_4, self.task_3, self.task_1], 7)
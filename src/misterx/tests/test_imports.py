@@ -0,0 +1,79 @@
+import io
+import json
+
+from django.test import TestCase
+
+from ..imports import ImportValidationError, import_file
+from ..models import Membership, Player, PlayerGroup, Task
+from .utils import create_game
+
+
+def csv_file(text: str) -> io.BytesIO:
+    return io.BytesIO(text.encode())
+
+
+def json_file(rows: list) -> io.BytesIO:
+    return io.BytesIO(json.dumps(rows).encode())
+
+
+class TaskImportTest(TestCase):
+    def test_create_and_update(self):
+        result = import_file("tasks", csv_file("task,points,solution\nFind the tower,10,Tower\nClimb,5,\n"), "csv")
+        self.assertEqual(result, {"created": 2, "updated": 0, "unchanged": 0})
+        self.assertEqual(Task.objects.get(task="Climb").points, 5)
+
+        result = import_file(
+            "tasks", json_file([{"task": "Find the tower", "points": 20}, {"task": "Climb", "points": 5}]), "json"
+        )
+        self.assertEqual(result, {"created": 0, "updated": 1, "unchanged": 1})
+        self.assertEqual(Task.objects.get(task="Find the tower").points, 20)
+
+    def test_errors(self):
+        with self.assertRaises(ImportValidationError) as raised:
+            import_file("tasks", csv_file("task,points\nFind,ten\nClimb,5\nClimb,6\n"), "csv")
+        self.assertEqual(len(raised.exception.errors), 2)
+        self.assertIn("Row 2, points", raised.exception.errors[0])
+        self.assertIn("Row 4, task", raised.exception.errors[1])
+        # Nothing is written if any row is invalid
+        self.assertFalse(Task.objects.exists())
+
+    def test_unreadable_file(self):
+        for file, file_format in ((io.BytesIO(b"\xff\xfe"), "csv"), (csv_file("{}"), "json"), (csv_file("["), "json")):
+            with self.subTest(file_format=file_format), self.assertRaises(ImportValidationError):
+                import_file("tasks", file, file_format)
+
+
+class PlayerImportTest(TestCase):
+    def setUp(self):
+        self.game = create_game(groups=2, players=1)
+
+    def test_create_with_groups(self):
+        result = import_file("players", csv_file("username,first_name,groups\nalice,Alice,Game A;New\nbob,,New\n"), "csv")
+        self.assertEqual(result, {"created": 2, "updated": 0, "unchanged": 0})
+        alice = Player.objects.get(username="alice")
+        self.assertFalse(alice.has_usable_password())
+        self.assertEqual(set(alice.groups.values_list("name", flat=True)), {"Game A", "New"})
+        self.assertTrue(PlayerGroup.objects.filter(name="New").exists())
+        # The memberships in games are added like for groups added in the app
+        self.assertEqual(Membership.objects.get(user=alice).group.name, "Game A")
+        self.assertFalse(Membership.objects.filter(user__username="bob").exists())
+
+    def test_update_keeps_groups(self):
+        import_file("players", json_file([{"username": "game-a1", "first_name": "Alice", "groups": ["New"]}]), "json")
+        player = Player.objects.get(username="game-a1")
+        self.assertEqual(player.first_name, "Alice")
+        self.assertEqual(set(player.groups.values_list("name", flat=True)), {"Game A", "New"})
+
+    def test_several_groups_of_a_game(self):
+        with self.assertRaises(ImportValidationError) as raised:
+            import_file("players", json_file([{"username": "game-a1", "groups": ["Game B"]}]), "json")
+        self.assertIn("Row 1, groups", raised.exception.errors[0])
+        with self.assertRaises(ImportValidationError):
+            import_file("players", csv_file("username,groups\nalice,Game A;Game B\n"), "csv")
+        self.assertFalse(Player.objects.filter(username="alice").exists())
+
+    def test_invalid_username(self):
+        with self.assertRaises(ImportValidationError) as raised:
+            import_file("players", json_file([{"username": "not valid!"}, {"username": "x", "groups": "A"}]), "json")
+        self.assertEqual(len(raised.exception.errors), 1)
+        self.assertIn("Row 1, username", raised.exception.errors[0])
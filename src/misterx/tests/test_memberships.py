@@ -0,0 +1,62 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from ..models import Membership, Player, PlayerGroup
+from .utils import create_game
+
+
+class MembershipTest(TestCase):
+    def setUp(self):
+        self.game = create_game(groups=2, players=1, tasks=0)
+        self.group_a, self.group_b = self.game.groups.order_by("name")
+        self.player_a = Player.objects.get(username="game-a1")
+        self.player_b = Player.objects.get(username="game-b1")
+        self.group_c = PlayerGroup.objects.create(name="Game C")
+        self.player_c = Player.objects.create(username="game-c1")
+        self.player_c.groups.add(self.group_c)
+
+    def assertMemberships(self, *expected):
+        memberships = Membership.objects.filter(game=self.game).values_list("user", "group")
+        self.assertCountEqual(memberships, [(player.pk, group.pk) for player, group in expected])
+
+    def test_conflicting_user_group(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.player_a.groups.add(self.group_b)
+
+    def test_conflicting_game_group(self):
+        self.player_a.groups.add(self.group_c)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.game.groups.add(self.group_c)
+
+    def test_game_groups(self):
+        self.assertMemberships((self.player_a, self.group_a), (self.player_b, self.group_b))
+        self.game.groups.add(self.group_c)
+        self.assertMemberships((self.player_a, self.group_a), (self.player_b, self.group_b), (self.player_c, self.group_c))
+        self.game.groups.remove(self.group_a)
+        self.assertMemberships((self.player_b, self.group_b), (self.player_c, self.group_c))
+        self.game.groups.clear()
+        self.assertMemberships()
+
+    def test_group_games(self):
+        self.group_c.games.add(self.game)
+        self.assertMemberships((self.player_a, self.group_a), (self.player_b, self.group_b), (self.player_c, self.group_c))
+        self.group_a.games.remove(self.game)
+        self.assertMemberships((self.player_b, self.group_b), (self.player_c, self.group_c))
+        self.group_b.games.clear()
+        self.assertMemberships((self.player_c, self.group_c))
+
+    def test_user_groups(self):
+        self.player_c.groups.add(self.group_a)
+        self.assertMemberships((self.player_a, self.group_a), (self.player_b, self.group_b), (self.player_c, self.group_a))
+        self.player_a.groups.remove(self.group_a)
+        self.assertMemberships((self.player_b, self.group_b), (self.player_c, self.group_a))
+        self.player_b.groups.clear()
+        self.assertMemberships((self.player_c, self.group_a))
+
+    def test_group_users(self):
+        self.group_a.user_set.add(self.player_c)
+        self.assertMemberships((self.player_a, self.group_a), (self.player_b, self.group_b), (self.player_c, self.group_a))
+        self.group_a.user_set.remove(self.player_a)
+        self.assertMemberships((self.player_b, self.group_b), (self.player_c, self.group_a))
+        self.group_a.user_set.clear()
+        self.assertMemberships((self.player_b, self.group_b))
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Migrates to migrate_from, lets setUpBeforeMigration() create data with the historical models and migrates to
+    migrate_to. self.apps holds the historical models after the migration.
+    """
+
+    migrate_from: list[tuple[str, str]]
+    migrate_to: list[tuple[str, str]]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.setUpBeforeMigration(executor.loader.project_state(self.migrate_from).apps)
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        self.apps = executor.loader.project_state(self.migrate_to).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+class BackfillScoresTest(MigrationTestCase):
+    migrate_from = [("misterx", "0008_upload_uuid")]
+    migrate_to = [("misterx", "0009_submission_awarded_points_score")]
+
+    def setUpBeforeMigration(self, apps):
+        Game = apps.get_model("misterx", "Game")
+        PlayerGroup = apps.get_model("misterx", "PlayerGroup")
+        Task = apps.get_model("misterx", "Task")
+        OrderedTask = apps.get_model("misterx", "OrderedTask")
+        Submission = apps.get_model("misterx", "Submission")
+
+        game = Game.objects.create(name="Game")
+        self.group, other_group = PlayerGroup.objects.create(name="A"), PlayerGroup.objects.create(name="B")
+        game.groups.add(self.group, other_group)
+        task = Task.objects.create(task="Task", points=10)
+        OrderedTask.objects.create(game=game, task=task, task_number=1)
+        self.first = Submission.objects.create(game=game, group=self.group, task=task, accepted=True)
+        self.second = Submission.objects.create(game=game, group=self.group, task=task, accepted=True)
+        self.override = Submission.objects.create(game=game, group=self.group, task=task, accepted=True, points_override=5)
+        self.game, self.other_group = game, other_group
+
+    def test_awarded_points_and_scores(self):
+        Submission = self.apps.get_model("misterx", "Submission")
+        Score = self.apps.get_model("misterx", "Score")
+        awarded = dict(Submission.objects.values_list("pk", "awarded_points"))
+        self.assertEqual(awarded, {self.first.pk: 10, self.second.pk: 0, self.override.pk: 5})
+        scores = dict(Score.objects.filter(game_id=self.game.pk).values_list("group", "points"))
+        self.assertEqual(scores, {self.group.pk: 15, self.other_group.pk: 0})
@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase
+
+from ..views import GameDetailView
+from .utils import create_game, create_staff, create_submission
+
+# Database tables only queried for the groups and tasks tables of the game page
+OTHER_TABLES = ("misterx_game_groups", "misterx_orderedtask")
+
+
+class PartialTablesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game(groups=3, players=1, tasks=3)
+        for group in cls.game.groups.all():
+            for task in cls.game.tasks.all():
+                create_submission(cls.game, group, task)
+        cls.staff = create_staff()
+        cls.prefix = GameDetailView.table_prefix.format(2)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def get(self, query: str, num: int, estimated_counts=0):
+        # On PostgreSQL, tables paginated by keyset estimate their number of rows with EXPLAIN
+        if connection.vendor == "postgresql":
+            num += estimated_counts
+        with self.assertNumQueries(num) as queries:
+            response = self.client.get(f"/games/{self.game.pk}{query}")
+        self.assertEqual(response.status_code, 200)
+        for captured in queries.captured_queries:
+            self.assertFalse(any(table in captured["sql"] for table in OTHER_TABLES), captured["sql"])
+        return response
+
+    def test_table(self):
+        # The session, the user, the game and the rows of the submissions table
+        response = self.get(f"?_table={self.prefix}", 4, estimated_counts=1)
+        self.assertContains(response, f'data-partial-table="{self.prefix}"')
+        self.assertNotContains(response, 'data-partial-table="table_0-"')
+        self.assertEqual(response.content.count(b"<tr"), 10)
+
+    def test_page(self):
+        # Sorted by another column than the keyset, the table is paginated by page number and counts its rows
+        self.get(f"?_table={self.prefix}&{self.prefix}sort=group&{self.prefix}page=1", 5)
+
+    def test_filter(self):
+        # The choices of the filter are counted in one query
+        response = self.get(f"?_filter={self.prefix}", 4)
+        self.assertNotContains(response, "<table")
+
+    def test_whole_page(self):
+        with self.assertNumQueries(9 if connection.vendor == "postgresql" else 8):
+            response = self.client.get(f"/games/{self.game.pk}")
+        for prefix in ("table_0-", "table_1-", self.prefix):
+            self.assertContains(response, f'data-partial-table="{prefix}"')
@@ -0,0 +1,63 @@
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.test import TestCase
+
+from ..models import Player
+from ..player_context import get_player_context
+from .utils import SharedCacheMixin, create_game
+
+
+class PlayerContextTest(TestCase):
+    def setUp(self):
+        self.game = create_game(groups=2, players=1)
+        self.player = Player.objects.get(username="game-a1")
+        self.group_a, self.group_b = self.game.groups.order_by("name")
+
+    def test_context(self):
+        context = get_player_context(self.player)
+        self.assertEqual(context.game, self.game)
+        self.assertEqual(context.group, self.group_a)
+        self.assertTrue(context.is_member(self.group_a.pk))
+
+    def test_not_cached_in_process_local_cache(self):
+        # The default LocMemCache of the tests isn't shared, each worker would keep its own stale contexts
+        with self.assertNumQueries(2):
+            get_player_context(self.player)
+        self.player.groups.remove(self.group_a)
+        self.player.groups.add(self.group_b)
+        with self.assertNumQueries(2):
+            self.assertEqual(get_player_context(self.player).group, self.group_b)
+
+
+class SharedCacheTest(SharedCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.game = create_game(groups=2, players=1)
+        self.player = Player.objects.get(username="game-a1")
+        self.group_a, self.group_b = self.game.groups.order_by("name")
+
+    def test_cached(self):
+        get_player_context(self.player)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_player_context(self.player).group, self.group_a)
+
+    def test_invalidated_by_groups(self):
+        get_player_context(self.player)
+        self.player.groups.remove(self.group_a)
+        self.player.groups.add(self.group_b)
+        self.assertEqual(get_player_context(self.player).group, self.group_b)
+
+    def test_invalidated_by_games(self):
+        get_player_context(self.player)
+        self.game.active = False
+        self.game.save()
+        self.assertIsNone(get_player_context(self.player).game)
+
+    def test_no_warning(self):
+        call_command("check", deploy=True, fail_level="WARNING", tags=["caches"])
+
+
+class SharedCacheCheckTest(TestCase):
+    def test_warning(self):
+        with self.assertRaisesMessage(SystemCheckError, "utilities.W001"):
+            call_command("check", deploy=True, fail_level="WARNING", tags=["caches"])
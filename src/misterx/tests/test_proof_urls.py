@@ -0,0 +1,63 @@
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from ..proof_urls import get_signature, has_valid_signature, sign_url
+
+NAME = "proofs/game/group/task/proof.jpeg"
+
+
+@override_settings(PROOF_URL_SECRET="secret", PROOF_URL_LIFETIME=60)
+class SignatureTest(SimpleTestCase):
+    def setUp(self):
+        self.path = settings.MEDIA_URL + NAME
+        self.url = sign_url(NAME, self.path)
+
+    def is_valid(self, url: str) -> bool:
+        return has_valid_signature(RequestFactory().get(url))
+
+    def test_valid(self):
+        self.assertTrue(self.is_valid(self.url))
+
+    def test_expired(self):
+        expires = int(time.time()) - 1
+        query = urlencode({"md5": get_signature(self.path, expires), "expires": expires})
+        self.assertFalse(self.is_valid(f"{self.path}?{query}"))
+
+    def test_modified_path(self):
+        self.assertFalse(self.is_valid(self.url.replace("proof.jpeg", "other.jpeg")))
+
+    def test_modified_expiry(self):
+        request = RequestFactory().get(self.url)
+        expires = int(request.GET["expires"]) + settings.PROOF_URL_LIFETIME
+        self.assertFalse(self.is_valid(f"{self.path}?{urlencode({'md5': request.GET['md5'], 'expires': expires})}"))
+
+    def test_modified_secret(self):
+        with self.settings(PROOF_URL_SECRET="other"):
+            self.assertFalse(self.is_valid(self.url))
+
+    def test_missing_signature(self):
+        request = RequestFactory().get(self.url)
+        for query in ({"expires": request.GET["expires"]}, {"md5": request.GET["md5"]}, {}):
+            with self.subTest(query):
+                self.assertFalse(self.is_valid(f"{self.path}?{urlencode(query)}"))
+
+
+@override_settings(PROOF_URL_SECRET="secret")
+class ServeSignedProofTest(TestCase):
+    def setUp(self):
+        self.url = sign_url(NAME, settings.MEDIA_URL + NAME)
+
+    def test_valid(self):
+        # Neither the session nor the upload are queried
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected_media/" + settings.MEDIA_URL + NAME)
+
+    def test_invalid(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url.replace("proof.jpeg", "other.jpeg"))
+        self.assertEqual(response.status_code, 403)
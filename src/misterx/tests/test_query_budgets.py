@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import urls
+from ..models import Player, Submission
+from .utils import SharedCacheMixin, create_game, create_staff, create_submission
+
+
+class QueryBudgetTest(SharedCacheMixin, TestCase):
+    """
+    The queries of the views with a query_budget, which must not depend on the number of related rows. Like in
+    production, the player contexts are cached in a shared cache.
+    """
+
+    groups = 2
+    players = 2
+    tasks = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.game = create_game(groups=cls.groups, players=cls.players, tasks=cls.tasks)
+        cls.staff = create_staff()
+        for group in cls.game.groups.all():
+            for task in cls.game.tasks.all():
+                create_submission(cls.game, group, task, accepted=True, explanation="Explanation")
+        cls.player = Player.objects.get(username="game-a1")
+        cls.submission = Submission.objects.filter(submitter=cls.player).first()
+
+    def assertQueryBudget(self, name, pk, user, num, estimated_counts=0):
+        view_class = next(pattern.callback.view_class for pattern in urls.urlpatterns if pattern.name == name)
+        # On PostgreSQL, tables paginated by keyset estimate their number of rows with EXPLAIN
+        if connection.vendor == "postgresql":
+            num += estimated_counts
+        self.assertLessEqual(num, view_class.query_budget)
+        self.client.force_login(user)
+        url = reverse(f"{urls.app_name}:{name}", kwargs={"pk": pk})
+        # Warm up caches, the budget applies to the usual case
+        self.client.get(url)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_all_views(self):
+        names = {
+            pattern.name
+            for pattern in urls.urlpatterns
+            if getattr(getattr(pattern.callback, "view_class", None), "query_budget", None) is not None
+        }
+        tested = {name.removeprefix("test_").replace("_", "-") for name in dir(self) if name.startswith("test_")}
+        self.assertLessEqual(names, tested)
+
+    def test_game_detail(self):
+        self.assertQueryBudget("game-detail", self.game.pk, self.staff, 8, estimated_counts=1)
+
+    def test_task_detail(self):
+        self.assertQueryBudget("task-detail", self.submission.task_id, self.staff, 6, estimated_counts=1)
+
+    def test_submission_detail(self):
+        self.assertQueryBudget("submission-detail", self.submission.pk, self.staff, 6, estimated_counts=1)
+
+    def test_player_detail(self):
+        self.assertQueryBudget("player-detail", self.player.pk, self.staff, 7)
+
+    def test_playergroup_detail(self):
+        self.assertQueryBudget("playergroup-detail", self.submission.group_id, self.staff, 8)
+
+    def test_user_submission_detail(self):
+        self.assertQueryBudget("user-submission-detail", self.submission.pk, self.player, 5)
+
+
+class LargerQueryBudgetTest(QueryBudgetTest):
+    groups = 4
+    players = 4
+    tasks = 6
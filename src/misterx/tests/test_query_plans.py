@@ -0,0 +1,53 @@
+import io
+import re
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..management.commands.check_query_plans import FULL_SCAN_PATTERNS, get_hot_queries
+from ..models import Game, Submission
+
+
+class QueryPlanTest(TestCase):
+    """
+    The frequent queries on submissions use indexes, see the check_query_plans command.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_game_data",
+            groups=10,
+            players=30,
+            tasks=40,
+            submissions=2000,
+            uploads=0,
+            active=True,
+            seed=1,
+            stdout=io.StringIO(),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.game = Game.objects.get(active=True)
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor == "postgresql":
+            # PostgreSQL prefers scanning the small tables of the tests, without sequential scans it only uses an index
+            # if one can serve the query
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+            self.addCleanup(self.reset_seqscan)
+
+    def reset_seqscan(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def test_no_full_scans(self):
+        pattern = re.compile(FULL_SCAN_PATTERNS[connection.vendor].format(table=Submission._meta.db_table))
+        submission = self.game.submissions.select_related("game", "group", "task").first()
+        for name, queryset in get_hot_queries(submission).items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertIsNone(pattern.search(plan), plan)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Submission
+from ..review_queue import claim_next_submission, claim_submission, release_submission
+from .utils import create_game, create_staff, create_submission
+
+
+class ReviewQueueTest(TestCase):
+    def setUp(self):
+        self.game = create_game(groups=1, players=1, tasks=3)
+        group = self.game.groups.get()
+        self.submissions = [create_submission(self.game, group, task) for task in self.game.tasks.order_by("pk")]
+        self.reviewer = create_staff("reviewer")
+        self.other = create_staff("other")
+
+    def test_claims_oldest(self):
+        submission = claim_next_submission(self.game, self.reviewer)
+        self.assertEqual(submission, self.submissions[0])
+        self.assertEqual(submission.reviewer, self.reviewer)
+        self.assertGreater(submission.lease_expires, timezone.now())
+
+    def test_keeps_held_submission(self):
+        claim_next_submission(self.game, self.reviewer, exclude=[self.submissions[0].pk])
+        self.assertEqual(claim_next_submission(self.game, self.reviewer), self.submissions[1])
+
+    def test_skips_leased(self):
+        claim_next_submission(self.game, self.reviewer)
+        self.assertEqual(claim_next_submission(self.game, self.other), self.submissions[1])
+        self.assertIsNone(claim_submission(self.submissions[0].pk, self.game, self.other))
+
+    def test_skips_reviewed(self):
+        self.submissions[0].accepted = True
+        self.submissions[0].save()
+        self.assertEqual(claim_next_submission(self.game, self.reviewer), self.submissions[1])
+
+    def test_expired_lease(self):
+        claim_next_submission(self.game, self.reviewer)
+        Submission.objects.filter(pk=self.submissions[0].pk).update(lease_expires=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_next_submission(self.game, self.other), self.submissions[0])
+
+    def test_release(self):
+        claim_next_submission(self.game, self.reviewer)
+        self.assertFalse(release_submission(self.submissions[0].pk, self.other))
+        self.assertTrue(release_submission(self.submissions[0].pk, self.reviewer))
+        self.assertEqual(claim_next_submission(self.game, self.other), self.submissions[0])
+
+    def test_empty_queue(self):
+        for submission in self.submissions:
+            claim_submission(submission.pk, self.game, self.other)
+        self.assertIsNone(claim_next_submission(self.game, self.reviewer))
+
+
+class SubmissionApproveViewTest(TestCase):
+    def setUp(self):
+        self.game = create_game(groups=1, players=1, tasks=2)
+        group = self.game.groups.get()
+        self.submissions = [create_submission(self.game, group, task) for task in self.game.tasks.order_by("pk")]
+        self.client.force_login(create_staff("reviewer"))
+        self.url = reverse("misterx:submission-approve")
+
+    def test_accept(self):
+        self.client.get(self.url)
+        response = self.client.post(self.url, {"submission": self.submissions[0].pk, "accept": "1", "feedback": ""})
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.submissions[0].refresh_from_db()
+        self.assertTrue(self.submissions[0].accepted)
+        self.assertIsNone(self.submissions[0].lease_expires)
+
+    def test_skip(self):
+        self.client.get(self.url)
+        self.client.post(self.url, {"submission": self.submissions[0].pk, "skip": "1"})
+        self.assertEqual(self.client.get(self.url).context["object"], self.submissions[1])
+
+    def test_invalid_submission(self):
+        for data in ({"accept": "1"}, {"submission": "", "skip": "1"}, {"submission": "abc", "accept": "1"}):
+            with self.subTest(data):
+                self.assertEqual(self.client.post(self.url, data).status_code, 400)
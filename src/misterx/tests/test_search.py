@@ -0,0 +1,46 @@
+import importlib
+
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Task
+from ..search import SEARCH_FIELDS, filter_contains, get_search_indexes, search
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bridge = Task.objects.create(task="Take a photo on the old bridge", points=10, solution="Any bridge")
+        cls.tower = Task.objects.create(task="Climb the tower", points=20, solution="Photo from the top")
+        cls.fountain = Task.objects.create(task="Drink from the fountain", points=5)
+
+    def test_filter_contains(self):
+        tasks = filter_contains(Task.objects.all(), "task", "PHOTO")
+        self.assertQuerySetEqual(tasks, [self.bridge])
+        self.assertQuerySetEqual(filter_contains(Task.objects.all(), "solution", "op"), [self.tower], ordered=False)
+
+    def test_search_matches_all_words(self):
+        self.assertEqual(search(Task.objects.all(), "photo bridge", 10), [self.bridge])
+        self.assertEqual({task.pk for task in search(Task.objects.all(), "photo", 10)}, {self.bridge.pk, self.tower.pk})
+        self.assertEqual(search(Task.objects.all(), "  ", 10), [])
+
+    def test_search_respects_queryset(self):
+        self.assertEqual(search(Task.objects.exclude(pk=self.bridge.pk), "bridge", 10), [])
+
+    def test_search_index_follows_changes(self):
+        self.fountain.task = "Drink from the well"
+        self.fountain.save()
+        self.assertEqual(search(Task.objects.all(), "fountain", 10), [])
+        self.assertEqual(search(Task.objects.all(), "well", 10), [self.fountain])
+
+
+class SearchIndexesTest(SimpleTestCase):
+    def test_indexes_of_migration(self):
+        # The migration has a copy of the indexes, a change of them needs a new migration
+        migration = importlib.import_module("misterx.migrations.0017_search")
+        for model, fields in SEARCH_FIELDS.items():
+            table = model._meta.db_table
+            with self.subTest(table):
+                self.assertEqual(
+                    [index.deconstruct() for index in migration.get_search_indexes(table, fields)],
+                    [index.deconstruct() for index in get_search_indexes(table, fields)],
+                )
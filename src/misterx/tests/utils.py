@@ -0,0 +1,55 @@
+import tempfile
+
+from django.contrib.auth.models import Permission
+from django.test import override_settings
+
+from ..models import Game, OrderedTask, Player, PlayerGroup, Submission, Task
+
+
+def create_game(name="Game", groups=2, players=2, tasks=3, active=True) -> Game:
+    """
+    A game with groups of players and numbered tasks. The players of a group are named after it, e.g. "A1".
+    """
+    game = Game.objects.create(name=name, active=active)
+    for number in range(1, tasks + 1):
+        task = Task.objects.create(task=f"{name} task {number}", points=number * 10, solution=f"Solution {number}")
+        OrderedTask.objects.create(game=game, task=task, task_number=number)
+    for index in range(groups):
+        group = PlayerGroup.objects.create(name=f"{name} {chr(ord('A') + index)}")
+        game.groups.add(group)
+        for number in range(1, players + 1):
+            player = Player.objects.create(username=f"{name}-{chr(ord('A') + index)}{number}".lower())
+            player.groups.add(group)
+    return game
+
+
+def create_staff(username="staff", *permissions: str) -> Player:
+    """
+    A staff member with the given permissions, e.g. "misterx.change_submission", or a superuser without any.
+    """
+    staff = Player.objects.create(username=username, is_staff=True, is_superuser=not permissions)
+    for permission in permissions:
+        app_label, codename = permission.split(".")
+        staff.user_permissions.add(Permission.objects.get(content_type__app_label=app_label, codename=codename))
+    return staff
+
+
+def create_submission(game: Game, group: PlayerGroup, task: Task, **kwargs) -> Submission:
+    submitter = Player.objects.filter(groups=group).first()
+    return Submission.objects.create(game=game, group=group, task=task, submitter=submitter, **kwargs)
+
+
+class SharedCacheMixin:
+    """
+    Uses a file based cache, which is shared by the processes of a host, instead of the LocMemCache of the tests.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory.name}}
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
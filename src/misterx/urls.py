@@ -4,12 +4,18 @@ from django.conf import settings
 from django.urls import path, re_path
 
 from .views import (
+    ChunkedUploadCreateView,
+    ChunkedUploadView,
+    GameCompletionView,
     GameCreateView,
     GameDeleteView,
     GameDetailView,
     GameEditView,
+    GameExportView,
+    GameLeaderboardView,
     GameListView,
     GameSubmissionCreateView,
+    ImportView,
     PlayerCreateView,
     PlayerDeleteView,
     PlayerDetailView,
@@ -20,17 +26,21 @@ from .views import (
     PlayerGroupEditView,
     PlayerGroupListView,
     PlayerListView,
+    SearchView,
     SubmissionApproveView,
     SubmissionCreateView,
     SubmissionDeleteView,
     SubmissionDetailView,
     SubmissionEditView,
+    SubmissionEventStreamView,
     SubmissionListView,
     TaskCreateView,
     TaskDeleteView,
     TaskDetailView,
     TaskEditView,
     TaskListView,
+    TaskSearchView,
+    UserEventStreamView,
     UserSubmissionDetailView,
     UserSubmissionListView,
     UserSubmissionView,
@@ -43,19 +53,26 @@ urlpatterns = [
     path("games/addsubmission", GameSubmissionCreateView.as_view(), name="game-submission-create"),
     path("games/create", GameCreateView.as_view(), name="game-create"),
     path("games/<slug:pk>", GameDetailView.as_view(), name="game-detail"),
+    path("games/<slug:pk>/completion", GameCompletionView.as_view(), name="game-completion"),
     path("games/<slug:pk>/edit", GameEditView.as_view(), name="game-edit"),
+    path("games/<slug:pk>/export/<slug:kind>.<slug:export_format>", GameExportView.as_view(), name="game-export"),
+    path("games/<slug:pk>/leaderboard", GameLeaderboardView.as_view(), name="game-leaderboard"),
     path("games/<slug:pk>/delete", GameDeleteView.as_view(), name="game-delete"),
     path("tasks/", TaskListView.as_view(), name="task-list"),
     path("tasks/create", TaskCreateView.as_view(), name="task-create"),
+    path("tasks/search", TaskSearchView.as_view(), name="task-search"),
     path("tasks/<slug:pk>", TaskDetailView.as_view(), name="task-detail"),
     path("tasks/<slug:pk>/edit", TaskEditView.as_view(), name="task-edit"),
     path("tasks/<slug:pk>/delete", TaskDeleteView.as_view(), name="task-delete"),
     path("submissions/", SubmissionListView.as_view(), name="submission-list"),
     path("submissions/approve", SubmissionApproveView.as_view(), name="submission-approve"),
+    path("submissions/events", SubmissionEventStreamView.as_view(), name="submission-events"),
     path("submissions/create", SubmissionCreateView.as_view(), name="submission-create"),
     path("submissions/<slug:pk>", SubmissionDetailView.as_view(), name="submission-detail"),
     path("submissions/<slug:pk>/edit", SubmissionEditView.as_view(), name="submission-edit"),
     path("submissions/<slug:pk>/delete", SubmissionDeleteView.as_view(), name="submission-delete"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("import/", ImportView.as_view(), name="import"),
     path("players/", PlayerListView.as_view(), name="player-list"),
     path("players/create", PlayerCreateView.as_view(), name="player-create"),
     path("players/<slug:pk>", PlayerDetailView.as_view(), name="player-detail"),
@@ -70,6 +87,9 @@ urlpatterns = [
     path("user/submit/", UserSubmissionView.as_view(), name="user-submission-create"),
     path("user/submissions/", UserSubmissionListView.as_view(), name="user-submission-list"),
     path("user/submissions/<slug:pk>", UserSubmissionDetailView.as_view(), name="user-submission-detail"),
+    path("user/events", UserEventStreamView.as_view(), name="user-events"),
+    path("user/uploads/", ChunkedUploadCreateView.as_view(), name="chunked-upload-create"),
+    path("user/uploads/<uuid:uuid>", ChunkedUploadView.as_view(), name="chunked-upload"),
     re_path(
         r"^{prefix}(?P<path>.*)$".format(prefix=re.escape(settings.MEDIA_URL.lstrip("/"))),
         serve_proofs,
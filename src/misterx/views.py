@@ -1,29 +1,58 @@
+import json
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.db import models
-from django.http import HttpResponse
-from django.shortcuts import render
-from django.urls import reverse_lazy
-from django.views.generic import DeleteView, DetailView, UpdateView
+from django.core.files import File
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, models, transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse, UnreadablePostError
+from django.shortcuts import redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from django.views.generic import DeleteView, DetailView, FormView, TemplateView, UpdateView
+from django.views.generic.detail import SingleObjectMixin
 from django.views.static import serve
 from django_filters.views import FilterView
 from django_tables2 import MultiTableMixin, SingleTableMixin
 from guardian.mixins import LoginRequiredMixin, PermissionListMixin, PermissionRequiredMixin
+from guardian.shortcuts import get_objects_for_user
+
+from utilities.views import (
+    AsyncLoginRequiredMixin,
+    InitialCreateView,
+    PartialTablesMixin,
+    SingleObjectCacheMixin,
+    aget_user,
+    stream_response,
+)
 
-from utilities.views import InitialCreateView
-
+from .chunked_uploads import (
+    ChecksumMismatch,
+    OffsetMismatch,
+    append_chunk,
+    delete_chunked_upload,
+    parse_checksum,
+)
+from .derivatives import get_original_name, is_file_of
+from .events import PLAYER_EVENTS, STAFF_EVENTS, stream_events
+from .exports import EXPORTS, FORMATS, export_game
 from .filters import (
     GameFilter,
     PlayerFilter,
     PlayerGroupFilter,
     SubmissionFilter,
     TaskFilter,
+    TaskSearchFilter,
     UserSubmissionFilter,
     UserTaskFilter,
 )
 from .forms import (
     GameForm,
     GameSubmissionForm,
+    ImportForm,
     PlayerForm,
     PlayerGroupForm,
     SubmissionApproveForm,
@@ -31,13 +60,20 @@ from .forms import (
     TaskForm,
     UserSubmissionForm,
 )
-from .models import Game, OrderedTask, Player, PlayerGroup, Submission, Task, Upload
+from .imports import ImportValidationError, import_file
+from .leaderboard import get_leaderboard, update_score, update_score_for_submission, update_scores_for_task
+from .models import ChunkedUpload, Game, OrderedTask, Player, PlayerGroup, Score, Submission, Task, Upload
+from .player_context import aget_player_context
+from .proof_urls import has_valid_signature
+from .review_queue import claim_next_submission, claim_submission, release_submission
+from .search import search
 from .tables import (
     GamePlayerGroupTable,
     GameTable,
     OrderedTaskTable,
     PlayerGroupTable,
     PlayerTable,
+    ScoreTable,
     SubmissionTable,
     TaskTable,
     UserSubmissionTable,
@@ -75,31 +111,18 @@ class GameEditView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     template_name = "generic/object_edit.html"
     form_class = GameForm
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        game = self.get_object()
-        selected_tasks = game.tasks.annotate(
-            task_number=models.Subquery(
-                OrderedTask.objects.filter(game=game, task__pk=models.OuterRef("pk")).values("task_number")
-            )
-        ).order_by("task_number")
-        unselected_tasks = Task.objects.exclude(pk__in=selected_tasks.values_list("pk", flat=True))
-        context.update(
-            {
-                "selected_tasks": selected_tasks,
-                "unselected_tasks": unselected_tasks,
-            }
-        )
-        return context
 
-
-class GameDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixin, DetailView):
+class GameDetailView(
+    LoginRequiredMixin, PermissionRequiredMixin, SingleObjectCacheMixin, PartialTablesMixin, MultiTableMixin, DetailView
+):
     model = Game
     permission_required = "misterx.view_game"
     tables = GamePlayerGroupTable, OrderedTaskTable, SubmissionTable
+    tables_template_name = "misterx/includes/game_tables.html"
+    query_budget = 12
 
     def get_tables_data(self):
-        game = self.get_object()
+        game = self.object
         groups = PlayerGroupFilter(self.request.GET, game.groups.all(), prefix="groups")
         tasks = TaskFilter(
             self.request.GET,
@@ -110,16 +133,73 @@ class GameDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixi
             ).order_by("task_number"),
             prefix="tasks",
         )
-        submissions = SubmissionFilter(self.request.GET, game.submissions.all(), prefix="submissions")
+        submissions = SubmissionFilter(
+            self.request.GET,
+            game.submissions.with_granted_points().select_related("group", "game", "task", "submitter"),
+            prefix="submissions",
+            game=game,
+        )
         self.filters = groups, tasks, submissions
         return groups.qs, tasks.qs, submissions.qs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context.update({"filters": self.filters})
+        context.update(
+            {
+                "filters": self.filters,
+                "export_kinds": [
+                    ("tasks", _("Tasks")),
+                    ("groups", _("Groups")),
+                    ("submissions", _("Submissions")),
+                    ("scores", _("Scores")),
+                ],
+            }
+        )
         return context
 
 
+class GameCompletionView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+    model = Game
+    permission_required = "misterx.view_game"
+    template_name = "misterx/game_completion.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        matrix = self.object.completion_matrix
+        groups = list(self.object.groups.order_by("name"))
+        ordered_tasks = OrderedTask.objects.filter(game=self.object).select_related("task")
+        rows = [
+            (ordered_task, [matrix.cell(ordered_task.task_id, group.pk) for group in groups]) for ordered_task in ordered_tasks
+        ]
+        context.update({"groups": groups, "rows": rows})
+        return context
+
+
+class GameLeaderboardView(LoginRequiredMixin, PermissionRequiredMixin, SingleTableMixin, DetailView):
+    model = Game
+    permission_required = "misterx.view_game"
+    table_class = ScoreTable
+    template_name = "misterx/game_leaderboard.html"
+    table_pagination = False
+
+    def get_table_data(self):
+        return get_leaderboard(self.object)
+
+
+class GameExportView(LoginRequiredMixin, PermissionRequiredMixin, SingleObjectMixin, View):
+    model = Game
+    permission_required = "misterx.view_game"
+
+    def get(self, request, *args, **kwargs):
+        kind, export_format = kwargs["kind"], kwargs["export_format"]
+        if kind not in EXPORTS or export_format not in FORMATS:
+            raise Http404
+        game = self.get_object()
+        response = StreamingHttpResponse(export_game(game, kind, export_format), content_type=FORMATS[export_format])
+        response["Content-Disposition"] = f'attachment; filename="game-{game.pk}-{kind}.{export_format}"'
+        return stream_response(request, response)
+
+
 class GameDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Game
     permission_required = "misterx.delete_game"
@@ -149,15 +229,31 @@ class TaskEditView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     template_name = "generic/object_edit.html"
     form_class = TaskForm
 
+    # Already awarded points only change when the points of the task are edited
+    def form_valid(self, form):
+        with transaction.atomic():
+            ret = super().form_valid(form)
+            if "points" in form.changed_data:
+                update_scores_for_task(self.object)
+        return ret
+
 
-class TaskDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixin, DetailView):
+class TaskDetailView(
+    LoginRequiredMixin, PermissionRequiredMixin, SingleObjectCacheMixin, PartialTablesMixin, MultiTableMixin, DetailView
+):
     model = Task
     permission_required = "misterx.view_task"
     tables = GameTable, SubmissionTable
+    tables_template_name = "misterx/includes/task_tables.html"
+    query_budget = 10
 
     def get_tables_data(self):
-        games = GameFilter(self.request.GET, self.get_object().games.all(), prefix="games")
-        submissions = SubmissionFilter(self.request.GET, self.get_object().submissions.all(), prefix="submissions")
+        games = GameFilter(self.request.GET, self.object.games.all(), prefix="games")
+        submissions = SubmissionFilter(
+            self.request.GET,
+            self.object.submissions.with_granted_points().select_related("group", "game", "task", "submitter"),
+            prefix="submissions",
+        )
         self.filters = games, submissions
         return games.qs, submissions.qs
 
@@ -167,20 +263,111 @@ class TaskDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixi
         return context
 
 
+class TaskSearchView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = "misterx.view_task"
+    permission_object = None
+    page_size = 50
+
+    def get(self, request, *args, **kwargs):
+        search = TaskSearchFilter(request.GET, Task.objects.order_by("pk"))
+        if not search.is_valid():
+            return JsonResponse({"errors": search.errors}, status=400)
+        tasks = list(search.qs.values("pk", "task", "points")[: self.page_size + 1])
+        has_next = len(tasks) > self.page_size
+        tasks = tasks[: self.page_size]
+        return JsonResponse({"results": tasks, "after": tasks[-1]["pk"] if has_next else None})
+
+
 class TaskDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Task
     permission_required = "misterx.delete_task"
     success_url = reverse_lazy("misterx:task-list")
     template_name = "generic/object_confirm_delete.html"
 
+    def form_valid(self, form):
+        affected = list(self.object.submissions.values_list("game", "group").distinct().order_by())
+        with transaction.atomic():
+            ret = super().form_valid(form)
+            for game_id, group_id in affected:
+                update_score(game_id, group_id)
+        return ret
+
 
-class SubmissionListView(LoginRequiredMixin, PermissionListMixin, SingleTableMixin, FilterView):
+class SearchView(LoginRequiredMixin, MultiTableMixin, TemplateView):
+    """
+    Search in the texts of tasks and submissions at once, best matches first. Only objects the user may view are shown.
+    """
+
+    template_name = "misterx/search.html"
+    tables = TaskTable, SubmissionTable
+    table_pagination = False
+    limit = 50
+
+    def get_tables_data(self):
+        query = self.request.GET.get("q", "")
+        tasks = get_objects_for_user(self.request.user, "misterx.view_task", Task)
+        submissions = get_objects_for_user(self.request.user, "misterx.view_submission", Submission)
+        submissions = submissions.with_granted_points().select_related("group", "game", "task", "submitter")
+        return search(tasks, query, self.limit), search(submissions, query, self.limit)
+
+    def get_tables(self):
+        tables = super().get_tables()
+        # Keep the order of the ranking
+        for table in tables:
+            table.orderable = False
+        return tables
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.request.GET.get("q", "")
+        return context
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+        return super().get(request, *args, **kwargs)
+
+
+class ImportView(LoginRequiredMixin, FormView):
+    """
+    Import of tasks, groups or players from a file. All problems of the file are shown at once, nothing is imported
+    until there are none.
+    """
+
+    form_class = ImportForm
+    template_name = "misterx/import.html"
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_staff:
+            raise PermissionDenied
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        file = form.cleaned_data["file"]
+        try:
+            result = import_file(form.cleaned_data["kind"], file, file.format)
+        except ImportValidationError as e:
+            return self.render_to_response(self.get_context_data(form=form, import_errors=e.errors))
+        # A new empty form for the next file
+        return self.render_to_response(self.get_context_data(form=self.form_class(user=self.request.user), result=result))
+
+
+class SubmissionListView(LoginRequiredMixin, PermissionListMixin, PartialTablesMixin, SingleTableMixin, FilterView):
     model = Submission
     permission_required = "misterx.view_submission"
     table_class = SubmissionTable
     template_name = "misterx/submission_list.html"
+    tables_template_name = "tables/list_table.html"
     filterset_class = SubmissionFilter
 
+    def get_queryset(self):
+        return super().get_queryset().with_granted_points().select_related("group", "game", "task", "submitter")
+
 
 class SubmissionCreateView(LoginRequiredMixin, PermissionRequiredMixin, InitialCreateView):
     model = Submission
@@ -189,6 +376,12 @@ class SubmissionCreateView(LoginRequiredMixin, PermissionRequiredMixin, InitialC
     template_name = "generic/object_create.html"
     form_class = SubmissionForm
 
+    def form_valid(self, form):
+        with transaction.atomic():
+            ret = super().form_valid(form)
+            update_score_for_submission(self.object)
+        return ret
+
 
 class GameSubmissionCreateView(SubmissionCreateView):
     form_class = GameSubmissionForm
@@ -200,18 +393,38 @@ class SubmissionEditView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView
     template_name = "generic/object_edit.html"
     form_class = SubmissionForm
 
+    def form_valid(self, form):
+        # The game, group or task might change, which also changes the score of the previous group
+        previous = Submission.objects.values_list("game", "group", "task").get(pk=self.object.pk)
+        with transaction.atomic():
+            ret = super().form_valid(form)
+            update_score_for_submission(self.object)
+            if previous != (self.object.game_id, self.object.group_id, self.object.task_id):
+                update_score(previous[0], previous[1], [previous[2]])
+        return ret
+
 
-class SubmissionDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixin, DetailView):
+class SubmissionDetailView(
+    LoginRequiredMixin, PermissionRequiredMixin, SingleObjectCacheMixin, PartialTablesMixin, MultiTableMixin, DetailView
+):
     model = Submission
     permission_required = "misterx.view_submission"
     tables = SubmissionTable, SubmissionTable
+    tables_template_name = "misterx/includes/submission_tables.html"
+    select_related = "group", "game", "task", "submitter"
+    prefetch_related = ("proofs",)
+    query_budget = 12
+
+    def get_queryset(self):
+        return super().get_queryset().with_granted_points()
 
     def get_tables_data(self):
-        obj = self.get_object()
-        own_submissions = Submission.objects.filter(game=obj.game, task=obj.task, group=obj.group).exclude(pk=obj.pk)
-        other_submissions = Submission.objects.filter(game=obj.game, task=obj.task).exclude(group=obj.group)
-        own_submissions_filter = SubmissionFilter(self.request.GET, own_submissions, prefix="own")
-        other_submissions_filter = SubmissionFilter(self.request.GET, other_submissions, prefix="other")
+        obj = self.object
+        submissions = Submission.objects.with_granted_points().select_related("group", "game", "task", "submitter")
+        own_submissions = submissions.filter(game=obj.game, task=obj.task, group=obj.group).exclude(pk=obj.pk)
+        other_submissions = submissions.filter(game=obj.game, task=obj.task).exclude(group=obj.group)
+        own_submissions_filter = SubmissionFilter(self.request.GET, own_submissions, prefix="own", game=obj.game_id)
+        other_submissions_filter = SubmissionFilter(self.request.GET, other_submissions, prefix="other", game=obj.game_id)
         self.filters = own_submissions_filter, other_submissions_filter
         return own_submissions_filter.qs, other_submissions_filter.qs
 
@@ -221,38 +434,52 @@ class SubmissionDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTab
         return context
 
 
-class SubmissionApproveView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixin, UpdateView):
+class SubmissionApproveView(LoginRequiredMixin, PermissionRequiredMixin, PartialTablesMixin, MultiTableMixin, UpdateView):
     model = Submission
     form_class = SubmissionApproveForm
     permission_required = "misterx.change_submission"
     permission_object = None
     template_name = "misterx/submission_approve.html"
     tables = SubmissionTable, SubmissionTable
+    tables_template_name = "misterx/includes/submission_tables.html"
+
+    skipped_session_key = "misterx_skipped_submissions"
 
     def get_tables_data(self):
-        obj = self.get_object()
-        own_submissions = Submission.objects.filter(game=obj.game, task=obj.task, group=obj.group).exclude(pk=obj.pk)
-        other_submissions = Submission.objects.filter(game=obj.game, task=obj.task).exclude(group=obj.group)
-        own_submissions_filter = SubmissionFilter(self.request.GET, own_submissions, prefix="own")
-        other_submissions_filter = SubmissionFilter(self.request.GET, other_submissions, prefix="other")
+        # The object is already claimed, don't claim it again
+        obj = self.object
+        submissions = Submission.objects.with_granted_points().select_related("group", "game", "task", "submitter")
+        own_submissions = submissions.filter(game=obj.game, task=obj.task, group=obj.group).exclude(pk=obj.pk)
+        other_submissions = submissions.filter(game=obj.game, task=obj.task).exclude(group=obj.group)
+        own_submissions_filter = SubmissionFilter(self.request.GET, own_submissions, prefix="own", game=obj.game_id)
+        other_submissions_filter = SubmissionFilter(self.request.GET, other_submissions, prefix="other", game=obj.game_id)
         self.filters = own_submissions_filter, other_submissions_filter
         return own_submissions_filter.qs, other_submissions_filter.qs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context.update({"filters": self.filters})
+        context["filters"] = self.filters
+        # Only shown on the whole page
+        if not any(self.get_partial()):
+            context["queue_depth"] = Submission.objects.filter(game=self.object.game_id, accepted=None).count()
         return context
 
+    # Claim a submission with a lease, so concurrent reviewers get different submissions
     def get_object(self, queryset=None):
         try:
             game = Game.objects.get(active=True)
         except ObjectDoesNotExist:
             raise NoActiveGameError()
 
-        if queryset is None:
-            queryset = self.get_queryset()
-
-        obj = queryset.filter(game=game, accepted=None).first()
+        if self.request.method == "POST":
+            obj = claim_submission(self.submission_pk, game, self.request.user)
+        else:
+            skipped = self.request.session.get(self.skipped_session_key, [])
+            obj = claim_next_submission(game, self.request.user, exclude=skipped)
+            # Start over with the skipped submissions once nothing else is left
+            if obj is None and skipped:
+                self.request.session[self.skipped_session_key] = []
+                obj = claim_next_submission(game, self.request.user)
         if obj is None:
             raise NoUnreviewedSubmissions
         return obj
@@ -266,6 +493,29 @@ class SubmissionApproveView(LoginRequiredMixin, PermissionRequiredMixin, MultiTa
             resp = render(request, "misterx/no_unreviewed_submissions.html")
         return resp
 
+    def post(self, request, *args, **kwargs):
+        # The hidden field of the form, which identifies the claimed submission
+        try:
+            self.submission_pk = int(request.POST["submission"])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest(_("The submission is missing or invalid."))
+        if request.POST.get("skip") or request.POST.get("release"):
+            release_submission(self.submission_pk, request.user)
+            if request.POST.get("release"):
+                return redirect("misterx:game-list")
+            skipped = request.session.get(self.skipped_session_key, [])
+            request.session[self.skipped_session_key] = [*skipped, self.submission_pk]
+            return redirect("misterx:submission-approve")
+
+        try:
+            resp = super().post(request, *args, **kwargs)
+        except NoActiveGameError:
+            resp = render(request, "misterx/no_active_game.html")
+        except NoUnreviewedSubmissions:
+            # The submission was reviewed by someone else while the lease was expired
+            resp = redirect("misterx:submission-approve")
+        return resp
+
     # Cycle back to the same view every time
     def get_success_url(self):
         return reverse_lazy("misterx:submission-approve")
@@ -276,8 +526,13 @@ class SubmissionApproveView(LoginRequiredMixin, PermissionRequiredMixin, MultiTa
             form.instance.accepted = False
         if self.request.POST.get("accept"):
             form.instance.accepted = True
+        # Keep the reviewer, but end the lease
+        form.instance.lease_expires = None
 
-        return super().form_valid(form)
+        with transaction.atomic():
+            ret = super().form_valid(form)
+            update_score_for_submission(self.object)
+        return ret
 
 
 class SubmissionDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
@@ -286,6 +541,13 @@ class SubmissionDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteVi
     success_url = reverse_lazy("misterx:submission-list")
     template_name = "generic/object_confirm_delete.html"
 
+    def form_valid(self, form):
+        submission = self.object
+        with transaction.atomic():
+            ret = super().form_valid(form)
+            update_score_for_submission(submission)
+        return ret
+
 
 class PlayerListView(LoginRequiredMixin, PermissionListMixin, SingleTableMixin, FilterView):
     model = Player
@@ -310,13 +572,17 @@ class PlayerEditView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     form_class = PlayerForm
 
 
-class PlayerDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixin, DetailView):
+class PlayerDetailView(
+    LoginRequiredMixin, PermissionRequiredMixin, SingleObjectCacheMixin, PartialTablesMixin, MultiTableMixin, DetailView
+):
     model = Player
     permission_required = "auth.view_user"
     tables = PlayerGroupTable, GameTable
+    tables_template_name = "misterx/includes/player_tables.html"
+    query_budget = 8
 
     def get_tables_data(self):
-        groups = PlayerGroupFilter(self.request.GET, self.get_object().groups.all(), prefix="groups")
+        groups = PlayerGroupFilter(self.request.GET, self.object.groups.all(), prefix="groups")
         games = GameFilter(self.request.GET, Game.objects.filter(groups__in=groups.qs), prefix="games")
         self.filters = groups, games
         return groups.qs, games.qs
@@ -357,14 +623,19 @@ class PlayerGroupEditView(LoginRequiredMixin, PermissionRequiredMixin, UpdateVie
     form_class = PlayerGroupForm
 
 
-class PlayerGroupDetailView(LoginRequiredMixin, PermissionRequiredMixin, MultiTableMixin, DetailView):
+class PlayerGroupDetailView(
+    LoginRequiredMixin, PermissionRequiredMixin, SingleObjectCacheMixin, PartialTablesMixin, MultiTableMixin, DetailView
+):
     model = PlayerGroup
     permission_required = "auth.view_group"
     tables = PlayerTable, GameTable
+    tables_template_name = "misterx/includes/playergroup_tables.html"
+    prefetch_related = ("user_set",)
+    query_budget = 10
 
     def get_tables_data(self):
-        users = PlayerFilter(self.request.GET, self.get_object().user_set.all(), prefix="player")
-        games = GameFilter(self.request.GET, self.get_object().games.all(), prefix="games")
+        users = PlayerFilter(self.request.GET, self.object.user_set.all(), prefix="player")
+        games = GameFilter(self.request.GET, self.object.games.all(), prefix="games")
         self.filters = users, games
         return users.qs, games.qs
 
@@ -381,19 +652,22 @@ class PlayerGroupDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteV
     template_name = "generic/object_confirm_delete.html"
 
 
-class UserSubmissionView(LoginRequiredMixin, InitialCreateView):
+class ActiveGameMixin:
+    def get_player_context(self):
+        context = self.request.player_context
+        if context.game is None:
+            raise NoActiveGameError()
+        return context
+
+
+class UserSubmissionView(LoginRequiredMixin, ActiveGameMixin, InitialCreateView):
     model = Submission
     template_name = "generic/object_create.html"
     form_class = UserSubmissionForm
 
     def get_initial(self):
         initial = super().get_initial()
-        groups = self.request.user.groups.all()
-        try:
-            game = Game.objects.filter(groups__in=groups).get(active=True)
-        except ObjectDoesNotExist:
-            raise NoActiveGameError()
-        group = game.groups.intersection(groups).first()
+        game, group, _groups = self.get_player_context()
         initial.update({"game": game.pk, "submitter": self.request.user.pk, "group": group.pk})
         return initial
 
@@ -411,26 +685,32 @@ class UserSubmissionView(LoginRequiredMixin, InitialCreateView):
         ret = super().form_valid(form)
         for file in form.cleaned_data["proof"]:
             Upload.objects.create(submission=self.object, file=file)
+        for chunked_upload in form.cleaned_data["uploads"]:
+            with chunked_upload.path.open("rb") as f:
+                Upload.objects.create(submission=self.object, file=File(f, name=chunked_upload.filename))
+            delete_chunked_upload(chunked_upload)
         return ret
 
 
-class UserSubmissionListView(LoginRequiredMixin, SingleTableMixin, FilterView):
+class UserSubmissionListView(LoginRequiredMixin, ActiveGameMixin, PartialTablesMixin, SingleTableMixin, FilterView):
     model = Submission
     table_class = UserSubmissionTable
     template_name = "misterx/user_submission_list.html"
+    tables_template_name = "tables/list_table.html"
     filterset_class = UserSubmissionFilter
 
     def get_queryset(self):
-        groups = self.request.user.groups.all()
-        try:
-            game = Game.objects.filter(groups__in=groups).get(active=True)
-        except ObjectDoesNotExist:
-            raise NoActiveGameError()
-        group = game.groups.intersection(groups).first()
-        qs = super().get_queryset()
+        game, group, _groups = self.get_player_context()
+        qs = super().get_queryset().with_granted_points().select_related("task", "submitter", "group")
         qs = qs.filter(game=game, group=group)
         return qs
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        game, group, _groups = self.get_player_context()
+        context["score"] = Score.objects.filter(game=game, group=group).values_list("points", flat=True).first() or 0
+        return context
+
     def get(self, request, *args, **kwargs):
         try:
             resp = super().get(request, *args, **kwargs)
@@ -439,15 +719,26 @@ class UserSubmissionListView(LoginRequiredMixin, SingleTableMixin, FilterView):
         return resp
 
 
-class UserSubmissionDetailView(LoginRequiredMixin, SingleTableMixin, DetailView):
+class UserSubmissionDetailView(LoginRequiredMixin, SingleObjectCacheMixin, SingleTableMixin, DetailView):
     model = Submission
     table_class = UserSubmissionTable
     template_name = "misterx/user_submission_detail.html"
+    select_related = ("group", "task")
+    prefetch_related = ("proofs",)
+    query_budget = 7
+
+    def get_queryset(self):
+        return super().get_queryset().with_granted_points()
 
     def get_table_data(self):
-        obj = self.get_object()
-        own_submissions = Submission.objects.filter(game=obj.game, task=obj.task, group=obj.group).exclude(pk=obj.pk)
-        own_submissions_filter = UserSubmissionFilter(self.request.GET, own_submissions, prefix="own")
+        obj = self.object
+        own_submissions = (
+            Submission.objects.with_granted_points()
+            .select_related("group", "task", "submitter")
+            .filter(game=obj.game_id, task=obj.task_id, group=obj.group_id)
+            .exclude(pk=obj.pk)
+        )
+        own_submissions_filter = UserSubmissionFilter(self.request.GET, own_submissions, prefix="own", game=obj.game_id)
         self.filter = own_submissions_filter
         return own_submissions_filter.qs
 
@@ -457,24 +748,19 @@ class UserSubmissionDetailView(LoginRequiredMixin, SingleTableMixin, DetailView)
         return context
 
     def get(self, request, *args, **kwargs):
-        if self.get_object().group not in self.request.user.groups.all():
+        if not request.player_context.is_member(self.get_object().group_id):
             raise PermissionDenied("You are not in the group of this Submission")
         return super().get(request, *args, **kwargs)
 
 
-class UserTaskListView(LoginRequiredMixin, SingleTableMixin, FilterView):
+class UserTaskListView(LoginRequiredMixin, ActiveGameMixin, SingleTableMixin, FilterView):
     model = Task
     table_class = UserTaskTable
     template_name = "misterx/task_list.html"
     filterset_class = UserTaskFilter
 
     def get_queryset(self):
-        groups = self.request.user.groups.all()
-        try:
-            game = Game.objects.filter(groups__in=groups).get(active=True)
-        except ObjectDoesNotExist:
-            raise NoActiveGameError()
-        group = game.groups.intersection(groups).first()
+        game, group, _groups = self.get_player_context()
         qs = (
             super()
             .get_queryset()
@@ -501,32 +787,180 @@ class UserTaskListView(LoginRequiredMixin, SingleTableMixin, FilterView):
         return resp
 
 
-def serve_proofs(request, *args, **kwargs):
-    user = request.user
-    if user.is_authenticated:
-        # Fetch upload object for the file
+class EventStreamView(AsyncLoginRequiredMixin, View, ABC):
+    """
+    Server-sent events for the pages that update in place. Without an active game, the stream answers with 204, which
+    stops the browser from reconnecting. Under WSGI, it always answers with 204, as a stream would occupy a worker for
+    its whole duration, and the pages poll their tables instead.
+
+    Subclasses set the event_types to send and implement get_stream_scope.
+    """
+
+    event_types = frozenset()
+
+    @abstractmethod
+    def get_stream_scope(self) -> tuple[int, int | None]:
+        """
+        The game and the group, or None for all groups, whose events are sent. Runs in a thread, so it can query the
+        database, and raises NoActiveGameError or PermissionDenied if there is nothing to stream.
+        """
+
+    def resolve_stream_scope(self) -> tuple[int, int | None]:
         try:
-            upload = Upload.objects.get(file=request.path.removeprefix(settings.MEDIA_URL))
-        except ObjectDoesNotExist:
+            return self.get_stream_scope()
+        finally:
+            # The stream needs no database connection, don't keep the one of the request open for its whole duration.
+            # A connection in a transaction, e.g. of a test, is left alone.
+            if not connection.in_atomic_block:
+                connection.close()
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        try:
+            game_id, group_id = await sync_to_async(self.resolve_stream_scope)()
+        except NoActiveGameError:
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(stream_events(self.event_types, game_id, group_id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Keep nginx from buffering the events
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class SubmissionEventStreamView(EventStreamView):
+    event_types = STAFF_EVENTS
+
+    def get_stream_scope(self):
+        if not self.request.user.has_perm("misterx.change_submission"):
+            raise PermissionDenied()
+        game_id = Game.objects.filter(active=True).values_list("pk", flat=True).first()
+        if game_id is None:
+            raise NoActiveGameError()
+        return game_id, None
+
+
+class UserEventStreamView(ActiveGameMixin, EventStreamView):
+    event_types = PLAYER_EVENTS
+
+    def get_stream_scope(self):
+        game, group, _groups = self.get_player_context()
+        return game.pk, group.pk
+
+
+# The upload views are async, so under ASGI slow clients don't occupy a worker thread while their chunks arrive. The file
+# operations run in a thread of their own.
+class ChunkedUploadCreateView(AsyncLoginRequiredMixin, View):
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+            size = int(data["size"])
+            parse_checksum(data["checksum"])
+            filename = str(data["filename"])[:255]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": _("Invalid upload")}, status=400)
+        if not 0 < size <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            return JsonResponse({"error": _("The file is too large")}, status=413)
+
+        user = await aget_user(request)
+        upload = await ChunkedUpload.objects.acreate(user_id=user.pk, filename=filename, size=size, checksum=data["checksum"])
+        return chunked_upload_response(upload, status=201)
+
+
+class ChunkedUploadView(AsyncLoginRequiredMixin, View):
+    async def get_object(self):
+        user = await aget_user(self.request)
+        try:
+            return await ChunkedUpload.objects.aget(uuid=self.kwargs["uuid"], user_id=user.pk)
+        except ChunkedUpload.DoesNotExist:
+            raise Http404()
+
+    async def head(self, request, *args, **kwargs):
+        return chunked_upload_response(await self.get_object())
+
+    async def get(self, request, *args, **kwargs):
+        return chunked_upload_response(await self.get_object())
+
+    async def patch(self, request, *args, **kwargs):
+        upload = await self.get_object()
+        if upload.completed:
+            return chunked_upload_response(upload)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            await sync_to_async(append_chunk)(upload, offset, request)
+        except (KeyError, ValueError):
+            return JsonResponse({"error": _("The Upload-Offset header is missing")}, status=400)
+        except OffsetMismatch:
+            return chunked_upload_response(upload, status=409)
+        except UnreadablePostError:
+            return chunked_upload_response(upload, status=400)
+        except ChecksumMismatch:
+            return JsonResponse({"error": _("The checksum doesn't match, upload the file again")}, status=422)
+        return chunked_upload_response(upload)
+
+    async def delete(self, request, *args, **kwargs):
+        await sync_to_async(delete_chunked_upload)(await self.get_object())
+        return HttpResponse(status=204)
+
+
+def chunked_upload_response(upload, status=200):
+    response = JsonResponse(
+        {
+            "id": upload.uuid,
+            "url": reverse("misterx:chunked-upload", kwargs={"uuid": upload.uuid}),
+            "offset": upload.offset,
+            "size": upload.size,
+            "completed": upload.completed,
+        },
+        status=status,
+    )
+    response["Upload-Offset"] = upload.offset
+    return response
+
+
+async def serve_proof_file(request, content_type, *args, **kwargs):
+    if settings.DEBUG:
+        response = await sync_to_async(serve)(request, *args, **kwargs)
+        return stream_response(request, response) if response.streaming else response
+    else:
+        response = HttpResponse()
+        response["Content-Type"] = content_type
+        response["X-Accel-Redirect"] = "/protected_media/" + request.path
+        return response
+
+
+# Async, so checking access to proofs doesn't need a worker thread under ASGI
+async def serve_proofs(request, *args, **kwargs):
+    # Signed URLs have been handed out to authorized users only, so checking the signature is enough
+    # and doesn't need any database queries
+    if settings.PROOF_URL_SECRET and "md5" in request.GET:
+        if not has_valid_signature(request):
             return HttpResponse(status=403)
+        return await serve_proof_file(request, "", *args, **kwargs)
+
+    user = await aget_user(request)
+    if user.is_authenticated:
+        # Fetch upload object for the file, the file path is indexed. Derivatives are authorized through the original
+        # upload that records them
+        name = request.path.removeprefix(settings.MEDIA_URL)
+        candidates = Upload.objects.values("file", "derivatives", "mime_type", "submission__group").filter(
+            file__in={name, get_original_name(name)}
+        )
+        uploads = [upload async for upload in candidates if is_file_of(upload, name)]
+        if not uploads:
+            return HttpResponse(status=403)
+        upload = uploads[0]
 
         # Check if user is in the group of the submission or if they are staff
         # Otherwise return 403
-        allowed_group = upload.submission.group
-        if allowed_group in user.groups.all():
+        if user.is_staff:
             pass
-        elif user.is_staff:
+        elif (await aget_player_context(user)).is_member(upload["submission__group"]):
             pass
         else:
             return HttpResponse(status=403)
 
         # Finally, serve the file
-        if settings.DEBUG:
-            return serve(request, *args, **kwargs)
-        else:
-            response = HttpResponse()
-            response["Content-Type"] = ""
-            response["X-Accel-Redirect"] = "/protected_media/" + request.path
-            return response
+        return await serve_proof_file(request, upload["mime_type"], *args, **kwargs)
     else:
         return HttpResponse(status=403)
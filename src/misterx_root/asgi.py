@@ -0,0 +1,23 @@
+"""
+ASGI config for misterx_root project.
+
+It exposes the ASGI callable as a module-level variable named ``application``. Run it with an ASGI server, e.g.
+``uvicorn misterx_root.asgi:application``. The server receives request bodies without a worker thread, so slow
+uploads only occupy a thread for the short time it takes to store them. Most views stay sync and run in a thread pool,
+the upload, proof and event stream views are async.
+
+Django reads a sync iterator of a streaming response completely before sending any of it under ASGI. Streaming
+responses therefore have async iterators: the event streams are async generators, and the exports and files are read
+piece by piece in a thread with utilities.views.stream_response().
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "misterx_root.settings")
+
+application = get_asgi_application()
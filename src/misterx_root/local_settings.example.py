@@ -34,6 +34,20 @@ DATABASE = {
     "CONN_MAX_AGE": 300,
 }
 
+# Cache shared by all workers, needed for the cached player contexts and filter choices
+# CACHES = {
+#     "default": {
+#         "BACKEND": "django.core.cache.backends.redis.RedisCache",
+#         "LOCATION": "redis://127.0.0.1:6379",
+#     }
+# }
+
+# Secret for signing proof URLs, these can be checked by nginx directly, see misterx/proof_urls.py
+# PROOF_URL_SECRET = ""
+
+# Token for scraping /metrics with Prometheus, sent as "Authorization: Bearer <token>"
+# METRICS_TOKEN = ""
+
 TIME_ZONE = "UTC"
 
 SOCIAL_AUTH_OIDC_OIDC_ENDPOINT = None
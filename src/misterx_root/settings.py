@@ -55,6 +55,8 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    # The search indexes of misterx/search.py, only used on PostgreSQL
+    "django.contrib.postgres",
     "django.forms",
     "debug_toolbar",
     "django_filters",
@@ -68,11 +70,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utilities.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "misterx.player_context.PlayerContextMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -103,6 +107,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "misterx_root.wsgi.application"
 
+ASGI_APPLICATION = "misterx_root.asgi.application"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -110,6 +116,18 @@ WSGI_APPLICATION = "misterx_root.wsgi.application"
 DATABASES = {"default": local_settings.DATABASE}
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Use a cache shared by all workers in production. Data invalidated by signals, the player contexts and the filter
+# choices, isn't cached with a cache of each process like LocMemCache, see utilities/cache.py
+
+CACHES = getattr(
+    local_settings,
+    "CACHES",
+    {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -215,6 +233,37 @@ DEFAULT_ALLOWED_UPLOADS = (
 )
 ALLOWED_UPLOADS = getattr(local_settings, "ALLOWED_UPLOADS", DEFAULT_ALLOWED_UPLOADS)
 
+# Embed signed and expiring URLs for proofs, which can be checked without database queries, see misterx/proof_urls.py
+PROOF_URL_SECRET = getattr(local_settings, "PROOF_URL_SECRET", None)
+PROOF_URL_LIFETIME = getattr(local_settings, "PROOF_URL_LIFETIME", 60 * 60)
+
+# Generate smaller versions of uploaded images in the background, requires Pillow. Under uWSGI, threads have to be
+# enabled with --enable-threads, otherwise they are generated during the upload request
+PROOF_DERIVATIVES = getattr(local_settings, "PROOF_DERIVATIVES", True)
+
+# Resumable uploads are assembled here before being attached to a submission
+CHUNKED_UPLOAD_ROOT = getattr(local_settings, "CHUNKED_UPLOAD_ROOT", BASE_DIR / "chunked_uploads")
+CHUNKED_UPLOAD_MAX_SIZE = getattr(local_settings, "CHUNKED_UPLOAD_MAX_SIZE", 1024 * 1024 * 1024)
+
+# Request metrics, written to METRICS_DIR by every worker and served at /metrics, see utilities/metrics.py. Workers
+# sharing METRICS_DIR have to run on the same host
+METRICS_ENABLED = getattr(local_settings, "METRICS_ENABLED", True)
+METRICS_DIR = getattr(local_settings, "METRICS_DIR", BASE_DIR / "metrics")
+METRICS_FLUSH_INTERVAL = getattr(local_settings, "METRICS_FLUSH_INTERVAL", 10)
+# Allows scraping the metrics with "Authorization: Bearer <token>" besides logging in as staff
+METRICS_TOKEN = getattr(local_settings, "METRICS_TOKEN", None)
+
+# Server-sent events for pages that update in place, see misterx/events.py. They are only served under ASGI, a stream
+# ends after EVENT_STREAM_DURATION seconds and the browser reconnects after EVENT_STREAM_RETRY seconds. Under WSGI,
+# the pages refresh their tables every EVENT_POLL_INTERVAL seconds instead.
+EVENT_STREAM_DURATION = getattr(local_settings, "EVENT_STREAM_DURATION", 10 * 60)
+EVENT_STREAM_HEARTBEAT = getattr(local_settings, "EVENT_STREAM_HEARTBEAT", 15)
+EVENT_STREAM_RETRY = getattr(local_settings, "EVENT_STREAM_RETRY", 5)
+EVENT_POLL_INTERVAL = getattr(local_settings, "EVENT_POLL_INTERVAL", 30)
+
+# How long a reviewer may keep a submission claimed before it is handed to other reviewers
+REVIEW_LEASE_SECONDS = getattr(local_settings, "REVIEW_LEASE_SECONDS", 5 * 60)
+
 if email_config := getattr(local_settings, "EMAIL_CONFIG", None):
     EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
     EMAIL_HOST = email_config.get("host", None)
@@ -0,0 +1,137 @@
+// Uploads the proofs of a submission in resumable chunks. After a dropped connection, the server is asked how many
+// bytes it has received and only the missing bytes are sent again.
+const CHUNK_SIZE = 5 * 1024 * 1024;
+const MAX_RETRIES = 8;
+
+const CRC32_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+            c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+async function crc32(file) {
+    let crc = 0xffffffff;
+    for (let start = 0; start < file.size; start += CHUNK_SIZE) {
+        const bytes = new Uint8Array(await file.slice(start, start + CHUNK_SIZE).arrayBuffer());
+        for (let i = 0; i < bytes.length; i++) {
+            crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+        }
+    }
+    return ((crc ^ 0xffffffff) >>> 0).toString(16).padStart(8, "0");
+}
+
+function getCsrfToken(form) {
+    return form.querySelector("input[name=csrfmiddlewaretoken]").value;
+}
+
+function sleep(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+async function request(url, options) {
+    const response = await fetch(url, options);
+    if (!response.ok && response.status !== 409) {
+        const error = new Error(response.statusText);
+        error.status = response.status;
+        throw error;
+    }
+    return response.json();
+}
+
+async function createUpload(form, createUrl, file) {
+    // Resume an upload of the same file that was interrupted before, e.g. by reloading the page
+    const key = `misterx_upload:${file.name}:${file.size}:${file.lastModified}`;
+    const saved = localStorage.getItem(key);
+    if (saved) {
+        try {
+            return [key, await request(saved, {method: "GET"})];
+        } catch (error) {
+            localStorage.removeItem(key);
+        }
+    }
+    const upload = await request(createUrl, {
+        method: "POST",
+        headers: {"Content-Type": "application/json", "X-CSRFToken": getCsrfToken(form)},
+        body: JSON.stringify({filename: file.name, size: file.size, checksum: `crc32:${await crc32(file)}`}),
+    });
+    localStorage.setItem(key, upload.url);
+    return [key, upload];
+}
+
+async function sendFile(form, createUrl, file, progress) {
+    let [key, upload] = await createUpload(form, createUrl, file);
+    let retries = 0;
+    while (!upload.completed) {
+        progress(upload.offset / upload.size);
+        try {
+            upload = await request(upload.url, {
+                method: "PATCH",
+                headers: {
+                    "Content-Type": "application/offset+octet-stream",
+                    "Upload-Offset": upload.offset,
+                    "X-CSRFToken": getCsrfToken(form),
+                },
+                body: file.slice(upload.offset, upload.offset + CHUNK_SIZE),
+            });
+            retries = 0;
+        } catch (error) {
+            if (error.status && error.status < 500 || ++retries > MAX_RETRIES) {
+                localStorage.removeItem(key);
+                throw error;
+            }
+            await sleep(Math.min(1000 * 2 ** retries, 30000));
+            // Ask how much of the chunk arrived before the connection dropped
+            upload = await request(upload.url, {method: "GET"}).catch(() => upload);
+        }
+    }
+    localStorage.removeItem(key);
+    progress(1);
+    return upload.id;
+}
+
+function setupChunkedUpload(input) {
+    const form = input.form;
+    const uploadsInput = document.getElementById(input.dataset.chunkedUploadInput);
+    const progressBar = document.createElement("progress");
+    progressBar.className = "form-control mt-2 d-none";
+    progressBar.max = 1;
+    input.after(progressBar);
+
+    form.addEventListener("submit", async (event) => {
+        if (!input.files.length || !window.fetch) {
+            return;
+        }
+        event.preventDefault();
+        const buttons = form.querySelectorAll("[type=submit]");
+        buttons.forEach((button) => (button.disabled = true));
+        progressBar.classList.remove("d-none");
+
+        const files = Array.from(input.files);
+        const ids = [];
+        try {
+            for (const [index, file] of files.entries()) {
+                ids.push(await sendFile(form, input.dataset.chunkedUpload, file, (fraction) => {
+                    progressBar.value = (index + fraction) / files.length;
+                }));
+            }
+        } catch (error) {
+            buttons.forEach((button) => (button.disabled = false));
+            progressBar.classList.add("d-none");
+            alert(`Upload failed: ${error.message}`);
+            return;
+        }
+        uploadsInput.value = ids.join(",");
+        input.value = "";
+        form.submit();
+    });
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("input[type=file][data-chunked-upload]").forEach(setupChunkedUpload);
+});
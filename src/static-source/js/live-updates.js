@@ -0,0 +1,96 @@
+// Keeps a page up to date with server-sent events instead of reloading it. Configured on the script element:
+// data-event-stream: URL of the event stream, empty if the server has none, e.g. under WSGI
+// data-refresh, data-refresh-on: selector of a table card of PartialTablesMixin that is replaced with its current
+//     version on these events, only the table is fetched
+// data-reload-on: events that reload the whole page
+// data-poll-interval: seconds between refreshes without an event stream
+// Elements with data-live-value="<event>.<field>" show that field of the latest event of that type, they are only
+// updated by the event stream.
+(() => {
+    const script = document.currentScript;
+    const REFRESH_DELAY = 500;
+
+    function split(value) {
+        return value ? value.split(" ") : [];
+    }
+
+    const refreshSelector = script.dataset.refresh;
+    const refreshOn = split(script.dataset.refreshOn);
+    const reloadOn = split(script.dataset.reloadOn);
+    const pollInterval = Number(script.dataset.pollInterval) * 1000;
+
+    let refreshTimer = null;
+
+    async function refresh() {
+        refreshTimer = null;
+        const target = refreshSelector && document.querySelector(refreshSelector);
+        if (!target) {
+            return;
+        }
+        // Don't replace a filter the user is editing, try again later
+        if (target.querySelector(".modal.show")) {
+            scheduleRefresh();
+            return;
+        }
+        const prefix = target.dataset.partialTable;
+        const url = new URL(window.location.href);
+        url.searchParams.set("_table", prefix);
+        const response = await fetch(url, { headers: { Accept: "text/html" } });
+        if (!response.ok) {
+            return;
+        }
+        const template = document.createElement("template");
+        template.innerHTML = await response.text();
+        const current = template.content.querySelector(`[data-partial-table="${prefix}"]`);
+        if (current) {
+            target.replaceWith(current);
+        }
+    }
+
+    // Events often come in bursts, e.g. while reviewing, refresh once for all of them
+    function scheduleRefresh() {
+        if (refreshTimer === null) {
+            refreshTimer = setTimeout(refresh, REFRESH_DELAY);
+        }
+    }
+
+    function handle(type, event) {
+        const data = JSON.parse(event.data);
+        for (const element of document.querySelectorAll(`[data-live-value^="${type}."]`)) {
+            const field = element.dataset.liveValue.slice(type.length + 1);
+            if (field in data) {
+                element.textContent = data[field];
+            }
+        }
+        if (reloadOn.includes(type)) {
+            window.location.reload();
+        } else if (refreshOn.includes(type)) {
+            scheduleRefresh();
+        }
+    }
+
+    function poll() {
+        if (document.hidden) {
+            return;
+        }
+        if (reloadOn.length) {
+            window.location.reload();
+        } else if (refreshOn.length) {
+            scheduleRefresh();
+        }
+    }
+
+    const types = new Set([...refreshOn, ...reloadOn]);
+    for (const element of document.querySelectorAll("[data-live-value]")) {
+        types.add(element.dataset.liveValue.split(".")[0]);
+    }
+
+    if (script.dataset.eventStream) {
+        const source = new EventSource(script.dataset.eventStream);
+        for (const type of types) {
+            source.addEventListener(type, (event) => handle(type, event));
+        }
+    } else if (pollInterval > 0) {
+        setInterval(poll, pollInterval);
+    }
+})();
@@ -0,0 +1,78 @@
+// Sorting, paging and filtering one table of a page with several tables only fetches and replaces that table, see
+// PartialTablesMixin. Filter forms are fetched when their modal is opened for the first time.
+(() => {
+    function withoutPartial(href) {
+        const url = new URL(href, window.location.href);
+        url.searchParams.delete("_table");
+        url.searchParams.delete("_filter");
+        return url;
+    }
+
+    async function loadTable(card, href) {
+        const prefix = card.dataset.partialTable;
+        const url = withoutPartial(href);
+        const partialUrl = new URL(url);
+        partialUrl.searchParams.set("_table", prefix);
+
+        const response = await fetch(partialUrl);
+        const template = document.createElement("template");
+        template.innerHTML = response.ok ? await response.text() : "";
+        const replacement = template.content.querySelector(`[data-partial-table="${prefix}"]`);
+        if (!replacement) {
+            // E.g. the object is gone, show whatever the whole page shows now
+            window.location.href = url;
+            return;
+        }
+        card.replaceWith(replacement);
+        window.history.pushState(null, "", url);
+    }
+
+    document.addEventListener("click", (event) => {
+        const link = event.target.closest("[data-partial-table] a[href^='?']");
+        if (!link || event.ctrlKey || event.metaKey || event.shiftKey) {
+            return;
+        }
+        event.preventDefault();
+        loadTable(link.closest("[data-partial-table]"), link.href);
+    });
+
+    document.addEventListener("show.bs.modal", async (event) => {
+        const modal = event.target;
+        if (!modal.dataset.filterUrl || modal.dataset.filterLoaded) {
+            return;
+        }
+        modal.dataset.filterLoaded = "true";
+        const response = await fetch(modal.dataset.filterUrl);
+        modal.querySelector(".modal-body").innerHTML = await response.text();
+    });
+
+    document.addEventListener("submit", (event) => {
+        const modal = event.target.closest("[data-filter-url]");
+        if (!modal) {
+            return;
+        }
+        event.preventDefault();
+        // Keep the parameters of the other tables, replace the ones of this filter. FormData leaves out unchecked
+        // checkboxes and empty multiple selects, so the names are taken from all fields of the form.
+        const url = new URL(window.location.href);
+        for (const field of event.target.elements) {
+            if (field.name) {
+                url.searchParams.delete(field.name);
+            }
+        }
+        const data = new FormData(event.target);
+        for (const [name, value] of data) {
+            if (value !== "") {
+                url.searchParams.append(name, value);
+            }
+        }
+        const card = modal.closest("[data-partial-table]");
+        // A filtered table starts on its first page
+        url.searchParams.delete(`${card.dataset.partialTable}page`);
+        url.searchParams.delete(`${card.dataset.partialTable}cursor`);
+        modal.addEventListener("hidden.bs.modal", () => loadTable(card, url), { once: true });
+        modal.querySelector("[data-bs-dismiss=modal]").click();
+    });
+
+    window.addEventListener("popstate", () => window.location.reload());
+})();
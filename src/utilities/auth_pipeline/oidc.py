@@ -1,25 +1,68 @@
+import logging
+
 from django.conf import settings
 from django.contrib.auth.models import Group
+from django.db import IntegrityError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Key in the extra data of the social auth of a user, holding the groups of the last login
+SYNCED_GROUPS_KEY = "synced_groups"
+
 
+def add_groups(user, group_ids: set[int]):
+    try:
+        with transaction.atomic():
+            user.groups.add(*group_ids)
+        return
+    except IntegrityError:
+        pass
+    # A group would put the player in a second group of a game, e.g. besides one assigned in the app. The other groups
+    # are still added, one at a time.
+    for group_id in sorted(group_ids):
+        try:
+            with transaction.atomic():
+                user.groups.add(group_id)
+        except IntegrityError:
+            logger.warning("Not adding user %s to group %s, they are already in another group of its game", user.pk, group_id)
 
-def assign_groups_and_attributes(backend, user, response, *args, **kwargs):
+
+def assign_groups_and_attributes(backend, user, response, *args, social=None, **kwargs):
     """
     Assign Django groups based on OIDC claims.
+
+    Only the difference to the groups of the user is written. Groups that were claimed at the previous login and aren't
+    anymore are removed, groups assigned in the app are kept. Adding and removing through user.groups sends
+    m2m_changed, which keeps the memberships in games and the cached player contexts up to date. Revoked groups are
+    removed first, so a player moved to another group of the same game doesn't conflict with the old membership.
     """
     if backend.name == "oidc":
-        groups = response.get("groups", [])
+        claimed = set(response.get("groups", []))
+        previous = set(social.extra_data.get(SYNCED_GROUPS_KEY, [])) if social is not None else set()
+        revoked = previous - claimed
+
+        group_ids = dict(Group.objects.filter(name__in=claimed | revoked).values_list("name", "pk"))
+        if missing := claimed - group_ids.keys():
+            # Other players with the same new group may log in at the same time
+            Group.objects.bulk_create([Group(name=name) for name in missing], ignore_conflicts=True)
+            group_ids.update(Group.objects.filter(name__in=missing).values_list("name", "pk"))
 
-        for group_name in groups:
-            group, _ = Group.objects.get_or_create(name=group_name)
-            user.groups.add(group)
+        current = set(user.groups.values_list("pk", flat=True))
+        removed = {group_ids[name] for name in revoked if name in group_ids} & current
+        added = {group_ids[name] for name in claimed} - current
+        if removed or added or (social is not None and previous != claimed):
+            with transaction.atomic():
+                if removed:
+                    user.groups.remove(*removed)
+                if added:
+                    add_groups(user, added)
+                if social is not None and previous != claimed:
+                    social.extra_data[SYNCED_GROUPS_KEY] = sorted(claimed)
+                    social.save(update_fields=["extra_data"])
 
         if settings.ADMIN_GROUP is not None:
-            if settings.ADMIN_GROUP in groups:
-                user.is_staff = True
-                user.is_superuser = True
-            else:
-                user.is_staff = False
-                user.is_superuser = False
-
-        user.full_clean()
-        user.save()
+            is_admin = settings.ADMIN_GROUP in claimed
+            if user.is_staff != is_admin or user.is_superuser != is_admin:
+                user.is_staff = is_admin
+                user.is_superuser = is_admin
+                user.save(update_fields=["is_staff", "is_superuser"])
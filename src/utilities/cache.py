@@ -0,0 +1,38 @@
+"""
+The cache for data that is invalidated by signals.
+
+A signal only changes the cache of the process that sends it. With a cache of each process, like the default
+LocMemCache, other workers would keep serving stale data until it expires, so such data is only cached if the default
+cache is shared by all workers, e.g. Redis or the database.
+"""
+
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def get_shared_cache() -> BaseCache | None:
+    """
+    The default cache, None if it isn't shared by the workers.
+    """
+    cache = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(cache, PROCESS_LOCAL_BACKENDS):
+        return None
+    return cache
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if get_shared_cache() is not None:
+        return []
+    return [
+        checks.Warning(
+            "The default cache isn't shared by the workers, player contexts and filter choices aren't cached.",
+            hint="Configure a cache shared by all workers, e.g. Redis or the database, in CACHES of local_settings.py.",
+            id="utilities.W001",
+        )
+    ]
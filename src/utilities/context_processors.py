@@ -1,6 +1,14 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
 from misterx_root.settings import SOCIAL_AUTH_OIDC_OIDC_ENDPOINT
 
 
 def read_settings(request):
     use_sso = bool(SOCIAL_AUTH_OIDC_OIDC_ENDPOINT)
-    return {"use_sso": use_sso}
+    return {
+        "use_sso": use_sso,
+        # Event streams occupy a worker under WSGI, pages poll instead
+        "event_streams": isinstance(request, ASGIRequest),
+        "event_poll_interval": settings.EVENT_POLL_INTERVAL,
+    }
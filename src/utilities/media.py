@@ -0,0 +1,91 @@
+import hashlib
+import struct
+
+import magic
+from django.core.files import images
+
+# Creating a magic instance loads the magic database, so it is only done once
+_magic = magic.Magic(mime=True)
+
+
+def get_mime_type(f):
+    f.seek(0)
+    mime_type = _magic.from_buffer(f.read(2048))
+    f.seek(0)
+    return mime_type
+
+
+def get_main_mime_type(file):
+    mime_type = get_mime_type(file)
+    if mime_type is not None:
+        mime_type = mime_type.split("/")[0]
+    return mime_type
+
+
+def find_mp4_box(f, box_type: bytes, start: int, end: int) -> tuple[int, int] | None:
+    # Returns the start and end of the content of the first box with the given type
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return None
+        if kind == box_type:
+            return offset + header_size, offset + size
+        offset += size
+    return None
+
+
+def get_mp4_duration(f, size: int) -> float | None:
+    # Read the duration from the movie header of MP4 and QuickTime files
+    try:
+        moov = find_mp4_box(f, b"moov", 0, size)
+        mvhd = moov and find_mp4_box(f, b"mvhd", *moov)
+        if not mvhd:
+            return None
+        f.seek(mvhd[0])
+        version = f.read(4)[0]
+        if version == 1:
+            f.seek(16, 1)
+            timescale, duration = struct.unpack(">IQ", f.read(12))
+        else:
+            f.seek(8, 1)
+            timescale, duration = struct.unpack(">II", f.read(8))
+    except (struct.error, IndexError):
+        return None
+    finally:
+        f.seek(0)
+    return duration / timescale if timescale else None
+
+
+def get_image_dimensions(f) -> tuple[int | None, int | None]:
+    # Pillow is optional, the dimensions are just not stored without it
+    try:
+        return images.get_image_dimensions(f)
+    except ImportError:
+        return None, None
+    finally:
+        f.seek(0)
+
+
+def get_file_metadata(f) -> dict:
+    mime_type = get_mime_type(f)
+    sha256 = hashlib.sha256()
+    size = 0
+    for chunk in f.chunks():
+        sha256.update(chunk)
+        size += len(chunk)
+    f.seek(0)
+
+    metadata = {"mime_type": mime_type, "size": size, "sha256": sha256.hexdigest()}
+    if mime_type.startswith("image/"):
+        metadata["width"], metadata["height"] = get_image_dimensions(f)
+    elif mime_type.startswith("video/"):
+        metadata["duration"] = get_mp4_duration(f, size)
+    return metadata
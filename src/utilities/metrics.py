@@ -0,0 +1,343 @@
+"""
+Request metrics per URL name, exposed as Server-Timing header for staff and in the Prometheus text format.
+
+Every worker process keeps histograms in memory and writes them to a file in METRICS_DIR at most every
+METRICS_FLUSH_INTERVAL seconds. The file is named after the process ID and the start time of the worker, so a worker
+that gets the ID of a stopped one doesn't overwrite its file. The metrics view merges the files of all workers, so the
+numbers are the same no matter which worker answers the scrape.
+
+So the counters never go backwards and the files don't pile up, the histograms of stopped workers are added to
+STOPPED_WORKERS_FILE: by a worker when it exits, and for workers that were killed by the next worker that starts.
+This needs the workers to run on the same host and fcntl, elsewhere the files of stopped workers are kept.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+BUCKETS = {
+    "request_duration_seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    "db_duration_seconds": (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    "template_duration_seconds": (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    "db_queries": (1, 2, 5, 10, 20, 50, 100, 200, 500),
+    "response_size_bytes": (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+}
+
+STOPPED_WORKERS_FILE = "stopped.json"
+LOCK_FILE = ".lock"
+
+HELP = {
+    "request_duration_seconds": "Wall time of requests",
+    "db_duration_seconds": "Time spent in database queries per request",
+    "template_duration_seconds": "Time spent rendering template responses per request",
+    "db_queries": "Database queries per request",
+    "response_size_bytes": "Size of non-streaming response bodies",
+}
+
+
+class Histograms:
+    """
+    Histograms per metric and view. Each one is stored as the counts per bucket, followed by the sum and the count.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Also called in a forked process, which must not write to the file of its parent
+        self.lock = threading.Lock()
+        self.data: dict[str, dict[str, list[float]]] = {name: {} for name in BUCKETS}
+        self.last_flush = time.monotonic()
+        self.file_name = f"{os.getpid()}-{time.time_ns()}.json"
+        self.flushed = False
+
+    def observe(self, name: str, view: str, value: float):
+        buckets = BUCKETS[name]
+        with self.lock:
+            histogram = self.data[name].get(view)
+            if histogram is None:
+                histogram = self.data[name][view] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[i] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def get_path(self) -> Path:
+        return Path(settings.METRICS_DIR) / self.file_name
+
+    def flush(self, force=False):
+        if not force and time.monotonic() - self.last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        with self.lock:
+            self.last_flush = time.monotonic()
+            content = json.dumps(self.data)
+        path = self.get_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.flushed:
+            self.flushed = True
+            add_stopped_workers()
+        write_atomic(path, content)
+
+
+histograms = Histograms()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=histograms.reset)
+
+
+def write_atomic(path: Path, content: str):
+    # Write to a temporary file first, so readers never see a partial file
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running as another user
+        return True
+    return True
+
+
+def merge_histograms(merged: dict[str, dict[str, list[float]]], data: dict[str, dict[str, list[float]]]):
+    for name, views in data.items():
+        if name not in merged:
+            continue
+        for view, histogram in views.items():
+            if view in merged[name]:
+                merged[name][view] = [a + b for a, b in zip(merged[name][view], histogram, strict=True)]
+            else:
+                merged[name][view] = histogram
+
+
+def read_histograms(path: Path) -> dict[str, dict[str, list[float]]] | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def lock_metrics_dir(shared=False):
+    # Readers take a shared lock, so they never see the histograms of a stopped worker twice or not at all
+    if fcntl is None:
+        yield
+        return
+    with open(Path(settings.METRICS_DIR) / LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+
+
+def add_stopped_workers(own_data: dict[str, dict[str, list[float]]] | None = None):
+    """
+    Adds the files of workers that are not running anymore to the stopped workers file and removes them. own_data are
+    the histograms of the current worker when it exits, its file is removed as well.
+    """
+    if fcntl is None:
+        return
+    directory = Path(settings.METRICS_DIR)
+    stopped_path = directory / STOPPED_WORKERS_FILE
+    own_path = histograms.get_path()
+    with lock_metrics_dir():
+        stopped = read_histograms(stopped_path) or {name: {} for name in BUCKETS}
+        added = []
+        for path in directory.glob("*.json"):
+            if path in (stopped_path, own_path):
+                continue
+            try:
+                pid = int(path.stem.split("-")[0])
+            except ValueError:
+                continue
+            if is_running(pid):
+                continue
+            data = read_histograms(path)
+            if data is not None:
+                merge_histograms(stopped, data)
+            added.append(path)
+        if own_data is not None:
+            merge_histograms(stopped, own_data)
+            added.append(own_path)
+        if not added:
+            return
+        write_atomic(stopped_path, json.dumps(stopped))
+        for path in added:
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+
+
+@atexit.register
+def flush_on_exit():
+    if not settings.METRICS_ENABLED or not any(histograms.data.values()):
+        return
+    if fcntl is None:
+        histograms.flush(force=True)
+        return
+    Path(settings.METRICS_DIR).mkdir(parents=True, exist_ok=True)
+    # Requests that still finish are counted in a new file, which the next worker adds
+    with histograms.lock:
+        data, histograms.data = histograms.data, {name: {} for name in BUCKETS}
+    add_stopped_workers(own_data=data)
+
+
+def load_histograms() -> dict[str, dict[str, list[float]]]:
+    histograms.flush(force=True)
+    merged: dict[str, dict[str, list[float]]] = {name: {} for name in BUCKETS}
+    with lock_metrics_dir(shared=True):
+        for path in Path(settings.METRICS_DIR).glob("*.json"):
+            data = read_histograms(path)
+            if data is not None:
+                merge_histograms(merged, data)
+    return merged
+
+
+def format_prometheus(data: dict[str, dict[str, list[float]]]) -> str:
+    lines = []
+    for name, views in data.items():
+        metric = f"misterx_{name}"
+        lines.append(f"# HELP {metric} {HELP[name]}")
+        lines.append(f"# TYPE {metric} histogram")
+        for view, histogram in sorted(views.items()):
+            label = view.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(BUCKETS[name], histogram, strict=False):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{view="{label}",le="+Inf"}} {histogram[-1]}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {histogram[-2]}')
+            lines.append(f'{metric}_count{{view="{label}"}} {histogram[-1]}')
+    return "\n".join(lines) + "\n"
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# The timer of the current request. A context variable instead of connection.execute_wrapper(), because under ASGI the
+# queries of sync views run in another thread, with another connection, than the middleware.
+current_query_timer: ContextVar[QueryTimer | None] = ContextVar("current_query_timer", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    timer = current_query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - start
+        timer.count += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+class MetricsMiddleware:
+    """
+    Records the metrics of every request. Template rendering is measured for template responses, which are rendered
+    after the view returned. Works with sync and async views, so async views are not moved to a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        start, queries, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.finish(request, response, start, queries, self.is_staff(request))
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        start, queries, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        # Resolving request.user queries the database, which can't be done in the event loop
+        is_staff = await sync_to_async(self.is_staff)(request)
+        return self.finish(request, response, start, queries, is_staff)
+
+    def start(self, request):
+        request._metrics_template_duration = 0.0
+        queries = QueryTimer()
+        return time.perf_counter(), queries, current_query_timer.set(queries)
+
+    def is_staff(self, request) -> bool:
+        return getattr(request, "user", None) is not None and request.user.is_staff
+
+    def finish(self, request, response, start: float, queries: QueryTimer, is_staff: bool):
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        histograms.observe("request_duration_seconds", view, duration)
+        histograms.observe("db_duration_seconds", view, queries.duration)
+        histograms.observe("db_queries", view, queries.count)
+        if request._metrics_template_duration:
+            histograms.observe("template_duration_seconds", view, request._metrics_template_duration)
+        if not response.streaming:
+            histograms.observe("response_size_bytes", view, len(response.content))
+        histograms.flush()
+
+        if is_staff:
+            # Keep entries added by others, e.g. the debug toolbar
+            existing = [response["Server-Timing"]] if response.has_header("Server-Timing") else []
+            response["Server-Timing"] = ", ".join(
+                [
+                    *existing,
+                    f"total;dur={duration * 1000:.1f}",
+                    f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+                    f"tpl;dur={request._metrics_template_duration * 1000:.1f}",
+                ]
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # The response is rendered right after the template response middleware ran
+        start = time.perf_counter()
+
+        def record(response):
+            request._metrics_template_duration += time.perf_counter() - start
+
+        response.add_post_render_callback(record)
+        return response
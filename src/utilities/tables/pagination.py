@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django_tables2.data import TableQuerysetData
+from django_tables2.rows import BoundRows
+
+
+class KeysetPage:
+    """
+    A page of a KeysetPaginator. It only knows its neighbours, so it has cursors to them instead of page numbers.
+    """
+
+    keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor: str | None, previous_cursor: str | None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by the values of a field and the primary key instead of an offset, so every page is a range
+    scan of an index on that field, however far back it is, and rows inserted in between don't shift the pages. The
+    cursors are the encoded values of the first or last row of a page.
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int, field: str, descending: bool = True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields = (field, "pk")
+        self.descending = descending
+        self.model_fields = (queryset.model._meta.get_field(field), queryset.model._meta.pk)
+
+    def encode_cursor(self, obj, after: bool) -> str:
+        # Not DjangoJSONEncoder, it cuts times to milliseconds
+        values = [field.value_to_string(obj) for field in self.model_fields]
+        payload = json.dumps([after, self.descending, *values])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> tuple[bool, list] | None:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            after, descending, *values = payload
+            values = [field.to_python(value) for field, value in zip(self.model_fields, values, strict=True)]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError):
+            return None
+        # A cursor of another sort order, e.g. from before the order was changed, starts over
+        if descending != self.descending or not isinstance(after, bool):
+            return None
+        return after, values
+
+    def get_ordering(self, reverse: bool) -> list[str]:
+        prefix = "-" if self.descending != reverse else ""
+        return [f"{prefix}{field}" for field in self.fields]
+
+    def get_filter(self, values: list, forward: bool) -> Q:
+        field, (value, pk_value) = self.fields[0], values
+        lookup = "lt" if self.descending == forward else "gt"
+        # The redundant bound on the field alone lets the database scan the index on it from the cursor on
+        return Q(**{f"{field}__{lookup}e": value}) & (Q(**{f"{field}__{lookup}": value}) | Q(**{f"pk__{lookup}": pk_value}))
+
+    def page(self, cursor: str | None) -> KeysetPage:
+        decoded = self.decode_cursor(cursor) if cursor else None
+        after = decoded is None or decoded[0]
+        queryset = self.queryset.order_by(*self.get_ordering(reverse=not after))
+        if decoded is not None:
+            queryset = queryset.filter(self.get_filter(decoded[1], forward=after))
+
+        # One row more than fits on the page tells whether there is another page
+        objects = list(queryset[: self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+        if not after:
+            objects.reverse()
+
+        has_next = has_more if after else True
+        has_previous = decoded is not None if after else has_more
+        return KeysetPage(
+            objects,
+            self,
+            next_cursor=self.encode_cursor(objects[-1], after=True) if objects and has_next else None,
+            previous_cursor=self.encode_cursor(objects[0], after=False) if objects and has_previous else None,
+        )
+
+    @property
+    def estimated_count(self) -> int | None:
+        """
+        The number of rows the query planner expects, counting them exactly would read all of them. None if the
+        database doesn't tell.
+        """
+        if connections[self.queryset.db].vendor != "postgresql":
+            return None
+        plan = json.loads(self.queryset.order_by().explain(format="json"))
+        return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPaginationMixin:
+    """
+    Paginates a table with a KeysetPaginator while it is sorted by keyset_field, the cursor is passed in the
+    prefixed cursor_field parameter. Sorted by another column, the table falls back to pagination by page number.
+    """
+
+    keyset_field: str
+    cursor_field = "cursor"
+    # Show the estimated number of rows below the table
+    estimate_count = True
+
+    @property
+    def prefixed_cursor_field(self) -> str:
+        return f"{self.prefix}{self.cursor_field}"
+
+    def get_keyset_descending(self) -> bool | None:
+        if not self.order_by:
+            return True
+        if len(self.order_by) == 1 and self.order_by[0].bare == self.keyset_field:
+            return self.order_by[0].is_descending
+        return None
+
+    def paginate(self, paginator_class=Paginator, per_page=None, page=1, *args, **kwargs):
+        descending = self.get_keyset_descending()
+        if descending is None or not isinstance(self.data, TableQuerysetData):
+            return super().paginate(paginator_class, per_page, page, *args, **kwargs)
+
+        self.paginator = KeysetPaginator(
+            self.data.data, per_page or self._meta.per_page, self.keyset_field, descending=descending
+        )
+        request = getattr(self, "request", None)
+        keyset_page = self.paginator.page(request.GET.get(self.prefixed_cursor_field) if request else None)
+        keyset_page.object_list = BoundRows(keyset_page.object_list, table=self)
+        self.page = keyset_page
+        return self
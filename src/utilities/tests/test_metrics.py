@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import metrics
+
+# Above the largest process ID of Linux, never running
+STOPPED_PID = 2**23
+
+
+class MetricsFilesTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(METRICS_DIR=self.directory, METRICS_ENABLED=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch.object(metrics, "histograms", metrics.Histograms())
+        self.histograms = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_worker_file(self, name: str, count: int):
+        histogram = [0] * (len(metrics.BUCKETS["db_queries"]) + 2)
+        histogram[0] = histogram[-1] = count
+        (self.directory / name).write_text(json.dumps({"db_queries": {"view": histogram}}))
+
+    def get_count(self) -> int:
+        return metrics.load_histograms()["db_queries"].get("view", [0])[-1]
+
+    def test_file_name(self):
+        name = self.histograms.get_path().name
+        self.assertTrue(name.startswith(f"{os.getpid()}-"))
+        # A worker that gets the process ID of a stopped one doesn't overwrite its file
+        self.histograms.reset()
+        self.assertNotEqual(self.histograms.get_path().name, name)
+
+    def test_adds_stopped_workers_on_start(self):
+        self.write_worker_file(f"{STOPPED_PID}-1.json", 2)
+        self.write_worker_file(f"{STOPPED_PID}.json", 3)
+        self.write_worker_file(f"{os.getppid()}-1.json", 4)
+        self.histograms.observe("db_queries", "view", 1)
+        self.assertEqual(self.get_count(), 10)
+        self.assertEqual(
+            sorted(path.name for path in self.directory.glob("*.json")),
+            sorted([f"{os.getppid()}-1.json", self.histograms.get_path().name, metrics.STOPPED_WORKERS_FILE]),
+        )
+
+        # Only on the first flush
+        self.write_worker_file(f"{STOPPED_PID}-2.json", 5)
+        self.histograms.flush(force=True)
+        self.assertTrue((self.directory / f"{STOPPED_PID}-2.json").exists())
+        self.assertEqual(self.get_count(), 15)
+
+    def test_adds_own_histograms_on_exit(self):
+        self.histograms.observe("db_queries", "view", 1)
+        self.histograms.flush(force=True)
+        metrics.flush_on_exit()
+        self.assertEqual([path.name for path in self.directory.glob("*.json")], [metrics.STOPPED_WORKERS_FILE])
+
+        # The counters of the next worker are added to them
+        self.histograms.reset()
+        self.histograms.observe("db_queries", "view", 1)
+        metrics.flush_on_exit()
+        self.assertEqual([path.name for path in self.directory.glob("*.json")], [metrics.STOPPED_WORKERS_FILE])
+        self.assertEqual(self.get_count(), 2)
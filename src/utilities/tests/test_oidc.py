@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+
+from misterx.models import Game, Membership, PlayerGroup
+from utilities.auth_pipeline.oidc import SYNCED_GROUPS_KEY, assign_groups_and_attributes
+
+BACKEND = SimpleNamespace(name="oidc")
+
+
+class SocialAuth(SimpleNamespace):
+    def save(self, **kwargs):
+        pass
+
+
+class AssignGroupsTest(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(name="Game")
+        self.group_a = PlayerGroup.objects.create(name="A")
+        self.group_b = PlayerGroup.objects.create(name="B")
+        self.game.groups.add(self.group_a, self.group_b)
+        self.user = User.objects.create(username="player")
+        self.social = SocialAuth(extra_data={})
+
+    def login(self, *groups):
+        assign_groups_and_attributes(BACKEND, self.user, {"groups": list(groups)}, social=self.social)
+
+    def get_groups(self):
+        return set(self.user.groups.values_list("name", flat=True))
+
+    def test_creates_and_adds_claimed_groups(self):
+        self.login("A", "new")
+        self.assertEqual(self.get_groups(), {"A", "new"})
+        self.assertTrue(Group.objects.filter(name="new").exists())
+        self.assertEqual(self.social.extra_data[SYNCED_GROUPS_KEY], ["A", "new"])
+        self.assertEqual(Membership.objects.get(user=self.user).group_id, self.group_a.pk)
+
+    def test_moves_player_to_other_group_of_game(self):
+        self.login("A")
+        self.login("B")
+        self.assertEqual(self.get_groups(), {"B"})
+        self.assertEqual(Membership.objects.get(user=self.user).group_id, self.group_b.pk)
+
+    def test_keeps_groups_assigned_in_app(self):
+        other = Group.objects.create(name="other")
+        self.user.groups.add(other)
+        self.login("A")
+        self.login()
+        self.assertEqual(self.get_groups(), {"other"})
+
+    def test_skips_conflicting_group(self):
+        # Assigned in the app, not by the identity provider
+        self.user.groups.add(self.group_a)
+        with self.assertLogs("utilities.auth_pipeline.oidc", "WARNING"):
+            self.login("B", "new")
+        self.assertEqual(self.get_groups(), {"A", "new"})
+        self.assertEqual(Membership.objects.get(user=self.user).group_id, self.group_a.pk)
+
+    def test_unchanged_login_only_reads(self):
+        self.login("A")
+        with self.assertNumQueries(2):
+            self.login("A")
+
+    def test_admin_group(self):
+        self.login("misterx_admins")
+        self.assertTrue(self.user.is_staff)
+        self.assertTrue(self.user.is_superuser)
+        self.login()
+        self.assertFalse(self.user.is_staff)
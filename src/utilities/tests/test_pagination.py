@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from ..tables.pagination import KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        # Pairs of users joined at the same time, the primary key orders them
+        for i in range(9):
+            User.objects.create(username=f"user{i}", date_joined=now - timedelta(minutes=i // 2))
+        self.users = list(User.objects.order_by("-date_joined", "-pk"))
+
+    def get_paginator(self, descending=True):
+        return KeysetPaginator(User.objects.all(), 2, "date_joined", descending=descending)
+
+    def walk(self, paginator, cursor=None, forward=True) -> list[list[User]]:
+        pages = []
+        while True:
+            page = paginator.page(cursor)
+            pages.append(list(page.object_list))
+            cursor = page.next_cursor if forward else page.previous_cursor
+            if cursor is None:
+                return pages
+
+    def test_forward(self):
+        pages = self.walk(self.get_paginator())
+        self.assertEqual([user for page in pages for user in page], self.users)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 2, 1])
+
+    def test_ascending(self):
+        pages = self.walk(self.get_paginator(descending=False))
+        self.assertEqual([user for page in pages for user in page], self.users[::-1])
+
+    def test_backward(self):
+        paginator = self.get_paginator()
+        last = paginator.page(None)
+        while last.has_next():
+            last = paginator.page(last.next_cursor)
+        pages = self.walk(paginator, last.previous_cursor, forward=False)
+        self.assertEqual([user for page in reversed(pages) for user in page], self.users[:8])
+        self.assertFalse(paginator.page(None).has_previous())
+
+    def test_inserted_rows_dont_shift_pages(self):
+        paginator = self.get_paginator()
+        first = paginator.page(None)
+        User.objects.create(username="new")
+        self.assertEqual(list(paginator.page(first.next_cursor).object_list), self.users[2:4])
+
+    def test_invalid_cursor(self):
+        paginator = self.get_paginator()
+        # Values of the wrong type for the fields raise ValidationError
+        wrong_values = base64.urlsafe_b64encode(json.dumps([True, True, "x", "1"]).encode()).decode()
+        for cursor in ("invalid", "e30", paginator.encode_cursor(self.users[2], after=True).swapcase(), wrong_values):
+            with self.subTest(cursor):
+                self.assertEqual(list(paginator.page(cursor).object_list), self.users[:2])
+
+    def test_cursor_of_other_order(self):
+        cursor = self.get_paginator(descending=False).page(None).next_cursor
+        self.assertEqual(list(self.get_paginator().page(cursor).object_list), self.users[:2])
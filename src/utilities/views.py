@@ -1,8 +1,129 @@
+from collections.abc import AsyncIterator, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
 from django.views.generic import CreateView
 
+from .metrics import format_prometheus, load_histograms
+
 
 class InitialCreateView(CreateView):
     def get_initial(self):
         initial = super().get_initial()
         initial.update(self.request.GET.items())
         return initial
+
+
+class SingleObjectCacheMixin:
+    """
+    Resolves the object of a single object view only once per request, including the lookup of permission mixins.
+
+    select_related and prefetch_related are applied to the queryset the object is loaded from. query_budget is the
+    number of queries a GET request of the view is expected to take at most. It is tested in
+    misterx/tests/test_query_budgets.py, the check_query_budgets command checks it against the data of a database.
+    """
+
+    select_related: tuple[str, ...] = ()
+    prefetch_related: tuple[str, ...] = ()
+    query_budget: int | None = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_cached_object"):
+            self._cached_object = super().get_object()
+        return self._cached_object
+
+
+class PartialTablesMixin:
+    """
+    Renders only one table of a MultiTableMixin view, selected by its prefix in the _table parameter, so sorting or
+    paging a table doesn't count and render all of them. With the _filter parameter, only the filter form of a table is
+    rendered, which fills its filter modal when it is opened.
+
+    tables_template_name is the part of the page with the tables, it is rendered instead of the page for these requests.
+    The prefix of the table of a SingleTableMixin view is empty, so the parameters may be empty as well.
+    """
+
+    tables_template_name: str | None = None
+
+    def get_partial(self) -> tuple[str | None, str | None]:
+        return self.request.GET.get("_table"), self.request.GET.get("_filter")
+
+    def get_template_names(self):
+        if self.get_partial() != (None, None):
+            return [self.tables_template_name]
+        return super().get_template_names()
+
+    def get_table_pagination(self, table):
+        partial_table, partial_filter = self.get_partial()
+        # Tables that are not rendered don't need their rows counted
+        if (partial_table is not None or partial_filter is not None) and table.prefix != partial_table:
+            return False
+        return super().get_table_pagination(table)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        partial_table, partial_filter = self.get_partial()
+        context.update({"partial_tables": True, "partial_table": partial_table, "partial_filter": partial_filter})
+        return context
+
+
+async def aget_user(request):
+    """
+    The user of the request for async views. request.auser() fails for users logged in through OIDC, as the backend
+    of social auth has no aget_user(), so request.user is resolved in a thread instead.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def iterate_in_thread(iterator: Iterator) -> AsyncIterator:
+    """
+    The items of a sync iterator, each read in the thread of the request, e.g. rows of a server-side cursor.
+    """
+    end = object()
+    while (item := await sync_to_async(next)(iterator, end)) is not end:
+        yield item
+
+
+def stream_response(request, response: StreamingHttpResponse) -> StreamingHttpResponse:
+    """
+    Under ASGI, Django reads the sync iterator of a streaming response completely before sending anything, so the
+    content is read piece by piece in a thread instead. Under WSGI, it is sent as it is read anyway.
+    """
+    if isinstance(request, ASGIRequest) and not response.is_async:
+        response.streaming_content = iterate_in_thread(iter(response.streaming_content))
+    return response
+
+
+class AsyncLoginRequiredMixin:
+    """
+    Redirects anonymous users to the login page, for views with async handlers. Unlike LoginRequiredMixin, the user is
+    loaded without blocking the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+
+def metrics(request):
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not request.user.is_staff and not (settings.METRICS_TOKEN and constant_time_compare(token, settings.METRICS_TOKEN)):
+        return HttpResponse(status=403)
+    return HttpResponse(format_prometheus(load_histograms()), content_type="text/plain; version=0.0.4; charset=utf-8")